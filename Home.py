@@ -1,8 +1,31 @@
 import streamlit as st
 from streamlit import session_state as ss
 
+from scripts.db import connection_stats
+from scripts.diagnostics import diagnostico_solicitado, render_diagnostico
+from scripts.telemetry import pagina
+
 st.set_page_config(page_title="Acompanhamento de Assuntos - Administração Tech Inteli")
 
-st.title("Acompanhamento de Assuntos do Curso de Administração Tech do Inteli")
-st.write("Bem-vindo ao sistema de acompanhamento de assuntos.")
-st.write("Use os botões ao lado para navegar.")
+# Painel de diagnóstico escondido (/?diagnostico=1 com DIAGNOSTICO_HABILITADO=1)
+if diagnostico_solicitado():
+    render_diagnostico()
+    st.stop()
+
+with pagina("Home"):
+    st.title("Acompanhamento de Assuntos do Curso de Administração Tech do Inteli")
+    st.write("Bem-vindo ao sistema de acompanhamento de assuntos.")
+    st.write("Use os botões ao lado para navegar.")
+
+    with st.expander("🔌 Conexões com o banco neste processo"):
+        stats = connection_stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total abertas", f"{stats['total']} / {stats['total_max']}")
+        col2.metric(
+            "Pool psycopg2 (em uso / ociosas)",
+            f"{stats['psycopg2_em_uso']} / {stats['psycopg2_ociosas']}",
+        )
+        col3.metric(
+            "Engine SQLAlchemy (em uso / ociosas)",
+            f"{stats['engine_em_uso']} / {stats['engine_ociosas']}",
+        )
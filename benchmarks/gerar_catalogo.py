@@ -0,0 +1,180 @@
+# benchmarks/gerar_catalogo.py
+import argparse
+import io
+import random
+import time
+
+from migrations.migration import (
+    create_assunto_path_view,
+    create_contagem_hierarquia,
+    create_normalized_tables,
+    create_search_indexes,
+    create_slow_query_log,
+    create_workload_indexes,
+)
+from scripts.db import get_connection
+
+# Palavras usadas nos nomes gerados, para a busca por trigramas ter
+# o que casar (com e sem acento)
+PALAVRAS = [
+    "anatomia", "fisiologia", "farmacologia", "patologia", "ética", "saúde",
+    "clínica", "cirurgia", "pediatria", "genética", "imunologia", "bioquímica",
+    "epidemiologia", "psicologia", "nutrição", "microbiologia", "histologia",
+    "semiologia", "radiologia", "obstetrícia", "ginecologia", "neurologia",
+    "cardiologia", "pneumologia", "oncologia", "urgência", "família", "gestão",
+    "comunicação", "pesquisa", "prática", "prevenção", "diagnóstico", "terapêutica",
+]
+
+# Tabelas na ordem de carga; todas têm o trigger trg_contagem_<tabela>
+TABELAS = ["macro_tema", "area", "subarea", "disciplina", "assunto", "lbl", "assunto_lbl"]
+
+# Linhas por COPY, para não montar o arquivo inteiro em memória
+LOTE_COPY = 100_000
+
+
+def _nome(rng, prefixo, i):
+    return f"{prefixo} {i} {' '.join(rng.sample(PALAVRAS, 2)).title()}"
+
+
+def _copy(cur, tabela, colunas, linhas):
+    """Envia as linhas (geradas sob demanda) por COPY, em lotes."""
+    total = 0
+    while True:
+        buffer = io.StringIO()
+        n = 0
+        for linha in linhas:
+            buffer.write("\t".join(str(v) for v in linha))
+            buffer.write("\n")
+            n += 1
+            if n >= LOTE_COPY:
+                break
+        if not n:
+            return total
+        buffer.seek(0)
+        cur.copy_expert(f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN", buffer)
+        total += n
+
+
+def gerar(args):
+    rng = random.Random(args.seed)
+    n_macros = args.macro_temas
+    n_areas = n_macros * args.areas_por_macro
+    n_subareas = n_areas * args.subareas_por_area
+    n_disciplinas = n_subareas * args.disciplinas_por_subarea
+
+    resumo = {}
+    inicio = time.perf_counter()
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM macro_tema) OR EXISTS (SELECT 1 FROM lbl)")
+        if cur.fetchone()[0]:
+            if not args.limpar:
+                raise SystemExit("O banco já tem dados; use --limpar para apagar tudo antes.")
+            cur.execute(f"TRUNCATE {', '.join(TABELAS)}, contagem_hierarquia RESTART IDENTITY CASCADE")
+
+        # Os contadores são recalculados de uma vez no final
+        for tabela in TABELAS:
+            cur.execute(f"ALTER TABLE {tabela} DISABLE TRIGGER trg_contagem_{tabela}")
+
+        resumo["macro_tema"] = _copy(
+            cur, "macro_tema", ["id", "macro_tema"],
+            ((i, _nome(rng, "Macro Tema", i)) for i in range(1, n_macros + 1)),
+        )
+        resumo["area"] = _copy(
+            cur, "area", ["id", "area", "macro_tema_id"],
+            ((i, _nome(rng, "Área", i), (i - 1) // args.areas_por_macro + 1)
+             for i in range(1, n_areas + 1)),
+        )
+        resumo["subarea"] = _copy(
+            cur, "subarea", ["id", "subarea", "area_id"],
+            ((i, _nome(rng, "Subárea", i), (i - 1) // args.subareas_por_area + 1)
+             for i in range(1, n_subareas + 1)),
+        )
+        resumo["disciplina"] = _copy(
+            cur, "disciplina", ["id", "nome", "subarea_id"],
+            ((i, _nome(rng, "Disciplina", i), (i - 1) // args.disciplinas_por_subarea + 1)
+             for i in range(1, n_disciplinas + 1)),
+        )
+        # Assuntos distribuídos em rodízio pelas disciplinas
+        resumo["assunto"] = _copy(
+            cur, "assunto", ["id", "assunto", "disciplina_id"],
+            ((i, _nome(rng, "Assunto", i), (i - 1) % n_disciplinas + 1)
+             for i in range(1, args.assuntos + 1)),
+        )
+        resumo["lbl"] = _copy(
+            cur, "lbl", ["id", "lbl", "nome", "descricao"],
+            ((i, i, _nome(rng, "LBL", i), f"Descrição do LBL {i}")
+             for i in range(1, args.lbls + 1)),
+        )
+
+        def associacoes():
+            for assunto_id in range(1, args.assuntos + 1):
+                if rng.random() >= args.densidade:
+                    continue
+                quantidade = rng.randint(1, min(args.max_lbls_por_assunto, args.lbls))
+                for lbl_id in rng.sample(range(1, args.lbls + 1), quantidade):
+                    yield assunto_id, lbl_id
+
+        resumo["assunto_lbl"] = _copy(cur, "assunto_lbl", ["assunto_id", "lbl_id"], associacoes())
+
+        for tabela in TABELAS[:-1]:
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {tabela}), false)"
+            )
+        for tabela in TABELAS:
+            cur.execute(f"ALTER TABLE {tabela} ENABLE TRIGGER trg_contagem_{tabela}")
+
+        cur.execute("SELECT rebuild_contagem_hierarquia()")
+        cur.execute("REFRESH MATERIALIZED VIEW assunto_path")
+
+    # VACUUM marca as páginas como visíveis (index-only scans sem ir à
+    # tabela) e não roda dentro de transação
+    with get_connection() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("VACUUM ANALYZE")
+        finally:
+            conn.autocommit = False
+
+    resumo["segundos"] = time.perf_counter() - inicio
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cria o schema (migrations/migration.py) e o preenche com um catálogo sintético via COPY."
+    )
+    parser.add_argument("--macro-temas", type=int, default=15)
+    parser.add_argument("--areas-por-macro", type=int, default=8)
+    parser.add_argument("--subareas-por-area", type=int, default=6)
+    parser.add_argument("--disciplinas-por-subarea", type=int, default=10)
+    parser.add_argument("--assuntos", type=int, default=1_000_000, help="Total de assuntos")
+    parser.add_argument("--lbls", type=int, default=200)
+    parser.add_argument(
+        "--densidade", type=float, default=0.8,
+        help="Fração dos assuntos com pelo menos um LBL (0 a 1)",
+    )
+    parser.add_argument("--max-lbls-por-assunto", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--limpar", action="store_true", help="Apaga os dados existentes antes de gerar"
+    )
+    args = parser.parse_args()
+
+    create_normalized_tables()
+    create_assunto_path_view()
+    create_contagem_hierarquia()
+    create_search_indexes()
+    create_workload_indexes()
+    create_slow_query_log()
+
+    resumo = gerar(args)
+    print("✅ Catálogo sintético gerado")
+    for tabela in TABELAS:
+        print(f"- {tabela}: {resumo[tabela]} linhas")
+    print(f"- Tempo: {resumo['segundos']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
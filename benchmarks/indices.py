@@ -0,0 +1,117 @@
+# benchmarks/indices.py
+#
+# Mede o ganho de cada índice de create_workload_indexes: roda as leituras
+# que ele atende no schema atual e depois, na mesma transação, no anterior
+# (sem o composto e com o índice de uma coluna de volta). Tudo é desfeito
+# no final.
+#
+# Uso (catálogo sintético de benchmarks.gerar_catalogo):
+#   python -m benchmarks.indices
+import argparse
+import datetime
+import json
+import os
+
+from benchmarks.suite import CASOS, PASTA_RESULTADOS, _medir, _params
+from scripts.db import get_connection
+from scripts.sql import CONSULTAS
+
+# (índice novo ou None, DDL do índice antigo a recriar ou None, instruções)
+INDICES = [
+    ("idx_area_macro_tema_area",
+     "CREATE INDEX idx_area_macro_tema ON area(macro_tema_id)", ["areas_por_macro_tema"]),
+    ("idx_subarea_area_subarea",
+     "CREATE INDEX idx_subarea_area ON subarea(area_id)", ["subareas_por_area"]),
+    ("idx_disciplina_subarea_nome",
+     "CREATE INDEX idx_disciplina_subarea ON disciplina(subarea_id)", ["disciplinas_por_subarea"]),
+    ("idx_assunto_disciplina_assunto",
+     "CREATE INDEX idx_assunto_disciplina ON assunto(disciplina_id)", ["hierarquia"]),
+    ("idx_assunto_lbl_lbl_assunto",
+     "CREATE INDEX idx_assunto_lbl_lbl ON assunto_lbl(lbl_id)", ["tabela_assuntos_lbl"]),
+    # Removido sem substituto: a PK (assunto_id, lbl_id) já atende a sonda
+    (None,
+     "CREATE INDEX idx_assunto_lbl_assunto ON assunto_lbl(assunto_id)", ["assuntos_sem_lbl"]),
+]
+
+
+def _plano(cur, sql, params):
+    """Tipos de nó com índice e blocos lidos (cache + disco) numa execução."""
+    cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+    raiz = cur.fetchone()[0][0]["Plan"]
+    nos, pendentes = [], [raiz]
+    while pendentes:
+        no = pendentes.pop()
+        pendentes.extend(no.get("Plans", []))
+        if "Index Name" in no:
+            nos.append(f"{no['Node Type']} ({no['Index Name']})")
+    return {
+        "nos": sorted(set(nos)),
+        "blocos": raiz.get("Shared Hit Blocks", 0) + raiz.get("Shared Read Blocks", 0),
+    }
+
+
+def _medicao(cur, nome, params, repeticoes):
+    sql = CONSULTAS[nome].sql
+
+    def rodar():
+        cur.execute(sql, params)
+        return len(cur.fetchall())
+
+    return _medir(rodar, repeticoes) | _plano(cur, sql, params)
+
+
+def rodar(repeticoes):
+    parametros = {}
+    for _, nome, params, _ in CASOS:
+        parametros.setdefault(nome, params)
+
+    resultados = []
+    with get_connection() as conn, conn.cursor() as cur:
+        for indice, antigo, nomes in INDICES:
+            params = {nome: _params(parametros.get(nome)) for nome in nomes}
+            atual = {nome: _medicao(cur, nome, params[nome], repeticoes) for nome in nomes}
+            if indice:
+                cur.execute(f"DROP INDEX {indice}")
+            if antigo:
+                cur.execute(antigo)
+            anterior = {nome: _medicao(cur, nome, params[nome], repeticoes) for nome in nomes}
+            conn.rollback()
+
+            for nome in nomes:
+                resultados.append({
+                    "indice": indice or antigo.split()[2] + " (removido)",
+                    "consulta": nome,
+                    "anterior": anterior[nome],
+                    "atual": atual[nome],
+                })
+                print(
+                    f"{resultados[-1]['indice']:<40} {nome:<25} "
+                    f"anterior {anterior[nome]['p50_ms']:>9.2f} ms / {anterior[nome]['blocos']:>7} blocos   "
+                    f"atual {atual[nome]['p50_ms']:>9.2f} ms / {atual[nome]['blocos']:>7} blocos"
+                )
+                for rotulo, medicao in (("anterior", anterior[nome]), ("atual", atual[nome])):
+                    print(f"{'':<40} {rotulo}: {', '.join(medicao['nos']) or 'sem índice'}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara as leituras antes e depois de cada índice de create_workload_indexes."
+    )
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--saida", help="Arquivo JSON (padrão: benchmarks/resultados/indices-<data>.json)")
+    args = parser.parse_args()
+
+    resultados = rodar(args.repeticoes)
+
+    saida = args.saida or os.path.join(
+        PASTA_RESULTADOS, f"indices-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
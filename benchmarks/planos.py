@@ -0,0 +1,146 @@
+# benchmarks/planos.py
+#
+# Verifica se os planos das instruções mais sensíveis continuam usando os
+# índices esperados. Roda no catálogo sintético (benchmarks.gerar_catalogo)
+# e sai com código 1 se algum plano perdeu o índice ou o anti-join.
+#
+# Uso:
+#   python -m benchmarks.gerar_catalogo --assuntos 1000000 --lbls 200 --limpar
+#   python -m benchmarks.planos
+import argparse
+import json
+import sys
+
+from benchmarks.suite import CASOS, _params
+from scripts.db import get_connection
+from scripts.sql import CONSULTAS, _execute_por_nome, _para_prepare
+
+
+def usa_indice(*indices):
+    """O plano passa por pelo menos um dos índices (Index/Bitmap/Index Only Scan)."""
+    def verificar(nos):
+        return any(no.get("Index Name") in indices for no in nos)
+    verificar.descricao = f"usa {' ou '.join(indices)}"
+    return verificar
+
+
+def so_indice(indice):
+    """O índice é lido num Index Only Scan (sem visitar a tabela)."""
+    def verificar(nos):
+        return any(
+            no.get("Index Name") == indice and no["Node Type"] == "Index Only Scan"
+            for no in nos
+        )
+    verificar.descricao = f"index-only em {indice}"
+    return verificar
+
+
+def sem_sort():
+    """As linhas já saem na ordem pedida (nenhum nó Sort)."""
+    def verificar(nos):
+        return not any(no["Node Type"] in ("Sort", "Incremental Sort") for no in nos)
+    verificar.descricao = "sem Sort"
+    return verificar
+
+
+def anti_join():
+    """O NOT EXISTS virou um anti-join (e não um SubPlan por linha)."""
+    def verificar(nos):
+        return any(no.get("Join Type") == "Anti" for no in nos)
+    verificar.descricao = "anti-join"
+    return verificar
+
+
+# (instrução registrada, expectativas). Os parâmetros vêm dos casos da suíte.
+ESPERADOS = [
+    # scripts/queries.py. Área e subárea cabem em poucas páginas no catálogo
+    # sintético e são lidas por seq scan; só a disciplina é verificada.
+    ("disciplinas_por_subarea", [so_indice("idx_disciplina_subarea_nome"), sem_sort()]),
+    # Página d (Relatório Geral): paginação por keyset na ordem do índice
+    ("relatorio_geral_pagina", [usa_indice("idx_assunto_path_ordem")]),
+    # Página e (Assuntos por LBL)
+    ("tabela_assuntos_lbl", [
+        so_indice("idx_assunto_lbl_lbl_assunto"),
+        usa_indice("idx_assunto_path_assunto"),
+    ]),
+    # Página h (Assuntos Sem Associação): a sonda por assunto_id usa a PK
+    ("assuntos_sem_lbl", [anti_join()]),
+    # Página j (Buscar)
+    ("busca_global", [usa_indice("idx_assunto_busca")]),
+]
+
+
+def _nos(plano):
+    yield plano
+    for filho in plano.get("Plans", []):
+        yield from _nos(filho)
+
+
+def _plano(cur, consulta, params, generico):
+    """Plano executado (EXPLAIN ANALYZE); `generico` força o plano genérico do PREPARE."""
+    if not generico:
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {consulta.sql}", params)
+        return cur.fetchone()[0][0]["Plan"]
+    nome_plano = f"plano_{consulta.nome}"
+    cur.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+    cur.execute(f"PREPARE {nome_plano} AS {_para_prepare(consulta.sql)}")
+    try:
+        cur.execute(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {_execute_por_nome(nome_plano, params)}",
+            params,
+        )
+        return cur.fetchone()[0][0]["Plan"]
+    finally:
+        cur.execute(f"DEALLOCATE {nome_plano}")
+
+
+def verificar_planos(mostrar_planos=False):
+    """Lista de (instrução, variante, expectativa, ok, índices usados)."""
+    parametros = {}
+    for _, nome, params, _ in CASOS:
+        parametros.setdefault(nome, params)
+
+    resultados = []
+    with get_connection() as conn, conn.cursor() as cur:
+        for nome, expectativas in ESPERADOS:
+            consulta = CONSULTAS[nome]
+            params = _params(parametros.get(nome))
+            # Instruções preparadas rodam com plano genérico depois de algumas
+            # execuções: as duas variantes precisam manter o índice
+            variantes = [("custom", False)] + ([("genérico", True)] if consulta.preparar else [])
+            for variante, generico in variantes:
+                plano = _plano(cur, consulta, params, generico)
+                conn.rollback()
+                nos = list(_nos(plano))
+                indices = sorted({no["Index Name"] for no in nos if "Index Name" in no})
+                if mostrar_planos:
+                    print(json.dumps(plano, ensure_ascii=False, indent=2))
+                for expectativa in expectativas:
+                    resultados.append(
+                        (nome, variante, expectativa.descricao, expectativa(nos), indices)
+                    )
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Falha se um plano perdeu o uso de índice esperado."
+    )
+    parser.add_argument("--mostrar-planos", action="store_true")
+    args = parser.parse_args()
+
+    falhas = 0
+    for nome, variante, descricao, ok, indices in verificar_planos(args.mostrar_planos):
+        print(f"{'✅' if ok else '❌'} {nome:<25} {variante:<9} {descricao}")
+        if not ok:
+            falhas += 1
+            print(f"   índices no plano: {', '.join(indices) or 'nenhum'}")
+
+    if falhas:
+        print(f"\n{falhas} expectativa(s) de plano não atendida(s).")
+        sys.exit(1)
+    print("\nTodos os planos usam os índices esperados.")
+
+
+if __name__ == "__main__":
+    main()
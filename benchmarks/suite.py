@@ -0,0 +1,306 @@
+# benchmarks/suite.py
+#
+# Uso (num Postgres local, com DATABASE_URL no .env):
+#   python -m benchmarks.gerar_catalogo --assuntos 1000000 --lbls 200 --limpar
+#   python -m benchmarks.suite --comparar benchmarks/resultados/<anterior>.json
+import argparse
+import datetime
+import json
+import os
+import statistics
+import time
+
+import pandas as pd
+
+from scripts.db import get_connection
+from scripts.export import exportar_query
+from scripts.hierarchy import HierarchySnapshot
+from scripts.importer import importar_grade
+from scripts.moves import fundir_nos
+from scripts.reports import filtros_relatorio_geral
+from scripts.sql import CONSULTAS, executar, executar_lote
+
+PASTA_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+_PAGINA = {f"k{i}": None for i in range(7)} | {"limite": 101}
+
+# (rótulo, instrução registrada, parâmetros, pesado). Os parâmetros podem
+# ser fixos ou um SELECT que devolve uma linha de amostra do catálogo.
+# Escritas rodam numa transação desfeita logo depois.
+CASOS = [
+    # scripts/queries.py
+    ("macro_temas", "macro_temas", None, False),
+    ("areas_por_macro_tema", "areas_por_macro_tema",
+     "SELECT macro_tema_id FROM area LIMIT 1", False),
+    ("subareas_por_area", "subareas_por_area", "SELECT area_id FROM subarea LIMIT 1", False),
+    ("disciplinas_por_subarea", "disciplinas_por_subarea",
+     "SELECT subarea_id FROM disciplina LIMIT 1", False),
+    ("assuntos", "assuntos", None, True),
+    ("lbls", "lbls", None, False),
+    ("hierarquia", "hierarquia", None, True),
+    ("subarvore_macro_tema", "subarvore_macro_tema", "SELECT id FROM macro_tema LIMIT 1", False),
+    # scripts/inserts.py
+    ("inserir_lbl", "inserir_lbl",
+     "SELECT COALESCE(MAX(lbl), 0) + 1, 'Benchmark', 'Benchmark' FROM lbl", False),
+    ("inserir_macro_tema", "inserir_macro_tema", ("Benchmark",), False),
+    ("inserir_area", "inserir_area", "SELECT 'Benchmark', id FROM macro_tema LIMIT 1", False),
+    ("inserir_subarea", "inserir_subarea", "SELECT 'Benchmark', id FROM area LIMIT 1", False),
+    ("inserir_disciplina", "inserir_disciplina",
+     "SELECT 'Benchmark', id FROM subarea LIMIT 1", False),
+    ("inserir_assunto", "inserir_assunto",
+     "SELECT 'Benchmark', id FROM disciplina LIMIT 1", False),
+    ("inserir_assunto_lbl", "inserir_assunto_lbl",
+     "SELECT a.id, l.id FROM assunto a, lbl l LIMIT 1", False),
+    ("inserir_assuntos_lbls (100 × 3)", "inserir_assuntos_lbls",
+     "SELECT ARRAY(SELECT id FROM assunto LIMIT 100), ARRAY(SELECT id FROM lbl LIMIT 3)", False),
+    ("remover_assuntos_lbls (100 × 3)", "remover_assuntos_lbls",
+     "SELECT ARRAY(SELECT id FROM assunto LIMIT 100), ARRAY(SELECT id FROM lbl LIMIT 3)", False),
+    # Edição
+    ("atualizar_lbl", "atualizar_lbl", "SELECT lbl, nome, descricao, id FROM lbl LIMIT 1", False),
+    ("atualizar_macro_tema", "atualizar_macro_tema",
+     "SELECT macro_tema, id FROM macro_tema LIMIT 1", False),
+    ("atualizar_area", "atualizar_area", "SELECT area, macro_tema_id, id FROM area LIMIT 1", False),
+    ("atualizar_subarea", "atualizar_subarea",
+     "SELECT subarea, area_id, id FROM subarea LIMIT 1", False),
+    ("atualizar_disciplina", "atualizar_disciplina",
+     "SELECT nome, subarea_id, id FROM disciplina LIMIT 1", False),
+    ("atualizar_assunto", "atualizar_assunto",
+     "SELECT assunto, disciplina_id, id FROM assunto LIMIT 1", False),
+    # Páginas e relatórios
+    ("relatorio_geral_pagina", "relatorio_geral_pagina",
+     filtros_relatorio_geral() | _PAGINA, False),
+    ("relatorio_geral_pagina (texto)", "relatorio_geral_pagina",
+     filtros_relatorio_geral(texto="farmaco") | _PAGINA, False),
+    ("relatorio_geral_total", "relatorio_geral_total", filtros_relatorio_geral(), True),
+    ("contagens", "contagens", None, False),
+    ("tabela_assuntos_lbl", "tabela_assuntos_lbl",
+     "SELECT lbl_id FROM assunto_lbl LIMIT 1", False),
+    ("total_assuntos_por_macro_tema", "total_assuntos_por_macro_tema", None, False),
+    ("assuntos_sem_lbl", "assuntos_sem_lbl", None, True),
+    ("assuntos_sem_lbl_previa", "assuntos_sem_lbl_previa", (100,), False),
+    ("assuntos_sem_lbl_total", "assuntos_sem_lbl_total", None, True),
+    ("busca_global", "busca_global",
+     {"termo": "farmacologia", "prefixo": "farmacologia%",
+      "contem": "%farmacologia%", "limite": 20}, False),
+    *((f"busca_{nivel}", f"busca_{nivel}",
+       {"termo": "farmacologia", "prefixo": "farmacologia%",
+        "contem": "%farmacologia%", "limite": 20}, False)
+      for nivel in ("area", "subarea", "disciplina", "assunto")),
+    # Log de consultas lentas
+    ("registrar_consulta_lenta", "registrar_consulta_lenta",
+     ("benchmark", "-", 0.0, "[]", '[{"Plan": {}}]'), False),
+    ("consultas_lentas_recentes", "consultas_lentas_recentes", (20,), False),
+    # Manutenção
+    ("refresh_assunto_path", "refresh_assunto_path", None, True),
+    ("rebuild_contagens", "rebuild_contagens", None, True),
+]
+
+# Instruções cobertas pelos casos de ponta a ponta abaixo
+COBERTAS_POR_FLUXO = {
+    "relatorio_geral_exportacao",
+    *(nome for nome in CONSULTAS if nome.startswith(
+        ("importar_", "resolver_", "lote_", "mover_", "remover_vazios_", "contagem_")
+    )),
+}
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _medir(funcao, repeticoes):
+    """Uma execução de aquecimento e `repeticoes` medidas, em ms."""
+    linhas = funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "linhas": linhas,
+        "repeticoes": repeticoes,
+        "min_ms": min(tempos),
+        "p50_ms": statistics.median(tempos),
+        "p95_ms": _percentil(tempos, 95),
+        "max_ms": max(tempos),
+    }
+
+
+def _params(params):
+    if not isinstance(params, str):
+        return params
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(params)
+        return cur.fetchone()
+
+
+def _instrucao(nome, params):
+    """Executa a instrução pelo caminho da aplicação e desfaz qualquer escrita."""
+    def rodar():
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, nome, params)
+            linhas = len(cur.fetchall()) if cur.description else cur.rowcount
+            conn.rollback()
+        return linhas
+    return rodar
+
+
+def _snapshot():
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "hierarquia")
+        snapshot = HierarchySnapshot(cur)
+    snapshot.parent_index()
+    return len(snapshot)
+
+
+def _exportacao():
+    caminho, linhas = exportar_query(
+        "relatorio_geral_exportacao", filtros_relatorio_geral(), "csv"
+    )
+    os.remove(caminho)
+    return linhas
+
+
+def _importacao(linhas):
+    df = pd.DataFrame({
+        "macro_tema": "Benchmark Importação",
+        "area": [f"Área {i % 10}" for i in range(linhas)],
+        "subarea": [f"Subárea {i % 50}" for i in range(linhas)],
+        "disciplina": [f"Disciplina {i % 200}" for i in range(linhas)],
+        "assunto": [f"Assunto {i}" for i in range(linhas)],
+        "lbl": pd.array([i % 20 + 1 for i in range(linhas)], dtype="Int64"),
+    })
+    return lambda: importar_grade(df, dry_run=True)["linhas"]
+
+
+def _assuntos_lote(linhas, em_lote):
+    """Renomeia e move `linhas` assuntos (desfeito): um comando ou um por linha."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT a.id, a.assunto || ' (lote)', d.id FROM assunto a "
+            "CROSS JOIN (SELECT id FROM disciplina LIMIT 1) d LIMIT %s",
+            (linhas,),
+        )
+        alteracoes = cur.fetchall()
+
+    def rodar():
+        with get_connection() as conn, conn.cursor() as cur:
+            if em_lote:
+                executar_lote(cur, "lote_atualizar_assunto", alteracoes)
+            else:
+                for assunto_id, nome, disciplina_id in alteracoes:
+                    executar(cur, "atualizar_assunto", (nome, disciplina_id, assunto_id))
+            conn.rollback()
+        return len(alteracoes)
+    return rodar
+
+
+def _fusao_disciplinas():
+    """Funde as duas disciplinas com mais assuntos (desfeito)."""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT disciplina_id, COUNT(*) FROM assunto "
+            "GROUP BY disciplina_id ORDER BY COUNT(*) DESC LIMIT 2"
+        )
+        (origem, _), (destino, _) = cur.fetchall()
+
+    def rodar():
+        with get_connection() as conn, conn.cursor() as cur:
+            movidos, _ = fundir_nos(cur, "disciplina", [origem], destino)
+            conn.rollback()
+        return len(movidos)
+    return rodar
+
+
+def _catalogo():
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute("SHOW server_version")
+        versao = cur.fetchone()[0]
+        contagens = {}
+        for tabela in ("macro_tema", "area", "subarea", "disciplina", "assunto", "lbl", "assunto_lbl"):
+            cur.execute(f"SELECT COUNT(*) FROM {tabela}")
+            contagens[tabela] = cur.fetchone()[0]
+    return versao, contagens
+
+
+def rodar(repeticoes, repeticoes_pesadas, linhas_importacao, filtro=None):
+    versao, catalogo = _catalogo()
+    casos = [
+        (rotulo, _instrucao(nome, _params(params)), pesado)
+        for rotulo, nome, params, pesado in CASOS
+    ]
+    casos += [
+        ("get_hierarquia (snapshot + índice)", _snapshot, True),
+        ("exportação CSV do Relatório Geral", _exportacao, True),
+        (f"importar_grade dry-run ({linhas_importacao} linhas)",
+         _importacao(linhas_importacao), True),
+        ("atualizar_assunto × 500 (uma por linha)", _assuntos_lote(500, False), True),
+        ("lote_atualizar_assunto (500 linhas)", _assuntos_lote(500, True), True),
+        ("fundir_nos (duas maiores disciplinas)", _fusao_disciplinas(), True),
+    ]
+
+    resultados = {}
+    for rotulo, funcao, pesado in casos:
+        if filtro and filtro not in rotulo:
+            continue
+        resultados[rotulo] = _medir(funcao, repeticoes_pesadas if pesado else repeticoes)
+        print(f"{rotulo:<45} p50 {resultados[rotulo]['p50_ms']:>10.2f} ms")
+
+    cobertas = {nome for _, nome, _, _ in CASOS} | COBERTAS_POR_FLUXO
+    return {
+        "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "servidor": versao,
+        "catalogo": catalogo,
+        "resultados": resultados,
+        "nao_cobertas": sorted(set(CONSULTAS) - cobertas),
+    }
+
+
+def comparar(atual, anterior):
+    """Imprime a mediana de cada caso nas duas execuções."""
+    print(f"\n{'caso':<45} {'anterior':>10} {'atual':>10} {'razão':>7}")
+    for rotulo, resultado in atual["resultados"].items():
+        base = anterior["resultados"].get(rotulo)
+        if base is None:
+            continue
+        razao = resultado["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("nan")
+        print(f"{rotulo:<45} {base['p50_ms']:>10.2f} {resultado['p50_ms']:>10.2f} {razao:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede todas as instruções SQL da aplicação no banco do DATABASE_URL."
+    )
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument(
+        "--repeticoes-pesadas", type=int, default=3,
+        help="Repetições das leituras completas, exportação, importação e manutenção",
+    )
+    parser.add_argument("--linhas-importacao", type=int, default=10_000)
+    parser.add_argument("--filtro", help="Só os casos cujo rótulo contém este texto")
+    parser.add_argument("--saida", help="Arquivo JSON (padrão: benchmarks/resultados/<data>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    relatorio = rodar(
+        args.repeticoes, args.repeticoes_pesadas, args.linhas_importacao, args.filtro
+    )
+    if relatorio["nao_cobertas"]:
+        print(f"⚠️ Instruções sem caso de benchmark: {', '.join(relatorio['nao_cobertas'])}")
+
+    saida = args.saida or os.path.join(
+        PASTA_RESULTADOS, f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(relatorio, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
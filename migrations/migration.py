@@ -1,5 +1,4 @@
 import psycopg2
-from psycopg2 import sql
 from dotenv import load_dotenv
 import os
 
@@ -7,6 +6,529 @@ load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Índices compostos na ordem em que as leituras filtram e ordenam
+# (usados também, com CONCURRENTLY, por migrations/versoes.py)
+WORKLOAD_INDEXES = [
+    # WHERE <pai>_id = %s ORDER BY <nome> (scripts/queries.py)
+    ("idx_area_macro_tema_area", "area(macro_tema_id, area) INCLUDE (id)"),
+    ("idx_subarea_area_subarea", "subarea(area_id, subarea) INCLUDE (id)"),
+    ("idx_disciplina_subarea_nome", "disciplina(subarea_id, nome) INCLUDE (id)"),
+    ("idx_assunto_disciplina_assunto", "assunto(disciplina_id, assunto) INCLUDE (id)"),
+    # Relatórios por LBL: lbl_id -> assunto_id sem visitar a tabela
+    ("idx_assunto_lbl_lbl_assunto", "assunto_lbl(lbl_id, assunto_id)"),
+]
+
+# Os compostos começam pela mesma coluna (e continuam servindo às FKs).
+# A sonda do anti-join por assunto_id usa a chave primária (assunto_id, lbl_id).
+SUPERSEDED_INDEXES = [
+    "idx_area_macro_tema",
+    "idx_subarea_area",
+    "idx_disciplina_subarea",
+    "idx_assunto_disciplina",
+    "idx_assunto_lbl_lbl",
+    "idx_assunto_lbl_assunto",
+]
+
+# Esquema base: as tabelas normalizadas e os índices de FK originais
+# (a versão 1 de migrations/versoes.py)
+TABELAS_BASE = [
+    ("macro_tema", """
+CREATE TABLE IF NOT EXISTS macro_tema (
+    id SERIAL PRIMARY KEY,
+    macro_tema TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""),
+    ("lbl", """
+CREATE TABLE IF NOT EXISTS lbl (
+    id SERIAL PRIMARY KEY,
+    lbl INTEGER NOT NULL UNIQUE,
+    nome TEXT NOT NULL,
+    descricao TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""),
+    ("area", """
+CREATE TABLE IF NOT EXISTS area (
+    id SERIAL PRIMARY KEY,
+    area TEXT NOT NULL,
+    macro_tema_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (macro_tema_id) REFERENCES macro_tema(id) ON DELETE CASCADE
+);
+"""),
+    ("subarea", """
+CREATE TABLE IF NOT EXISTS subarea (
+    id SERIAL PRIMARY KEY,
+    subarea TEXT NOT NULL,
+    area_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (area_id) REFERENCES area(id) ON DELETE CASCADE
+);
+"""),
+    ("disciplina", """
+CREATE TABLE IF NOT EXISTS disciplina (
+    id SERIAL PRIMARY KEY,
+    nome TEXT NOT NULL,
+    subarea_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (subarea_id) REFERENCES subarea(id) ON DELETE CASCADE
+);
+"""),
+    ("assunto", """
+CREATE TABLE IF NOT EXISTS assunto (
+    id SERIAL PRIMARY KEY,
+    assunto TEXT NOT NULL,
+    disciplina_id INTEGER NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (disciplina_id) REFERENCES disciplina(id) ON DELETE CASCADE
+);
+"""),
+    ("assunto_lbl", """
+CREATE TABLE IF NOT EXISTS assunto_lbl (
+    assunto_id INTEGER NOT NULL,
+    lbl_id INTEGER NOT NULL,
+    PRIMARY KEY (assunto_id, lbl_id),
+    FOREIGN KEY (assunto_id) REFERENCES assunto(id) ON DELETE CASCADE,
+    FOREIGN KEY (lbl_id) REFERENCES lbl(id) ON DELETE CASCADE
+);
+"""),
+]
+
+INDICES_BASE = [
+    "CREATE INDEX IF NOT EXISTS idx_area_macro_tema ON area(macro_tema_id)",
+    "CREATE INDEX IF NOT EXISTS idx_subarea_area ON subarea(area_id)",
+    "CREATE INDEX IF NOT EXISTS idx_disciplina_subarea ON disciplina(subarea_id)",
+    "CREATE INDEX IF NOT EXISTS idx_assunto_disciplina ON assunto(disciplina_id)",
+    "CREATE INDEX IF NOT EXISTS idx_assunto_lbl_assunto ON assunto_lbl(assunto_id)",
+    "CREATE INDEX IF NOT EXISTS idx_assunto_lbl_lbl ON assunto_lbl(lbl_id)",
+]
+
+# View materializada assunto_path e os seus índices
+ASSUNTO_PATH = [
+    """
+CREATE MATERIALIZED VIEW IF NOT EXISTS assunto_path AS
+SELECT
+    a.id          AS assunto_id,
+    a.assunto     AS assunto,
+    d.id          AS disciplina_id,
+    d.nome        AS disciplina,
+    s.id          AS subarea_id,
+    s.subarea     AS subarea,
+    ar.id         AS area_id,
+    ar.area       AS area,
+    mt.id         AS macro_tema_id,
+    mt.macro_tema AS macro_tema
+FROM assunto a
+JOIN disciplina d  ON a.disciplina_id  = d.id
+JOIN subarea s     ON d.subarea_id     = s.id
+JOIN area ar       ON s.area_id        = ar.id
+JOIN macro_tema mt ON ar.macro_tema_id = mt.id
+ORDER BY mt.macro_tema, ar.area, s.subarea, d.nome, a.assunto;
+""",
+    # Índice único: exigido pelo REFRESH MATERIALIZED VIEW CONCURRENTLY
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_assunto_path_assunto ON assunto_path(assunto_id)",
+    "CREATE INDEX IF NOT EXISTS idx_assunto_path_ordem ON assunto_path(macro_tema, area, subarea, disciplina, assunto, assunto_id)",
+]
+
+# Contadores da hierarquia (contagem_hierarquia), mantidos por triggers.
+# filhos: quantidade de filhos diretos (para LBL, de assuntos associados)
+# assuntos: quantidade de assuntos na subárvore (ou associados ao LBL)
+CONTAGEM_TABELA = """
+CREATE TABLE IF NOT EXISTS contagem_hierarquia (
+    nivel TEXT NOT NULL,
+    node_id INTEGER NOT NULL,
+    filhos INTEGER NOT NULL DEFAULT 0,
+    assuntos INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (nivel, node_id)
+);
+"""
+
+# Soma p_delta aos assuntos do nó e de todos os ancestrais que ainda
+# existem. Em deleções em cascata o pai já foi removido: nesse caso a
+# propagação para ali e o próprio pai desconta a subárvore inteira.
+CONTAGEM_SOMAR = """
+CREATE OR REPLACE FUNCTION contagem_somar_assuntos(
+    p_nivel TEXT, p_id INTEGER, p_delta INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    v_nivel TEXT := p_nivel;
+    v_id INTEGER := p_id;
+    v_pai INTEGER;
+BEGIN
+    WHILE v_id IS NOT NULL AND p_delta <> 0 LOOP
+        CASE v_nivel
+            WHEN 'disciplina' THEN
+                SELECT subarea_id INTO v_pai FROM disciplina WHERE id = v_id;
+            WHEN 'subarea' THEN
+                SELECT area_id INTO v_pai FROM subarea WHERE id = v_id;
+            WHEN 'area' THEN
+                SELECT macro_tema_id INTO v_pai FROM area WHERE id = v_id;
+            ELSE
+                PERFORM 1 FROM macro_tema WHERE id = v_id;
+                v_pai := NULL;
+        END CASE;
+        EXIT WHEN NOT FOUND;
+
+        UPDATE contagem_hierarquia
+           SET assuntos = assuntos + p_delta
+         WHERE nivel = v_nivel AND node_id = v_id;
+
+        v_nivel := CASE v_nivel
+            WHEN 'disciplina' THEN 'subarea'
+            WHEN 'subarea' THEN 'area'
+            WHEN 'area' THEN 'macro_tema'
+        END;
+        v_id := v_pai;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Trigger de area/subarea/disciplina/assunto.
+# TG_ARGV[0] = nível do pai, TG_ARGV[1] = coluna com o id do pai.
+CONTAGEM_HIERARQUIA_TRIGGER = """
+CREATE OR REPLACE FUNCTION contagem_hierarquia_trigger()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_pai_nivel TEXT := TG_ARGV[0];
+    v_pai_antigo INTEGER;
+    v_pai_novo INTEGER;
+    v_assuntos INTEGER := 1;
+BEGIN
+    -- Movimentações em lote (scripts/moves.py) e a importação
+    -- (scripts/importer.py) ligam contagem.em_lote na transação e ajustam os
+    -- contadores de uma vez com contagem_mover() / contagem_inserir()
+    IF TG_OP = 'UPDATE' AND current_setting('contagem.em_lote', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP <> 'INSERT' THEN
+        v_pai_antigo := (to_jsonb(OLD) ->> TG_ARGV[1])::INTEGER;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_pai_novo := (to_jsonb(NEW) ->> TG_ARGV[1])::INTEGER;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        IF TG_TABLE_NAME <> 'assunto' THEN
+            INSERT INTO contagem_hierarquia (nivel, node_id)
+            VALUES (TG_TABLE_NAME, NEW.id)
+            ON CONFLICT DO NOTHING;
+            v_assuntos := 0;
+        END IF;
+        IF current_setting('contagem.em_lote', true) = 'on' THEN
+            RETURN NEW;
+        END IF;
+        UPDATE contagem_hierarquia SET filhos = filhos + 1
+         WHERE nivel = v_pai_nivel AND node_id = v_pai_novo;
+        PERFORM contagem_somar_assuntos(v_pai_nivel, v_pai_novo, v_assuntos);
+        RETURN NEW;
+    END IF;
+
+    IF TG_TABLE_NAME <> 'assunto' THEN
+        SELECT assuntos INTO v_assuntos FROM contagem_hierarquia
+         WHERE nivel = TG_TABLE_NAME AND node_id = OLD.id;
+        v_assuntos := COALESCE(v_assuntos, 0);
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        IF TG_TABLE_NAME <> 'assunto' THEN
+            DELETE FROM contagem_hierarquia
+             WHERE nivel = TG_TABLE_NAME AND node_id = OLD.id;
+        END IF;
+        UPDATE contagem_hierarquia SET filhos = filhos - 1
+         WHERE nivel = v_pai_nivel AND node_id = v_pai_antigo;
+        PERFORM contagem_somar_assuntos(v_pai_nivel, v_pai_antigo, -v_assuntos);
+        RETURN OLD;
+    END IF;
+
+    -- UPDATE: só importa se o nó mudou de pai
+    IF v_pai_antigo IS DISTINCT FROM v_pai_novo THEN
+        UPDATE contagem_hierarquia SET filhos = filhos - 1
+         WHERE nivel = v_pai_nivel AND node_id = v_pai_antigo;
+        UPDATE contagem_hierarquia SET filhos = filhos + 1
+         WHERE nivel = v_pai_nivel AND node_id = v_pai_novo;
+        PERFORM contagem_somar_assuntos(v_pai_nivel, v_pai_antigo, -v_assuntos);
+        PERFORM contagem_somar_assuntos(v_pai_nivel, v_pai_novo, v_assuntos);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Ajuste dos contadores depois de mover p_ids (nível p_nivel) dos pais
+# p_pais_antigos para p_pai_novo num único UPDATE: uma atualização por pai
+# antigo, em vez de uma por linha movida.
+CONTAGEM_MOVER = """
+CREATE OR REPLACE FUNCTION contagem_mover(
+    p_nivel TEXT, p_nivel_pai TEXT, p_ids INTEGER[], p_pais_antigos INTEGER[],
+    p_pai_novo INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT m.pai,
+               COUNT(*)::INTEGER AS filhos,
+               SUM(CASE WHEN p_nivel = 'assunto' THEN 1
+                        ELSE COALESCE(c.assuntos, 0) END)::INTEGER AS assuntos
+          FROM unnest(p_ids, p_pais_antigos) AS m(id, pai)
+          LEFT JOIN contagem_hierarquia c ON c.nivel = p_nivel AND c.node_id = m.id
+         WHERE m.pai IS DISTINCT FROM p_pai_novo
+         GROUP BY m.pai
+    LOOP
+        UPDATE contagem_hierarquia SET filhos = filhos - r.filhos
+         WHERE nivel = p_nivel_pai AND node_id = r.pai;
+        UPDATE contagem_hierarquia SET filhos = filhos + r.filhos
+         WHERE nivel = p_nivel_pai AND node_id = p_pai_novo;
+        PERFORM contagem_somar_assuntos(p_nivel_pai, r.pai, -r.assuntos);
+        PERFORM contagem_somar_assuntos(p_nivel_pai, p_pai_novo, r.assuntos);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Ajuste dos contadores depois de um INSERT em lote com contagem.em_lote
+# ligado (scripts/importer.py). p_pais traz o pai de cada linha inserida em
+# p_nivel (area, subarea, disciplina, assunto ou assunto_lbl, cujo pai é o
+# LBL): um UPDATE com os totais de todos os pais, em vez de um por linha.
+CONTAGEM_INSERIR = """
+CREATE OR REPLACE FUNCTION contagem_inserir(p_nivel TEXT, p_pais INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    IF p_nivel = 'assunto' THEN
+        -- Assuntos novos sobem por todos os ancestrais, somados por nível
+        WITH disc AS (
+            SELECT pai AS id, COUNT(*)::INTEGER AS n
+              FROM unnest(p_pais) AS pai
+             GROUP BY pai
+        ), sub AS (
+            SELECT d.subarea_id AS id, SUM(x.n)::INTEGER AS n
+              FROM disc x JOIN disciplina d ON d.id = x.id
+             GROUP BY d.subarea_id
+        ), ar AS (
+            SELECT s.area_id AS id, SUM(x.n)::INTEGER AS n
+              FROM sub x JOIN subarea s ON s.id = x.id
+             GROUP BY s.area_id
+        ), mt AS (
+            SELECT a.macro_tema_id AS id, SUM(x.n)::INTEGER AS n
+              FROM ar x JOIN area a ON a.id = x.id
+             GROUP BY a.macro_tema_id
+        ), deltas AS (
+            SELECT 'disciplina'::TEXT AS nivel, id, n FROM disc
+            UNION ALL SELECT 'subarea', id, n FROM sub
+            UNION ALL SELECT 'area', id, n FROM ar
+            UNION ALL SELECT 'macro_tema', id, n FROM mt
+        )
+        UPDATE contagem_hierarquia c
+           SET filhos = c.filhos + CASE WHEN d.nivel = 'disciplina' THEN d.n ELSE 0 END,
+               assuntos = c.assuntos + d.n
+          FROM deltas d
+         WHERE c.nivel = d.nivel AND c.node_id = d.id;
+        RETURN;
+    END IF;
+
+    UPDATE contagem_hierarquia c
+       SET filhos = c.filhos + d.n,
+           assuntos = c.assuntos + CASE WHEN p_nivel = 'assunto_lbl' THEN d.n ELSE 0 END
+      FROM (SELECT pai AS id, COUNT(*)::INTEGER AS n
+              FROM unnest(p_pais) AS pai
+             GROUP BY pai) d
+     WHERE c.nivel = CASE p_nivel
+                         WHEN 'area' THEN 'macro_tema'
+                         WHEN 'subarea' THEN 'area'
+                         WHEN 'disciplina' THEN 'subarea'
+                         WHEN 'assunto_lbl' THEN 'lbl'
+                     END
+       AND c.node_id = d.id;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Trigger de macro_tema e lbl: só cria/remove a linha do próprio nó
+CONTAGEM_NO_TRIGGER = """
+CREATE OR REPLACE FUNCTION contagem_no_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO contagem_hierarquia (nivel, node_id)
+        VALUES (TG_TABLE_NAME, NEW.id)
+        ON CONFLICT DO NOTHING;
+        RETURN NEW;
+    END IF;
+    DELETE FROM contagem_hierarquia
+     WHERE nivel = TG_TABLE_NAME AND node_id = OLD.id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CONTAGEM_ASSUNTO_LBL_TRIGGER = """
+CREATE OR REPLACE FUNCTION contagem_assunto_lbl_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Na importação (contagem.em_lote) contagem_inserir() ajusta os LBLs
+    IF TG_OP = 'INSERT' AND current_setting('contagem.em_lote', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE contagem_hierarquia
+           SET filhos = filhos - 1, assuntos = assuntos - 1
+         WHERE nivel = 'lbl' AND node_id = OLD.lbl_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE contagem_hierarquia
+           SET filhos = filhos + 1, assuntos = assuntos + 1
+         WHERE nivel = 'lbl' AND node_id = NEW.lbl_id;
+        RETURN NEW;
+    END IF;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+CONTAGEM_REBUILD = """
+CREATE OR REPLACE FUNCTION rebuild_contagem_hierarquia()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE macro_tema, area, subarea, disciplina, assunto, lbl, assunto_lbl
+        IN SHARE MODE;
+    DELETE FROM contagem_hierarquia;
+
+    INSERT INTO contagem_hierarquia (nivel, node_id, filhos, assuntos)
+    SELECT 'disciplina', d.id, COUNT(a.id), COUNT(a.id)
+      FROM disciplina d
+      LEFT JOIN assunto a ON a.disciplina_id = d.id
+     GROUP BY d.id;
+
+    INSERT INTO contagem_hierarquia (nivel, node_id, filhos, assuntos)
+    SELECT 'subarea', s.id, COUNT(c.node_id), COALESCE(SUM(c.assuntos), 0)
+      FROM subarea s
+      LEFT JOIN disciplina d ON d.subarea_id = s.id
+      LEFT JOIN contagem_hierarquia c ON c.nivel = 'disciplina' AND c.node_id = d.id
+     GROUP BY s.id;
+
+    INSERT INTO contagem_hierarquia (nivel, node_id, filhos, assuntos)
+    SELECT 'area', ar.id, COUNT(c.node_id), COALESCE(SUM(c.assuntos), 0)
+      FROM area ar
+      LEFT JOIN subarea s ON s.area_id = ar.id
+      LEFT JOIN contagem_hierarquia c ON c.nivel = 'subarea' AND c.node_id = s.id
+     GROUP BY ar.id;
+
+    INSERT INTO contagem_hierarquia (nivel, node_id, filhos, assuntos)
+    SELECT 'macro_tema', mt.id, COUNT(c.node_id), COALESCE(SUM(c.assuntos), 0)
+      FROM macro_tema mt
+      LEFT JOIN area ar ON ar.macro_tema_id = mt.id
+      LEFT JOIN contagem_hierarquia c ON c.nivel = 'area' AND c.node_id = ar.id
+     GROUP BY mt.id;
+
+    INSERT INTO contagem_hierarquia (nivel, node_id, filhos, assuntos)
+    SELECT 'lbl', l.id, COUNT(al.assunto_id), COUNT(al.assunto_id)
+      FROM lbl l
+      LEFT JOIN assunto_lbl al ON al.lbl_id = l.id
+     GROUP BY l.id;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# (tabela, evento, função) de cada trigger de contagem
+CONTAGEM_TRIGGERS = [
+    ("macro_tema", "AFTER INSERT OR DELETE", "contagem_no_trigger()"),
+    ("lbl", "AFTER INSERT OR DELETE", "contagem_no_trigger()"),
+    ("area", "AFTER INSERT OR DELETE OR UPDATE OF macro_tema_id",
+     "contagem_hierarquia_trigger('macro_tema', 'macro_tema_id')"),
+    ("subarea", "AFTER INSERT OR DELETE OR UPDATE OF area_id",
+     "contagem_hierarquia_trigger('area', 'area_id')"),
+    ("disciplina", "AFTER INSERT OR DELETE OR UPDATE OF subarea_id",
+     "contagem_hierarquia_trigger('subarea', 'subarea_id')"),
+    ("assunto", "AFTER INSERT OR DELETE OR UPDATE OF disciplina_id",
+     "contagem_hierarquia_trigger('disciplina', 'disciplina_id')"),
+    ("assunto_lbl", "AFTER INSERT OR DELETE OR UPDATE",
+     "contagem_assunto_lbl_trigger()"),
+]
+
+# Tudo o que cria os contadores, na ordem, terminando com o recálculo
+CONTAGEM = [
+    CONTAGEM_TABELA,
+    CONTAGEM_SOMAR,
+    CONTAGEM_HIERARQUIA_TRIGGER,
+    CONTAGEM_MOVER,
+    CONTAGEM_INSERIR,
+    CONTAGEM_NO_TRIGGER,
+    CONTAGEM_ASSUNTO_LBL_TRIGGER,
+    CONTAGEM_REBUILD,
+    *(
+        instrucao
+        for tabela, evento, funcao in CONTAGEM_TRIGGERS
+        for instrucao in (
+            f"DROP TRIGGER IF EXISTS trg_contagem_{tabela} ON {tabela};",
+            f"CREATE TRIGGER trg_contagem_{tabela} {evento} ON {tabela} "
+            f"FOR EACH ROW EXECUTE FUNCTION {funcao};",
+        )
+    ),
+    "SELECT rebuild_contagem_hierarquia();",
+]
+
+# Importação sem trigger por linha: funções que passaram a respeitar
+# contagem.em_lote em INSERTs e o ajuste em lote
+CONTAGEM_IMPORTACAO = [
+    CONTAGEM_HIERARQUIA_TRIGGER,
+    CONTAGEM_ASSUNTO_LBL_TRIGGER,
+    CONTAGEM_INSERIR,
+]
+
+# Busca (pg_trgm + unaccent). unaccent() é STABLE e não pode ir num índice;
+# o wrapper f_unaccent fixa o dicionário e pode ser declarado IMMUTABLE
+BUSCA_FUNCOES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    """
+CREATE OR REPLACE FUNCTION f_unaccent(texto TEXT) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texto)
+$$;
+""",
+]
+
+# Índices de trigramas da busca global: (nome, definição)
+SEARCH_INDEXES = [
+    ("idx_macro_tema_busca", "macro_tema USING gin (f_unaccent(lower(macro_tema)) gin_trgm_ops)"),
+    ("idx_area_busca", "area USING gin (f_unaccent(lower(area)) gin_trgm_ops)"),
+    ("idx_subarea_busca", "subarea USING gin (f_unaccent(lower(subarea)) gin_trgm_ops)"),
+    ("idx_disciplina_busca", "disciplina USING gin (f_unaccent(lower(nome)) gin_trgm_ops)"),
+    ("idx_assunto_busca", "assunto USING gin (f_unaccent(lower(assunto)) gin_trgm_ops)"),
+    ("idx_lbl_busca", "lbl USING gin (f_unaccent(lower(nome)) gin_trgm_ops)"),
+]
+
+# Colunas de nome de cada tabela. Linhas antigas podem ter espaços nas
+# pontas (o cadastro e a importação só passaram a usar strip() depois),
+# e a importação casa os nomes exatamente
+COLUNAS_NOME = [
+    ("macro_tema", "macro_tema"),
+    ("area", "area"),
+    ("subarea", "subarea"),
+    ("disciplina", "nome"),
+    ("assunto", "assunto"),
+    ("lbl", "nome"),
+]
+
+# Planos das consultas lentas (SLOW_QUERY_MS)
+SLOW_QUERY_LOG = [
+    """
+CREATE TABLE IF NOT EXISTS slow_query_log (
+    id SERIAL PRIMARY KEY,
+    instante TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    consulta VARCHAR(100) NOT NULL,
+    pagina VARCHAR(100),
+    duracao_ms DOUBLE PRECISION NOT NULL,
+    parametros JSONB,
+    plano JSONB NOT NULL
+);
+""",
+    "CREATE INDEX IF NOT EXISTS idx_slow_query_log_instante ON slow_query_log(instante);",
+]
+
 def create_normalized_tables():
     if not DATABASE_URL:
         print("Variável DATABASE_URL não encontrada no .env")
@@ -16,98 +538,11 @@ def create_normalized_tables():
         conn = psycopg2.connect(DATABASE_URL)
         cur = conn.cursor()
 
-        create_macro_tema_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS macro_tema (
-                id SERIAL PRIMARY KEY,
-                macro_tema TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        cur.execute(create_macro_tema_query)
-        print("Tabela 'macro_tema' criada ou já existente.")
-
-        create_lbl_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS lbl (
-                id SERIAL PRIMARY KEY,
-                lbl INTEGER NOT NULL UNIQUE,
-                nome TEXT NOT NULL,
-                descricao TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        cur.execute(create_lbl_query)
-        print("Tabela 'lbl' criada ou já existente.")
-
-        create_area_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS area (
-                id SERIAL PRIMARY KEY,
-                area TEXT NOT NULL,
-                macro_tema_id INTEGER NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (macro_tema_id) REFERENCES macro_tema(id) ON DELETE CASCADE
-            );
-        """)
-        cur.execute(create_area_query)
-        print("Tabela 'area' criada ou já existente.")
-
-        create_subarea_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS subarea (
-                id SERIAL PRIMARY KEY,
-                subarea TEXT NOT NULL,
-                area_id INTEGER NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (area_id) REFERENCES area(id) ON DELETE CASCADE
-            );
-        """)
-        cur.execute(create_subarea_query)
-        print("Tabela 'subarea' criada ou já existente.")
-
-        create_disciplina_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS disciplina (
-                id SERIAL PRIMARY KEY,
-                nome TEXT NOT NULL,
-                subarea_id INTEGER NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (subarea_id) REFERENCES subarea(id) ON DELETE CASCADE
-            );
-        """)
-        cur.execute(create_disciplina_query)
-        print("Tabela 'disciplina' criada ou já existente.")
-
-        create_assunto_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS assunto (
-                id SERIAL PRIMARY KEY,
-                assunto TEXT NOT NULL,
-                disciplina_id INTEGER NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (disciplina_id) REFERENCES disciplina(id) ON DELETE CASCADE
-            );
-        """)
-        cur.execute(create_assunto_query)
-        print("Tabela 'assunto' criada ou já existente. (FK para 'disciplina')")
-
-        create_assunto_lbl_query = sql.SQL("""
-            CREATE TABLE IF NOT EXISTS assunto_lbl (
-                assunto_id INTEGER NOT NULL,
-                lbl_id INTEGER NOT NULL,
-                PRIMARY KEY (assunto_id, lbl_id),
-                FOREIGN KEY (assunto_id) REFERENCES assunto(id) ON DELETE CASCADE,
-                FOREIGN KEY (lbl_id) REFERENCES lbl(id) ON DELETE CASCADE
-            );
-        """)
-        cur.execute(create_assunto_lbl_query)
-        print("Tabela 'assunto_lbl' criada ou já existente.")
-
-        create_indexes_queries = [
-            "CREATE INDEX IF NOT EXISTS idx_area_macro_tema ON area(macro_tema_id);",
-            "CREATE INDEX IF NOT EXISTS idx_subarea_area ON subarea(area_id);",
-            "CREATE INDEX IF NOT EXISTS idx_disciplina_subarea ON disciplina(subarea_id);",
-            "CREATE INDEX IF NOT EXISTS idx_assunto_disciplina ON assunto(disciplina_id);",
-            "CREATE INDEX IF NOT EXISTS idx_assunto_lbl_assunto ON assunto_lbl(assunto_id);",
-            "CREATE INDEX IF NOT EXISTS idx_assunto_lbl_lbl ON assunto_lbl(lbl_id);"
-        ]
-        
-        for index_query in create_indexes_queries:
+        for tabela, create_query in TABELAS_BASE:
+            cur.execute(create_query)
+            print(f"Tabela '{tabela}' criada ou já existente.")
+
+        for index_query in INDICES_BASE:
             cur.execute(index_query)
         
         print("Índices criados ou já existentes.")
@@ -129,6 +564,126 @@ def create_normalized_tables():
     except Exception as e:
         print(f"Erro ao criar tabelas: {e}")
 
+def create_assunto_path_view():
+    """Cria a view materializada assunto_path (hierarquia desnormalizada e ordenada)"""
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        return
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for query in ASSUNTO_PATH:
+            cur.execute(query)
+        print("View materializada 'assunto_path' e índices criados ou já existentes.")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar view assunto_path: {e}")
+
+def create_contagem_hierarquia():
+    """Cria a tabela de contadores da hierarquia, mantida por triggers"""
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        return
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for query in CONTAGEM:
+            cur.execute(query)
+        print("Tabela, funções e triggers de 'contagem_hierarquia' criados; contadores recalculados.")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar contagem_hierarquia: {e}")
+
+def create_search_indexes():
+    """Cria os índices de trigramas (pg_trgm + unaccent) usados pela busca global"""
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        return
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for query in BUSCA_FUNCOES:
+            cur.execute(query)
+        print("Extensões 'pg_trgm' e 'unaccent' e função 'f_unaccent' criadas.")
+
+        for nome, definicao in SEARCH_INDEXES:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao};")
+
+        print("Índices de busca criados ou já existentes.")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar índices de busca: {e}")
+
+def create_workload_indexes():
+    """
+    Cria índices compostos na ordem em que as leituras filtram e ordenam
+    (pai + nome, com o id incluído), que permitem index-only scans já
+    ordenados, e remove os índices de uma coluna que eles substituem.
+    """
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        return
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for nome, definicao in WORKLOAD_INDEXES:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao};")
+
+        print("Índices compostos criados ou já existentes.")
+
+        for nome in SUPERSEDED_INDEXES:
+            cur.execute(f"DROP INDEX IF EXISTS {nome};")
+
+        print("Índices de uma coluna substituídos removidos.")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar índices compostos: {e}")
+
+def create_slow_query_log():
+    """Cria a tabela onde ficam os planos das consultas lentas (SLOW_QUERY_MS)"""
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        return
+
+    try:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+
+        for query in SLOW_QUERY_LOG:
+            cur.execute(query)
+        print("Tabela 'slow_query_log' criada ou já existente.")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"Erro ao criar slow_query_log: {e}")
+
 def drop_old_table():
     """Remove a tabela antiga 'temas' se existir"""
     if not DATABASE_URL:
@@ -167,10 +722,21 @@ def drop_old_table():
 
 if __name__ == "__main__":
     print("🔄 Iniciando migração para estrutura normalizada...")
+    print("ℹ️ Para um banco já em uso, prefira: python -m migrations.runner")
     print("=" * 50)
     
     create_normalized_tables()
     
+    create_assunto_path_view()
+    
+    create_contagem_hierarquia()
+    
+    create_search_indexes()
+    
+    create_workload_indexes()
+    
+    create_slow_query_log()
+    
     drop_old_table()
     
     print("=" * 50)
@@ -0,0 +1,248 @@
+# migrations/runner.py
+#
+# Aplica as versões de migrations/versoes.py que ainda não estão em
+# schema_migrations, sem perguntas e sem travar tabelas em uso:
+# índices com CONCURRENTLY (fora de transação) e backfills em lotes.
+#
+# Uso:
+#   python -m migrations.runner              aplica tudo que falta
+#   python -m migrations.runner --listar     mostra o estado de cada versão
+#   python -m migrations.runner --ate 1      aplica só até a versão 1
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+
+from migrations.migration import DATABASE_URL
+from migrations.versoes import VERSOES, Backfill, Chamada, Indice, RemoverIndice, Sql
+
+# Quanto uma instrução espera por um lock antes de desistir. Sem isso um
+# ALTER atrás de uma transação longa enfileira (e trava) todas as leituras.
+MIGRATION_LOCK_TIMEOUT = os.getenv("MIGRATION_LOCK_TIMEOUT", "5s")
+
+# Chave do advisory lock que impede dois runners ao mesmo tempo
+_CHAVE_LOCK = 4_242_019
+
+_CRIAR_CONTROLE = [
+    """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        versao INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL,
+        aplicada_em TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS schema_migrations_passos (
+        versao INTEGER NOT NULL,
+        passo INTEGER NOT NULL,
+        descricao TEXT NOT NULL,
+        ultimo_id BIGINT,
+        concluido_em TIMESTAMPTZ,
+        PRIMARY KEY (versao, passo)
+    )
+    """,
+]
+
+
+def _descricao(passo):
+    if isinstance(passo, Sql):
+        return f"SQL ({len(passo.instrucoes)} instruções)"
+    if isinstance(passo, Indice):
+        return f"CREATE INDEX CONCURRENTLY {passo.nome}"
+    if isinstance(passo, RemoverIndice):
+        return f"DROP INDEX CONCURRENTLY {passo.nome}"
+    if isinstance(passo, Backfill):
+        return f"backfill em lotes de {passo.tabela}"
+    return passo.descricao
+
+
+def _em_transacao(conn, funcao):
+    """Roda funcao(cur) numa transação (o runner fica em autocommit)."""
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            resultado = funcao(cur)
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+def _registrar_passo(cur, versao, numero, passo, ultimo_id=None, concluido=False):
+    cur.execute(
+        """
+        INSERT INTO schema_migrations_passos (versao, passo, descricao, ultimo_id, concluido_em)
+        VALUES (%s, %s, %s, %s, CASE WHEN %s THEN NOW() END)
+        ON CONFLICT (versao, passo) DO UPDATE
+           SET ultimo_id = EXCLUDED.ultimo_id,
+               concluido_em = EXCLUDED.concluido_em
+        """,
+        (versao.numero, numero, _descricao(passo), ultimo_id, concluido),
+    )
+
+
+def _indice(cur, passo):
+    # Um CREATE INDEX CONCURRENTLY interrompido deixa o índice inválido:
+    # ele é removido e construído de novo
+    cur.execute(
+        "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+        (passo.nome,),
+    )
+    linha = cur.fetchone()
+    if linha and linha[0]:
+        print(f"   índice {passo.nome} inválido de uma execução anterior; recriando")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {passo.nome}")
+    cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {passo.nome} ON {passo.definicao}")
+
+
+def _backfill(conn, versao, numero, passo, apos, pausa):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {passo.tabela}")
+        maximo = cur.fetchone()[0]
+
+    apos = apos or 0
+    inicio = time.perf_counter()
+    while apos < maximo:
+        ate = apos + passo.lote
+
+        def lote(cur):
+            cur.execute(passo.atualizacao, {"apos": apos, "ate": ate})
+            linhas = cur.rowcount
+            _registrar_passo(cur, versao, numero, passo, ultimo_id=ate)
+            return linhas
+
+        linhas = _em_transacao(conn, lote)
+        apos = ate
+        print(
+            f"   {passo.tabela}: id {min(apos, maximo)}/{maximo} "
+            f"({min(apos, maximo) / maximo:.0%}), {linhas} linhas no lote, "
+            f"{time.perf_counter() - inicio:.0f}s"
+        )
+        if pausa:
+            time.sleep(pausa)
+    return apos
+
+
+def _aplicar(conn, versao, concluidos, progresso, pausa):
+    for numero, passo in enumerate(versao.passos, start=1):
+        if numero in concluidos:
+            continue
+        print(f"  • passo {numero}: {_descricao(passo)}")
+
+        if isinstance(passo, Sql):
+            def executar(cur):
+                for instrucao in passo.instrucoes:
+                    cur.execute(instrucao)
+                _registrar_passo(cur, versao, numero, passo, concluido=True)
+            _em_transacao(conn, executar)
+            continue
+
+        ultimo_id = None
+        if isinstance(passo, Indice):
+            with conn.cursor() as cur:
+                _indice(cur, passo)
+        elif isinstance(passo, RemoverIndice):
+            with conn.cursor() as cur:
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {passo.nome}")
+        elif isinstance(passo, Backfill):
+            ultimo_id = _backfill(conn, versao, numero, passo, progresso.get(numero), pausa)
+        elif isinstance(passo, Chamada):
+            passo.funcao()
+
+        _em_transacao(conn, lambda cur: _registrar_passo(
+            cur, versao, numero, passo, ultimo_id=ultimo_id, concluido=True
+        ))
+
+    _em_transacao(conn, lambda cur: cur.execute(
+        "INSERT INTO schema_migrations (versao, nome) VALUES (%s, %s)",
+        (versao.numero, versao.nome),
+    ))
+
+
+def _estado(cur):
+    cur.execute("SELECT versao, aplicada_em FROM schema_migrations")
+    aplicadas = dict(cur.fetchall())
+    cur.execute("SELECT versao, passo, ultimo_id, concluido_em FROM schema_migrations_passos")
+    passos = {}
+    for versao, passo, ultimo_id, concluido_em in cur.fetchall():
+        passos.setdefault(versao, {})[passo] = (ultimo_id, concluido_em)
+    return aplicadas, passos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as versões pendentes do schema.")
+    parser.add_argument("--listar", action="store_true", help="Só mostra o estado das versões")
+    parser.add_argument("--ate", type=int, help="Última versão a aplicar")
+    parser.add_argument(
+        "--pausa", type=float, default=0.0,
+        help="Segundos de espera entre lotes de backfill (alivia o banco em horário de aula)",
+    )
+    parser.add_argument(
+        "--remover-temas", action="store_true",
+        help="Remove a tabela antiga 'temas', se existir",
+    )
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        print("Variável DATABASE_URL não encontrada no .env")
+        sys.exit(1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET lock_timeout = %s", (MIGRATION_LOCK_TIMEOUT,))
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (_CHAVE_LOCK,))
+            if not cur.fetchone()[0]:
+                print("Outra execução do runner está em andamento.")
+                sys.exit(1)
+            for instrucao in _CRIAR_CONTROLE:
+                cur.execute(instrucao)
+            aplicadas, passos = _estado(cur)
+
+        if args.listar:
+            for versao in VERSOES:
+                if versao.numero in aplicadas:
+                    situacao = f"aplicada em {aplicadas[versao.numero]:%d/%m/%Y %H:%M}"
+                else:
+                    feitos = sum(1 for _, fim in passos.get(versao.numero, {}).values() if fim)
+                    situacao = f"pendente ({feitos}/{len(versao.passos)} passos)"
+                print(f"{versao.numero:>4}  {versao.nome:<45} {situacao}")
+            return
+
+        pendentes = [
+            v for v in VERSOES
+            if v.numero not in aplicadas and (args.ate is None or v.numero <= args.ate)
+        ]
+        if not pendentes:
+            print("✅ Nenhuma versão pendente.")
+        for versao in pendentes:
+            print(f"🔄 Versão {versao.numero}: {versao.nome}")
+            registrados = passos.get(versao.numero, {})
+            concluidos = {p for p, (_, fim) in registrados.items() if fim}
+            progresso = {p: ultimo_id for p, (ultimo_id, _) in registrados.items()}
+            inicio = time.perf_counter()
+            _aplicar(conn, versao, concluidos, progresso, args.pausa)
+            print(f"✅ Versão {versao.numero} aplicada em {time.perf_counter() - inicio:.1f}s")
+
+        if args.remover_temas:
+            with conn.cursor() as cur:
+                cur.execute("DROP TABLE IF EXISTS temas")
+            print("Tabela antiga 'temas' removida (se existia).")
+    except psycopg2.errors.LockNotAvailable as e:
+        print(f"❌ Lock não obtido em {MIGRATION_LOCK_TIMEOUT}; tente fora do horário de pico: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Erro na migração (rode de novo para retomar): {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
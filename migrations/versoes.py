@@ -0,0 +1,84 @@
+# migrations/versoes.py
+#
+# Versões do schema, aplicadas em ordem por migrations/runner.py. Cada
+# versão é uma lista de passos; cada passo é registrado ao terminar, então
+# uma versão interrompida continua do passo (ou do lote) em que parou.
+# Uma versão aplicada nunca é editada: mudanças novas entram numa versão nova.
+from collections import namedtuple
+
+from migrations.migration import (
+    ASSUNTO_PATH,
+    BUSCA_FUNCOES,
+    COLUNAS_NOME,
+    CONTAGEM,
+    CONTAGEM_IMPORTACAO,
+    INDICES_BASE,
+    SEARCH_INDEXES,
+    SLOW_QUERY_LOG,
+    SUPERSEDED_INDEXES,
+    TABELAS_BASE,
+    WORKLOAD_INDEXES,
+)
+
+# Instruções rodadas numa única transação (junto com o registro do passo),
+# na conexão do runner e sujeitas ao MIGRATION_LOCK_TIMEOUT
+Sql = namedtuple("Sql", "instrucoes")
+# CREATE INDEX CONCURRENTLY: fora de transação, sem bloquear escritas
+Indice = namedtuple("Indice", "nome definicao")
+# DROP INDEX CONCURRENTLY
+RemoverIndice = namedtuple("RemoverIndice", "nome")
+# UPDATE em lotes por faixa de id. `atualizacao` é um UPDATE com
+# "id > %(apos)s AND id <= %(ate)s"; cada lote é uma transação e o
+# último id processado fica registrado para retomar
+Backfill = namedtuple("Backfill", "tabela atualizacao lote")
+# Função Python sem argumentos, para o que não cabe nos passos acima
+Chamada = namedtuple("Chamada", "descricao funcao")
+
+Versao = namedtuple("Versao", "numero nome passos")
+
+
+# Tudo roda na conexão do runner: nenhuma versão abre conexões próprias,
+# então o lock_timeout vale para todas as instruções
+VERSOES = [
+    Versao(1, "esquema base", [
+        Sql([create for _, create in TABELAS_BASE] + INDICES_BASE),
+    ]),
+    Versao(2, "índices compostos da carga de leitura", [
+        *(Indice(nome, definicao) for nome, definicao in WORKLOAD_INDEXES),
+        *(RemoverIndice(nome) for nome in SUPERSEDED_INDEXES),
+    ]),
+    Versao(3, "view materializada assunto_path", [
+        Sql(ASSUNTO_PATH),
+    ]),
+    Versao(4, "busca por trigramas", [
+        Sql(BUSCA_FUNCOES),
+        *(Indice(nome, definicao) for nome, definicao in SEARCH_INDEXES),
+    ]),
+    # Inclui o recálculo sob SHARE lock: sem lock_timeout esperando na fila,
+    # só as escritas ficam paradas enquanto os contadores são recalculados
+    Versao(5, "contadores da hierarquia", [
+        Sql(CONTAGEM),
+    ]),
+    Versao(6, "log de consultas lentas", [
+        Sql(SLOW_QUERY_LOG),
+    ]),
+    Versao(7, "contadores da importação em lote", [
+        Sql(CONTAGEM_IMPORTACAO),
+    ]),
+    # Em lotes: cada UPDATE trava só a faixa de ids do lote
+    Versao(8, "nomes sem espaços nas pontas", [
+        *(
+            Backfill(
+                tabela,
+                f"""
+                UPDATE {tabela} SET {coluna} = regexp_replace({coluna}, '^\\s+|\\s+$', '', 'g')
+                 WHERE id > %(apos)s AND id <= %(ate)s
+                   AND {coluna} ~ '^\\s|\\s$'
+                """,
+                10_000,
+            )
+            for tabela, coluna in COLUNAS_NOME
+        ),
+        Sql(["REFRESH MATERIALIZED VIEW CONCURRENTLY assunto_path"]),
+    ]),
+]
@@ -1,447 +1,512 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-from dotenv import load_dotenv
 
-from scripts.inserts import (
-    insert_lbl,
-    insert_macro_tema,
-    insert_area,
-    insert_subarea,
-    insert_disciplina,
-    insert_assunto,
-    insert_assunto_lbl,
+from scripts.cache import (
+    invalidate_lbl,
+    invalidate_macro_tema,
+    invalidate_area,
+    invalidate_subarea,
+    invalidate_disciplina,
+    invalidate_assunto,
 )
-from scripts.queries import (
-    get_macro_temas,
-    get_areas_by_macro_tema,
-    get_subareas_by_area,
-    get_disciplinas_by_subarea,
-    get_assuntos,
-    get_lbls,
+from scripts.batch import COLUNAS_LOTE, alteracoes_da_grade, salvar_lote
+from scripts.db import get_connection
+from scripts.hierarchy import NIVEIS
+from scripts.moves import fundir, mover
+from scripts.sql import executar
+from scripts.queries import get_hierarquia, get_lbls
+from scripts.search import (
+    BUSCA_MIN_CARACTERES,
+    LIMITE_SELETOR,
+    buscar_ids,
+    seletor_busca,
 )
+from scripts.telemetry import pagina
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Nível → rótulo na grade de edição em lote
+NIVEIS_LOTE = {
+    "lbl": "LBL",
+    "macro_tema": "Macro Tema",
+    "area": "Área",
+    "subarea": "Subárea",
+    "disciplina": "Disciplina",
+    "assunto": "Assunto",
+}
 
-def update_lbl(lbl_id, lbl_num, nome, descricao):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE lbl
-           SET lbl = %s,
-               nome = %s,
-               descricao = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (lbl_num, nome, descricao, lbl_id),
+# Linhas por página da grade de edição em lote
+LIMITE_GRADE = 100
+
+def seletor_no(nivel, rotulo, key, atual=None):
+    """Seletor de um nó do nível: lista para macro temas, busca para os demais."""
+    if nivel != "macro_tema":
+        return seletor_busca(hierarquia, nivel, rotulo, key, atual=atual)
+    ids = hierarquia.ids("macro_tema")
+    if not ids:
+        st.info("Nenhum Macro Tema cadastrado ainda.")
+        return None
+    return st.selectbox(
+        f"{rotulo}:", options=ids,
+        index=ids.index(atual) if atual in ids else 0,
+        format_func=lambda i: hierarquia.name("macro_tema", i), key=key,
     )
-    conn.commit()
-    cur.close()
-    conn.close()
+
+def update_lbl(lbl_id, lbl_num, nome, descricao):
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_lbl", (lbl_num, nome, descricao, lbl_id))
+    invalidate_lbl()
 
 def update_macro_tema(mt_id, nome):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE macro_tema
-           SET macro_tema = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (nome, mt_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_macro_tema", (nome, mt_id))
+    invalidate_macro_tema()
 
+# Os updates abaixo devolvem o pai anterior para invalidar o cache do pai
+# antigo e do novo.
 def update_area(area_id, nome, mt_id):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE area
-           SET area = %s,
-               macro_tema_id = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (nome, mt_id, area_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_area", (nome, mt_id, area_id))
+        row = cur.fetchone()
+    invalidate_area(mt_id, *(row or ()))
 
 def update_subarea(sub_id, nome, area_id):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE subarea
-           SET subarea = %s,
-               area_id = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (nome, area_id, sub_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_subarea", (nome, area_id, sub_id))
+        row = cur.fetchone()
+    invalidate_subarea(area_id, *(row or ()))
 
 def update_disciplina(disc_id, nome, sub_id):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE disciplina
-           SET nome = %s,
-               subarea_id = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (nome, sub_id, disc_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_disciplina", (nome, sub_id, disc_id))
+        row = cur.fetchone()
+    invalidate_disciplina(sub_id, *(row or ()))
 
 def update_assunto(assunto_id, nome, disc_id):
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE assunto
-           SET assunto = %s,
-               disciplina_id = %s,
-               timestamp = CURRENT_TIMESTAMP
-         WHERE id = %s
-        """,
-        (nome, disc_id, assunto_id),
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def fetch_lbls():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute("SELECT id, lbl, nome, descricao FROM lbl ORDER BY lbl")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "atualizar_assunto", (nome, disc_id, assunto_id))
+    invalidate_assunto()
 
-def fetch_macro_temas():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute("SELECT id, macro_tema FROM macro_tema ORDER BY macro_tema")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
-
-def fetch_areas_with_macro():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT ar.id, mt.macro_tema, ar.area, ar.macro_tema_id
-          FROM area AS ar
-          JOIN macro_tema AS mt ON ar.macro_tema_id = mt.id
-         ORDER BY mt.macro_tema, ar.area
-        """
+with pagina("Edição"):
+    st.set_page_config(
+        page_title="✏️ Sistema de Edição Hierárquica",
+        page_icon="🖊️",
+        layout="wide",
     )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    st.title("✏️ Sistema de Edição Hierárquica")
+    st.markdown("Selecione o registro que deseja editar em cada aba e altere os campos.")
 
-def fetch_subareas_with_hierarchy():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT s.id,
-               mt.macro_tema,
-               ar.area,
-               s.subarea,
-               s.area_id
-          FROM subarea AS s
-          JOIN area AS ar ON s.area_id = ar.id
-          JOIN macro_tema AS mt ON ar.macro_tema_id = mt.id
-         ORDER BY mt.macro_tema, ar.area, s.subarea
-        """
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    # Nomes e pais vêm da fotografia em cache, indexada por id; os seletores de
+    # registro buscam só as correspondências no banco, com LIMIT
+    hierarquia = get_hierarquia()
 
-def fetch_disciplinas_with_hierarchy():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT d.id,
-               mt.macro_tema,
-               ar.area,
-               s.subarea,
-               d.nome,
-               d.subarea_id
-          FROM disciplina AS d
-          JOIN subarea AS s ON d.subarea_id = s.id
-          JOIN area AS ar ON s.area_id = ar.id
-          JOIN macro_tema AS mt ON ar.macro_tema_id = mt.id
-         ORDER BY mt.macro_tema, ar.area, s.subarea, d.nome
-        """
+    tabs = st.tabs(
+        [
+            "✏️ Editar LBL",
+            "✏️ Editar Macro Tema",
+            "✏️ Editar Área",
+            "✏️ Editar Subárea",
+            "✏️ Editar Disciplina",
+            "✏️ Editar Assunto",
+            "🧮 Edição em Lote",
+            "🔀 Mover / Fundir",
+        ]
     )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
 
-def fetch_assuntos_with_hierarchy():
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT a.id,
-               mt.macro_tema,
-               ar.area,
-               s.subarea,
-               d.nome AS disciplina,
-               a.assunto,
-               a.disciplina_id
-          FROM assunto AS a
-          JOIN disciplina AS d ON a.disciplina_id = d.id
-          JOIN subarea AS s ON d.subarea_id = s.id
-          JOIN area AS ar ON s.area_id = ar.id
-          JOIN macro_tema AS mt ON ar.macro_tema_id = mt.id
-         ORDER BY mt.macro_tema, ar.area, s.subarea, d.nome, a.assunto
-        """
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    with tabs[0]:
+        st.header("✏️ Editar LBL")
+        lbls = {row[0]: row for row in get_lbls()}
+        if lbls:
+            lbl_id = st.selectbox(
+                "Selecione LBL para editar:",
+                options=list(lbls),
+                format_func=lambda i: f"{lbls[i][1]} - {lbls[i][2]}",
+            )
+            _, lbl_num, lbl_nome, lbl_desc = lbls[lbl_id]
+            with st.form("form_edit_lbl", clear_on_submit=False):
+                col1, col2 = st.columns(2)
+                with col1:
+                    novo_num = st.number_input(
+                        "Número do LBL:", min_value=1, step=1, value=lbl_num
+                    )
+                    novo_nome = st.text_input("Nome do LBL:", value=lbl_nome)
+                with col2:
+                    nova_desc = st.text_area(
+                        "Descrição do LBL:", value=lbl_desc if lbl_desc else ""
+                    )
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome do LBL não pode ficar vazio.")
+                    else:
+                        update_lbl(lbl_id, novo_num, novo_nome.strip(), nova_desc.strip() or None)
+                        st.success("✔️ LBL atualizado com sucesso.")
+        else:
+            st.info("Nenhum LBL cadastrado ainda.")
 
-st.set_page_config(
-    page_title="✏️ Sistema de Edição Hierárquica",
-    page_icon="🖊️",
-    layout="wide",
-)
-st.title("✏️ Sistema de Edição Hierárquica")
-st.markdown("Selecione o registro que deseja editar em cada aba e altere os campos.")
+    with tabs[1]:
+        st.header("✏️ Editar Macro Tema")
+        mt_ids = hierarquia.ids("macro_tema")
+        if mt_ids:
+            mt_id = st.selectbox(
+                "Selecione Macro Tema para editar:",
+                options=mt_ids,
+                format_func=lambda i: hierarquia.name("macro_tema", i),
+            )
+            with st.form("form_edit_mt", clear_on_submit=False):
+                novo_nome = st.text_input(
+                    "Nome do Macro Tema:", value=hierarquia.name("macro_tema", mt_id)
+                )
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome do Macro Tema não pode ficar vazio.")
+                    else:
+                        update_macro_tema(mt_id, novo_nome.strip())
+                        st.success("✔️ Macro Tema atualizado com sucesso.")
+        else:
+            st.info("Nenhum Macro Tema cadastrado ainda.")
 
-tabs = st.tabs(
-    [
-        "✏️ Editar LBL",
-        "✏️ Editar Macro Tema",
-        "✏️ Editar Área",
-        "✏️ Editar Subárea",
-        "✏️ Editar Disciplina",
-        "✏️ Editar Assunto",
-    ]
-)
+    with tabs[2]:
+        st.header("✏️ Editar Área")
+        if hierarquia.count("area"):
+            area_id = seletor_busca(hierarquia, "area", "Área para editar", "edit_area")
+        else:
+            area_id = None
+            st.info("Nenhuma Área cadastrada ainda.")
+        if area_id is not None:
+            mt_id_atual = hierarquia.parent("area", area_id)
+            # Fora do form: os seletores de pai respondem à busca a cada tecla
+            mt_ids = hierarquia.ids("macro_tema")
+            novo_mt_id = st.selectbox(
+                "Macro Tema pai:",
+                options=mt_ids,
+                index=mt_ids.index(mt_id_atual),
+                format_func=lambda i: hierarquia.name("macro_tema", i),
+                key=f"area_pai_{area_id}",
+            )
+            with st.form("form_edit_area", clear_on_submit=False):
+                novo_nome = st.text_input(
+                    "Nome da Área:", value=hierarquia.name("area", area_id)
+                )
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome da Área não pode ficar vazio.")
+                    else:
+                        update_area(area_id, novo_nome.strip(), novo_mt_id)
+                        st.success("✔️ Área atualizada com sucesso.")
 
-with tabs[0]:
-    st.header("✏️ Editar LBL")
-    lbls = fetch_lbls()
-    if lbls:
-        options = {f"{row[1]} - {row[2]}": row for row in lbls}
-        selecionado = st.selectbox(
-            "Selecione LBL para editar:",
-            options=list(options.keys())
-        )
-        lbl_id, lbl_num, lbl_nome, lbl_desc = options[selecionado]
-        with st.form("form_edit_lbl", clear_on_submit=False):
-            col1, col2 = st.columns(2)
-            with col1:
-                novo_num = st.number_input(
-                    "Número do LBL:", min_value=1, step=1, value=lbl_num
+    with tabs[3]:
+        st.header("✏️ Editar Subárea")
+        if hierarquia.count("subarea"):
+            sub_id = seletor_busca(hierarquia, "subarea", "Subárea para editar", "edit_subarea")
+        else:
+            sub_id = None
+            st.info("Nenhuma Subárea cadastrada ainda.")
+        if sub_id is not None:
+            novo_area_id = seletor_busca(
+                hierarquia, "area", "Área pai", f"subarea_pai_{sub_id}",
+                atual=hierarquia.parent("subarea", sub_id),
+            )
+            with st.form("form_edit_subarea", clear_on_submit=False):
+                novo_nome = st.text_input(
+                    "Nome da Subárea:", value=hierarquia.name("subarea", sub_id)
+                )
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome da Subárea não pode ficar vazio.")
+                    else:
+                        update_subarea(sub_id, novo_nome.strip(), novo_area_id)
+                        st.success("✔️ Subárea atualizada com sucesso.")
+
+    with tabs[4]:
+        st.header("✏️ Editar Disciplina")
+        if hierarquia.count("disciplina"):
+            disc_id = seletor_busca(
+                hierarquia, "disciplina", "Disciplina para editar", "edit_disciplina"
+            )
+        else:
+            disc_id = None
+            st.info("Nenhuma Disciplina cadastrada ainda.")
+        if disc_id is not None:
+            novo_sub_id = seletor_busca(
+                hierarquia, "subarea", "Subárea pai", f"disciplina_pai_{disc_id}",
+                atual=hierarquia.parent("disciplina", disc_id),
+            )
+            with st.form("form_edit_disciplina", clear_on_submit=False):
+                novo_nome = st.text_input(
+                    "Nome da Disciplina:", value=hierarquia.name("disciplina", disc_id)
                 )
-                novo_nome = st.text_input("Nome do LBL:", value=lbl_nome)
-            with col2:
-                nova_desc = st.text_area(
-                    "Descrição do LBL:", value=lbl_desc if lbl_desc else ""
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome da Disciplina não pode ficar vazio.")
+                    else:
+                        update_disciplina(disc_id, novo_nome.strip(), novo_sub_id)
+                        st.success("✔️ Disciplina atualizada com sucesso.")
+
+    with tabs[5]:
+        st.header("✏️ Editar Assunto")
+        if hierarquia.count("assunto"):
+            assunto_id = seletor_busca(
+                hierarquia, "assunto", "Assunto para editar", "edit_assunto"
+            )
+        else:
+            assunto_id = None
+            st.info("Nenhum Assunto cadastrado ainda.")
+        if assunto_id is not None:
+            novo_disc_id = seletor_busca(
+                hierarquia, "disciplina", "Disciplina pai", f"assunto_pai_{assunto_id}",
+                atual=hierarquia.parent("assunto", assunto_id),
+            )
+            with st.form("form_edit_assunto", clear_on_submit=False):
+                novo_nome = st.text_input(
+                    "Nome do Assunto:", value=hierarquia.name("assunto", assunto_id)
                 )
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome do LBL não pode ficar vazio.")
-                else:
-                    update_lbl(lbl_id, novo_num, novo_nome.strip(), nova_desc.strip() or None)
-                    st.success("✔️ LBL atualizado com sucesso.")
-    else:
-        st.info("Nenhum LBL cadastrado ainda.")
+                submit = st.form_submit_button("💾 Salvar Alterações")
+                if submit:
+                    if not novo_nome.strip():
+                        st.error("O nome do Assunto não pode ficar vazio.")
+                    else:
+                        update_assunto(assunto_id, novo_nome.strip(), novo_disc_id)
+                        st.success("✔️ Assunto atualizado com sucesso.")
 
-with tabs[1]:
-    st.header("✏️ Editar Macro Tema")
-    mts = fetch_macro_temas()
-    if mts:
-        options = {row[1]: row for row in mts}
-        selecionado = st.selectbox(
-            "Selecione Macro Tema para editar:",
-            options=list(options.keys())
+    with tabs[6]:
+        st.header("🧮 Edição em Lote")
+        st.markdown(
+            f"Edite várias linhas de um nível de uma vez e adicione linhas novas no fim "
+            f"da grade, até {LIMITE_GRADE} linhas por página. Ao salvar, só as células "
+            "alteradas são enviadas, em uma única transação. Linhas não podem ser "
+            "excluídas aqui. Mudar o nível, o filtro, a página ou a busca de pais "
+            "recomeça a grade sem as edições pendentes."
         )
-        mt_id, mt_nome = options[selecionado]
-        with st.form("form_edit_mt", clear_on_submit=False):
-            novo_nome = st.text_input("Nome do Macro Tema:", value=mt_nome)
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome do Macro Tema não pode ficar vazio.")
-                else:
-                    update_macro_tema(mt_id, novo_nome.strip())
-                    st.success("✔️ Macro Tema atualizado com sucesso.")
-    else:
-        st.info("Nenhum Macro Tema cadastrado ainda.")
+        if "lote_resultado" in st.session_state:
+            st.success(st.session_state.pop("lote_resultado"))
+        col1, col2, col3 = st.columns([2, 3, 1])
+        with col1:
+            nivel = st.selectbox(
+                "Nível:", options=list(NIVEIS_LOTE), format_func=NIVEIS_LOTE.get,
+                key="lote_nivel",
+            )
+        with col2:
+            filtro = st.text_input("Filtrar linhas por nome ou caminho:", key="lote_filtro")
+        with col3:
+            pagina_grade = st.number_input("Página:", min_value=1, step=1, key="lote_pagina")
 
-with tabs[2]:
-    st.header("✏️ Editar Área")
-    areas = fetch_areas_with_macro()
-    if areas:
-        options = {f"{row[1]} – {row[2]}": (row[0], row[3], row[2]) for row in areas}
-        selecionado = st.selectbox(
-            "Selecione Área para editar:",
-            options=list(options.keys())
-        )
-        area_id, mt_id_atual, area_nome_atual = options[selecionado]
-        macro_temas = fetch_macro_temas()
-        with st.form("form_edit_area", clear_on_submit=False):
-            col1, col2 = st.columns(2)
-            with col1:
-                novo_nome = st.text_input("Nome da Área:", value=area_nome_atual)
-            with col2:
-                mt_options = {mt[1]: mt[0] for mt in macro_temas}
-                novo_mt = st.selectbox(
-                    "Macro Tema pai:", options=list(mt_options.keys()), index=list(mt_options.values()).index(mt_id_atual)
-                )
-                novo_mt_id = mt_options[novo_mt]
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome da Área não pode ficar vazio.")
+        colunas = COLUNAS_LOTE[nivel]
+        nivel_pai = NIVEIS[NIVEIS.index(nivel) - 1] if "pai" in colunas else None
+        termo = filtro.strip()
+        busca_pai = ""
+        if nivel_pai and nivel_pai != "macro_tema":
+            busca_pai = st.text_input(
+                f"Buscar {NIVEIS_LOTE[nivel_pai].lower()} para as opções da coluna pai:",
+                key="lote_busca_pai",
+                placeholder=f"Digite ao menos {BUSCA_MIN_CARACTERES} letras",
+            ).strip()
+        inicio = (int(pagina_grade) - 1) * LIMITE_GRADE
+
+        # A chave muda com o nível, o filtro, a página e a busca de pais: a grade
+        # recomeça sem edições pendentes
+        chave = f"grade_{nivel}_{termo}_{pagina_grade}_{busca_pai}"
+        base = st.session_state.get("lote_base")
+        if base is None or base[0] != chave:
+            # Monta a página uma vez e a fixa na sessão: as posições de edited_rows
+            # continuam apontando para os mesmos ids mesmo que a fotografia mude
+            pais = {}
+            if nivel == "lbl":
+                grade = pd.DataFrame(get_lbls(), columns=["id", *colunas])
+                if termo and not grade.empty:
+                    busca = grade["lbl"].astype(str) + " " + grade["nome"]
+                    grade = grade[busca.str.contains(termo, case=False, regex=False)]
+                total = len(grade)
+                grade = grade.iloc[inicio:inicio + LIMITE_GRADE]
+            else:
+                if nivel == "macro_tema" or not termo:
+                    ids = hierarquia.ids(nivel)
+                    if termo:
+                        ids = [
+                            i for i in ids
+                            if termo.lower() in hierarquia.name(nivel, i).lower()
+                        ]
+                    total = len(ids)
+                    ids = ids[inicio:inicio + LIMITE_GRADE]
+                elif len(termo) >= BUSCA_MIN_CARACTERES:
+                    # A busca vai ao banco; ignora nós que a fotografia ainda não tem
+                    ids = [
+                        i for i in buscar_ids(nivel, termo, inicio + LIMITE_GRADE)
+                        if hierarquia.contains(nivel, i)
+                    ][inicio:]
+                    total = None
                 else:
-                    update_area(area_id, novo_nome.strip(), novo_mt_id)
-                    st.success("✔️ Área atualizada com sucesso.")
-    else:
-        st.info("Nenhuma Área cadastrada ainda.")
+                    ids, total = [], 0
+                linhas = []
+                for node_id in ids:
+                    linha = {"id": node_id, "nome": hierarquia.name(nivel, node_id)}
+                    if nivel_pai:
+                        linha["pai"] = hierarquia.parent(nivel, node_id)
+                    linhas.append(linha)
+                grade = pd.DataFrame(linhas, columns=["id", *colunas])
+                if nivel_pai:
+                    # Opções do pai: os pais atuais da página, as primeiras sugestões
+                    # e o resultado da busca (todos os macro temas, que são poucos)
+                    if nivel_pai == "macro_tema":
+                        opcoes = hierarquia.ids(nivel_pai)
+                    else:
+                        opcoes = [
+                            *hierarquia.ids(nivel_pai, LIMITE_SELETOR),
+                            *(i for i in buscar_ids(nivel_pai, busca_pai)
+                              if hierarquia.contains(nivel_pai, i)),
+                        ]
+                    opcoes = dict.fromkeys([*grade["pai"], *opcoes])
+                    # O id no rótulo desfaz caminhos repetidos
+                    pais = {f"{hierarquia.label(nivel_pai, i)} · #{i}": i for i in opcoes}
+                    rotulos = {i: rotulo for rotulo, i in pais.items()}
+                    grade["pai"] = grade["pai"].map(rotulos)
+            base = (chave, grade.reset_index(drop=True), pais, total)
+            st.session_state["lote_base"] = base
+        _, grade, pais, total = base
+
+        if nivel not in ("lbl", "macro_tema") and 0 < len(termo) < BUSCA_MIN_CARACTERES:
+            st.info(f"Digite ao menos {BUSCA_MIN_CARACTERES} letras para filtrar.")
+        elif grade.empty:
+            st.info("Nenhuma linha nesta página.")
+        if total is None:
+            st.caption(f"Página {pagina_grade}: melhores correspondências do filtro.")
+        else:
+            paginas = max(1, -(-total // LIMITE_GRADE))
+            st.caption(f"Página {pagina_grade} de {paginas} ({total} linha(s) no total).")
 
-with tabs[3]:
-    st.header("✏️ Editar Subárea")
-    subs = fetch_subareas_with_hierarchy()
-    areas = fetch_areas_with_macro()
-    if subs:
-        options = {
-            f"{row[1]} – {row[2]} – {row[3]}": (row[0], row[4], row[3])
-            for row in subs
-        }
-        selecionado = st.selectbox(
-            "Selecione Subárea para editar:",
-            options=list(options.keys())
+        config = {"id": st.column_config.NumberColumn("id", disabled=True)}
+        if nivel == "lbl":
+            config["lbl"] = st.column_config.NumberColumn("Número", min_value=1, step=1)
+            config["descricao"] = st.column_config.TextColumn("Descrição")
+        if nivel_pai:
+            config["pai"] = st.column_config.SelectboxColumn(
+                f"{NIVEIS_LOTE[nivel_pai]} pai", options=list(pais), required=True,
+            )
+        config["nome"] = st.column_config.TextColumn("Nome", required=True)
+
+        st.data_editor(
+            grade, column_config=config, num_rows="add", hide_index=True,
+            use_container_width=True, key=chave,
         )
-        sub_id, area_id_atual, sub_nome_atual = options[selecionado]
-        areas_com_macro = [(r[0], f"{r[1]} – {r[2]}") for r in areas]
-        with st.form("form_edit_subarea", clear_on_submit=False):
-            col1, col2 = st.columns(2)
-            with col1:
-                novo_nome = st.text_input("Nome da Subárea:", value=sub_nome_atual)
-            with col2:
-                area_options = {label: aid for aid, label in areas_com_macro}
-                current_label = next(label for aid, label in areas_com_macro if aid == area_id_atual)
-                novo_area_label = st.selectbox(
-                    "Área pai:", options=list(area_options.keys()), index=list(area_options.keys()).index(current_label)
-                )
-                novo_area_id = area_options[novo_area_label]
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome da Subárea não pode ficar vazio.")
-                else:
-                    update_subarea(sub_id, novo_nome.strip(), novo_area_id)
-                    st.success("✔️ Subárea atualizada com sucesso.")
-    else:
-        st.info("Nenhuma Subárea cadastrada ainda.")
 
-with tabs[4]:
-    st.header("✏️ Editar Disciplina")
-    discs = fetch_disciplinas_with_hierarchy()
-    if discs:
-        options = {
-            f"{row[1]} – {row[2]} – {row[3]} – {row[4]}": (row[0], row[5], row[4])
-            for row in discs
-        }
-        selecionado = st.selectbox(
-            "Selecione Disciplina para editar:",
-            options=list(options.keys())
+        def converter(coluna, valor):
+            if valor is None or (isinstance(valor, str) and not valor.strip()):
+                return ""
+            if coluna == "pai":
+                return pais[valor]
+            if coluna == "lbl":
+                return int(valor)
+            return valor.strip()
+
+        def recomecar_grade():
+            st.session_state.pop(chave, None)
+            st.session_state.pop("lote_base", None)
+
+        alteracoes, novos = alteracoes_da_grade(grade, st.session_state.get(chave, {}), converter)
+        obrigatorias = [i for i, c in enumerate(colunas) if c != "descricao"]
+        invalidas = (
+            sum(any(linha[1 + i] == "" for i in obrigatorias) for linha in alteracoes)
+            + sum(any(linha[i] == "" for i in obrigatorias) for linha in novos)
         )
-        disc_id, sub_id_atual, disc_nome_atual = options[selecionado]
-        subareas_completo = [
-            (r[0], f"{r[1]} – {r[2]} – {r[3]}") for r in subs
-        ]
-        with st.form("form_edit_disciplina", clear_on_submit=False):
-            col1, col2 = st.columns(2)
-            with col1:
-                novo_nome = st.text_input("Nome da Disciplina:", value=disc_nome_atual)
-            with col2:
-                sub_options = {label: sid for sid, label in subareas_completo}
-                current_label = next(label for sid, label in subareas_completo if sid == sub_id_atual)
-                novo_sub_label = st.selectbox(
-                    "Subárea pai:", options=list(sub_options.keys()), index=list(sub_options.keys()).index(current_label)
-                )
-                novo_sub_id = sub_options[novo_sub_label]
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome da Disciplina não pode ficar vazio.")
-                else:
-                    update_disciplina(disc_id, novo_nome.strip(), novo_sub_id)
-                    st.success("✔️ Disciplina atualizada com sucesso.")
-    else:
-        st.info("Nenhuma Disciplina cadastrada ainda.")
+        st.caption(f"{len(alteracoes)} linha(s) alterada(s), {len(novos)} nova(s).")
+        col1, col2 = st.columns(2)
+        with col1:
+            salvar = st.button(
+                "💾 Salvar Lote", disabled=not (alteracoes or novos), key="lote_salvar"
+            )
+        with col2:
+            st.button(
+                "🔄 Recarregar grade", key="lote_recarregar", on_click=recomecar_grade,
+                help="Descarta as edições pendentes e relê a página.",
+            )
+        if salvar:
+            if invalidas:
+                st.error(f"{invalidas} linha(s) com campos obrigatórios vazios.")
+            else:
+                resultado = salvar_lote(nivel, alteracoes, novos)
+                if resultado is not None:
+                    atualizados, inseridos = resultado
+                    recomecar_grade()
+                    st.session_state["lote_resultado"] = (
+                        f"✔️ {atualizados} linha(s) atualizada(s) e {inseridos} inserida(s)."
+                    )
+                    st.rerun()
 
-with tabs[5]:
-    st.header("✏️ Editar Assunto")
-    assuntos = fetch_assuntos_with_hierarchy()
-    if assuntos:
-        options = {
-            f"{row[1]} – {row[2]} – {row[3]} – {row[4]} – {row[5]}": (row[0], row[6], row[5])
-            for row in assuntos
-        }
-        selecionado = st.selectbox(
-            "Selecione Assunto para editar:",
-            options=list(options.keys())
+    with tabs[7]:
+        st.header("🔀 Mover / Fundir")
+        if "movimento_resultado" in st.session_state:
+            st.success(st.session_state.pop("movimento_resultado"))
+        operacao = st.radio(
+            "Operação:",
+            ["Mover para outro pai", "Fundir em outro nó"],
+            horizontal=True,
+            key="movimento_operacao",
         )
-        assunto_id, disc_id_atual, assunto_nome_atual = options[selecionado]
-        disciplinas_completo = [
-            (r[0], f"{r[1]} – {r[2]} – {r[3]} – {r[4]}") for r in discs
-        ]
-        with st.form("form_edit_assunto", clear_on_submit=False):
-            col1, col2 = st.columns(2)
-            with col1:
-                novo_nome = st.text_input("Nome do Assunto:", value=assunto_nome_atual)
-            with col2:
-                disc_options = {label: did for did, label in disciplinas_completo}
-                current_label = next(label for did, label in disciplinas_completo if did == disc_id_atual)
-                novo_disc_label = st.selectbox(
-                    "Disciplina pai:", options=list(disc_options.keys()), index=list(disc_options.keys()).index(current_label)
+
+        if operacao == "Mover para outro pai":
+            st.markdown(
+                "Escolha o pai atual e os filhos a mover (ou todos); eles vão para o "
+                "novo pai em um único comando."
+            )
+            nivel = st.selectbox(
+                "Nível dos nós a mover:", options=list(NIVEIS[1:]),
+                format_func=NIVEIS_LOTE.get, key="mover_nivel",
+            )
+            nivel_pai = NIVEIS[NIVEIS.index(nivel) - 1]
+            origem = seletor_no(nivel_pai, f"{NIVEIS_LOTE[nivel_pai]} atual", f"mover_origem_{nivel}")
+            filhos = dict(hierarquia.children(nivel, origem)) if origem is not None else {}
+            if origem is not None and not filhos:
+                st.info(f"Nada para mover em {hierarquia.name(nivel_pai, origem)}.")
+            if filhos:
+                todos = st.checkbox(f"Todos ({len(filhos)})", value=True, key=f"mover_todos_{nivel}")
+                ids = list(filhos) if todos else st.multiselect(
+                    f"{NIVEIS_LOTE[nivel]} a mover:", options=list(filhos),
+                    format_func=filhos.get, key=f"mover_ids_{nivel}_{origem}",
                 )
-                novo_disc_id = disc_options[novo_disc_label]
-            submit = st.form_submit_button("💾 Salvar Alterações")
-            if submit:
-                if not novo_nome.strip():
-                    st.error("O nome do Assunto não pode ficar vazio.")
-                else:
-                    update_assunto(assunto_id, novo_nome.strip(), novo_disc_id)
-                    st.success("✔️ Assunto atualizado com sucesso.")
-    else:
-        st.info("Nenhum Assunto cadastrado ainda.")
+                destino = seletor_no(nivel_pai, f"Novo {NIVEIS_LOTE[nivel_pai]} pai", f"mover_destino_{nivel}")
+                if st.button(
+                    f"🔀 Mover {len(ids)} {NIVEIS_LOTE[nivel]}(s)",
+                    disabled=not ids or destino in (None, origem),
+                    key="mover_confirmar",
+                ):
+                    movidos = mover(nivel, ids, destino)
+                    if movidos is not None:
+                        st.session_state["movimento_resultado"] = (
+                            f"✔️ {movidos} {NIVEIS_LOTE[nivel]}(s) movido(s) para "
+                            f"{hierarquia.label(nivel_pai, destino)}."
+                        )
+                        st.rerun()
+        else:
+            st.markdown(
+                "Todos os filhos da origem passam para o destino em um único comando; "
+                "a origem, vazia, pode ser removida em seguida."
+            )
+            nivel = st.selectbox(
+                "Nível dos nós a fundir:", options=list(NIVEIS[:-1]),
+                format_func=NIVEIS_LOTE.get, key="fundir_nivel",
+            )
+            nivel_filho = NIVEIS[NIVEIS.index(nivel) + 1]
+            origem = seletor_no(nivel, f"{NIVEIS_LOTE[nivel]} de origem", f"fundir_origem_{nivel}")
+            destino = seletor_no(nivel, f"{NIVEIS_LOTE[nivel]} de destino", f"fundir_destino_{nivel}")
+            if origem is not None and destino is not None:
+                st.caption(
+                    f"{len(hierarquia.children(nivel_filho, origem))} {NIVEIS_LOTE[nivel_filho]}(s) "
+                    f"na origem, {len(hierarquia.children(nivel_filho, destino))} no destino."
+                )
+                remover = st.checkbox("Remover a origem depois de fundir", value=True, key="fundir_remover")
+                if st.button(
+                    "🔀 Fundir", disabled=origem == destino, key="fundir_confirmar"
+                ):
+                    resultado = fundir(nivel, [origem], destino, remover)
+                    if resultado is not None:
+                        movidos, removidos = resultado
+                        st.session_state["movimento_resultado"] = (
+                            f"✔️ {movidos} {NIVEIS_LOTE[nivel_filho]}(s) movido(s) para "
+                            f"{hierarquia.label(nivel, destino)}; {removidos} origem(ns) removida(s)."
+                        )
+                        st.rerun()
 
-st.markdown("---")
-st.markdown("*Página de edição hierárquica com Streamlit*")
+    st.markdown("---")
+    st.markdown("*Página de edição hierárquica com Streamlit*")
@@ -1,44 +1,82 @@
 import streamlit as st
-import pandas as pd
-import os
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-
-st.set_page_config(
-    page_title="📑 Tabela Hierárquica Completa",
-    page_icon="📋",
-    layout="wide",
+
+from scripts.export import botao_exportar
+from scripts.parallel import em_paralelo
+from scripts.queries import get_lbls, get_macro_temas
+from scripts.reports import (
+    SEM_LBL,
+    count_relatorio_geral,
+    filtros_relatorio_geral,
+    get_pagina_relatorio_geral,
 )
+from scripts.telemetry import pagina
+
+with pagina("Relatório Geral"):
+    st.set_page_config(
+        page_title="📑 Tabela Hierárquica Completa",
+        page_icon="📋",
+        layout="wide",
+    )
+
+    st.title("📑 Tabela Hierárquica Completa")
+
+    # Listas dos filtros carregadas ao mesmo tempo
+    lista_macro_temas, lista_lbls = em_paralelo(get_macro_temas, get_lbls)
+
+    # Filtros aplicados no banco (WHERE), não no DataFrame
+    col1, col2, col3, col4 = st.columns([3, 3, 3, 1])
+    with col1:
+        macro_temas = [(None, "Todos")] + list(lista_macro_temas)
+        macro_tema = st.selectbox(
+            "Macro Tema:", options=macro_temas, format_func=lambda x: x[1]
+        )
+    with col2:
+        lbls = [(None, "Todos"), (SEM_LBL, "Sem LBL")] + [
+            (row[0], f"LBL {row[1]} - {row[2]}") for row in lista_lbls
+        ]
+        lbl = st.selectbox("LBL:", options=lbls, format_func=lambda x: x[1])
+    with col3:
+        texto = st.text_input("Contém o texto:", placeholder="Ex: Marketing").strip()
+    with col4:
+        limite = st.selectbox("Linhas:", options=[50, 100, 500, 1000], index=1)
+
+    filtros = (macro_tema[0], lbl[0], texto)
+
+    # Pilha de chaves (keyset) do início de cada página; reinicia se os filtros mudarem
+    if st.session_state.get("rg_filtros") != (filtros, limite):
+        st.session_state["rg_filtros"] = (filtros, limite)
+        st.session_state["rg_chaves"] = [None]
+
+    chaves = st.session_state["rg_chaves"]
+    # Página e total são independentes: vão ao banco ao mesmo tempo
+    (df, proxima_chave, tem_proxima), total = em_paralelo(
+        lambda: get_pagina_relatorio_geral(*filtros, apos=chaves[-1], limite=limite),
+        lambda: count_relatorio_geral(*filtros),
+    )
+
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    nav1, nav2, nav3 = st.columns([1, 3, 1])
+    with nav1:
+        if st.button("⬅️ Anterior", disabled=len(chaves) == 1):
+            chaves.pop()
+            st.rerun()
+    with nav2:
+        inicio = (len(chaves) - 1) * limite
+        st.caption(
+            f"Página {len(chaves)} — linhas {inicio + 1 if len(df) else 0}"
+            f" a {inicio + len(df)} de {total}"
+        )
+    with nav3:
+        if st.button("Próxima ➡️", disabled=not tem_proxima):
+            chaves.append(proxima_chave)
+            st.rerun()
 
-st.title("📑 Tabela Hierárquica Completa")
-
-query = """
-SELECT
-  mt.macro_tema AS macro_tema,
-  ar.area AS area,
-  s.subarea AS subarea,
-  d.nome AS disciplina,
-  a.assunto AS assunto,
-  COALESCE('LBL ' || l.lbl || ' - ' || l.nome, '') AS lbl
-FROM assunto AS a
-JOIN disciplina AS d ON a.disciplina_id = d.id
-JOIN subarea AS s ON d.subarea_id = s.id
-JOIN area AS ar ON s.area_id = ar.id
-JOIN macro_tema AS mt ON ar.macro_tema_id = mt.id
-LEFT JOIN assunto_lbl AS al ON a.id = al.assunto_id
-LEFT JOIN lbl AS l ON al.lbl_id = l.id
-ORDER BY
-  mt.macro_tema,
-  ar.area,
-  s.subarea,
-  d.nome,
-  a.assunto,
-  l.lbl
-"""
-
-df = pd.read_sql(query, engine)
-st.dataframe(df, use_container_width=True)
+    st.markdown("---")
+    st.subheader("📥 Exportar resultado filtrado")
+    botao_exportar(
+        "relatorio_geral_exportacao",
+        filtros_relatorio_geral(*filtros),
+        "relatorio_geral",
+        key="export_relatorio_geral",
+    )
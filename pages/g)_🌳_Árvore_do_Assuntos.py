@@ -1,58 +1,47 @@
 import streamlit as st
-import pandas as pd
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
-import os
-
-# Carrega variáveis do .env
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# Conexão com o banco de dados
-@st.cache_resource
-def get_engine():
-    return create_engine(DATABASE_URL)
-
-engine = get_engine()
-
-# Carregar assuntos
-def carregar_assuntos():
-    query = """
-        SELECT id, assunto FROM assunto ORDER BY assunto
-    """
-    return pd.read_sql(query, engine)
-
-# Carregar árvore hierárquica
-def carregar_arvore(assunto_id):
-    query = f"""
-        SELECT
-            ass.assunto,
-            d.nome AS disciplina,
-            sa.subarea,
-            ar.area,
-            mt.macro_tema
-        FROM assunto ass
-        INNER JOIN disciplina d ON ass.disciplina_id = d.id
-        INNER JOIN subarea sa ON d.subarea_id = sa.id
-        INNER JOIN area ar ON sa.area_id = ar.id
-        INNER JOIN macro_tema mt ON ar.macro_tema_id = mt.id
-        WHERE ass.id = {assunto_id}
-    """
-    return pd.read_sql(query, engine).iloc[0]
-
-# Página Streamlit
-st.title("🌳 Visualização da Hierarquia: Assunto até Macro Tema")
-
-# Escolha do Assunto
-assuntos_df = carregar_assuntos()
-assunto_selecionado = st.selectbox("Selecione um assunto:", assuntos_df["assunto"])
-assunto_id = assuntos_df.loc[assuntos_df["assunto"] == assunto_selecionado, "id"].iloc[0]
-
-# Carrega a hierarquia
-hierarquia = carregar_arvore(assunto_id)
-
-# Exibição textual da hierarquia
-st.markdown(f"""
+
+from scripts.queries import get_hierarquia
+from scripts.telemetry import pagina
+
+# Quantas sugestões a busca mostra de cada vez
+LIMITE_SUGESTOES = 20
+
+with pagina("Árvore do Assunto"):
+    # Página Streamlit
+    st.title("🌳 Visualização da Hierarquia: Assunto até Macro Tema")
+
+    # Índice em memória (compartilhado e cacheado junto com a hierarquia):
+    # a busca e o caminho não consultam o banco a cada clique
+    indice = get_hierarquia().parent_index()
+    if not len(indice):
+        st.info("Nenhum assunto cadastrado.")
+        st.stop()
+
+    # Escolha do Assunto: só as melhores correspondências vão para o navegador
+    termo = st.text_input("Buscar assunto:", placeholder="Digite parte do nome do assunto")
+    sugestoes = indice.search(termo, limite=LIMITE_SUGESTOES)
+    if not sugestoes:
+        st.warning("Nenhum assunto encontrado para a busca.")
+        st.stop()
+
+
+    def _rotulo(assunto_id):
+        # Inclui disciplina e macro tema para diferenciar assuntos com o mesmo nome
+        macro_tema, _, _, disciplina, assunto = (nome for _, _, nome in indice.path(assunto_id))
+        return f"{assunto} ({disciplina} – {macro_tema})"
+
+
+    assunto_id = st.selectbox(
+        f"Selecione um assunto (até {LIMITE_SUGESTOES} sugestões):",
+        sugestoes,
+        format_func=_rotulo,
+    )
+
+    # Resolve a hierarquia pelo índice de pais
+    hierarquia = {nivel: nome for nivel, _, nome in indice.path(assunto_id)}
+
+    # Exibição textual da hierarquia
+    st.markdown(f"""
 ### 📌 Hierarquia Completa:
 
 - **Macro Tema:** {hierarquia['macro_tema']}
@@ -0,0 +1,64 @@
+import streamlit as st
+import pandas as pd
+
+from scripts.importer import COLUNAS, importar_grade, ler_arquivo
+from scripts.telemetry import pagina
+
+with pagina("Importar"):
+    st.set_page_config(page_title="📥 Importação em Lote", page_icon="📥", layout="wide")
+    st.title("📥 Importação em Lote da Grade")
+    st.markdown(
+        """
+        Envie um arquivo **CSV** ou **XLSX** com uma linha por assunto e as colunas
+        `macro_tema`, `area`, `subarea`, `disciplina`, `assunto` e, opcionalmente, `lbl`
+        (número do LBL). Pais que ainda não existem são criados pelo nome e os
+        LBLs precisam estar cadastrados.
+        """
+    )
+
+    arquivo = st.file_uploader("Arquivo da grade:", type=["csv", "xlsx"])
+
+    if arquivo:
+        try:
+            df, descartadas = ler_arquivo(arquivo, arquivo.name)
+        except Exception as e:
+            st.error(f"Erro ao ler o arquivo: {e}")
+            st.stop()
+
+        st.write(f"**{len(df)}** linhas válidas encontradas.")
+        if descartadas:
+            st.warning(f"⚠️ {descartadas} linhas sem algum nível da hierarquia foram descartadas.")
+        st.dataframe(df.head(50), use_container_width=True, hide_index=True)
+
+        dry_run = st.checkbox("🔍 Apenas simular (dry-run)", value=True)
+        if st.button("📥 Importar"):
+            try:
+                with st.spinner("Importando…"):
+                    resumo = importar_grade(df, dry_run=dry_run)
+            except Exception as e:
+                st.error(f"Erro ao importar: {e}")
+            else:
+                if dry_run:
+                    st.info("🔍 Simulação concluída — nada foi gravado.")
+                else:
+                    st.success("✅ Importação concluída com sucesso!")
+
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Macro Temas novos", resumo["macro_tema"])
+                col1.metric("Áreas novas", resumo["area"])
+                col2.metric("Subáreas novas", resumo["subarea"])
+                col2.metric("Disciplinas novas", resumo["disciplina"])
+                col3.metric("Assuntos novos", resumo["assunto"])
+                col3.metric("Associações Assunto-LBL novas", resumo["assunto_lbl"])
+                st.caption(
+                    f"⏱️ {resumo['segundos']:.2f}s — "
+                    f"{resumo['linhas_por_segundo']:.0f} linhas/s"
+                )
+                if resumo["lbls_desconhecidos"]:
+                    st.warning(
+                        "LBLs não cadastrados (associações ignoradas): "
+                        + ", ".join(str(lbl) for lbl in resumo["lbls_desconhecidos"])
+                    )
+    else:
+        st.info("Modelo de arquivo:")
+        st.dataframe(pd.DataFrame(columns=COLUNAS), use_container_width=True, hide_index=True)
@@ -0,0 +1,43 @@
+import streamlit as st
+
+from scripts.search import BUSCA_MIN_CARACTERES, buscar
+from scripts.telemetry import pagina
+
+with pagina("Buscar"):
+    st.set_page_config(page_title="Buscar", page_icon="🔎", layout="wide")
+    st.title("🔎 Buscar no Catálogo")
+    st.markdown(
+        "Procura ao mesmo tempo em macro temas, áreas, subáreas, disciplinas, "
+        "assuntos e nomes de LBL. Acentos e maiúsculas são ignorados."
+    )
+
+    NIVEIS_ROTULO = {
+        "macro_tema": "Macro Tema",
+        "area": "Área",
+        "subarea": "Subárea",
+        "disciplina": "Disciplina",
+        "assunto": "Assunto",
+        "lbl": "LBL",
+    }
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        termo = st.text_input("Termo:", placeholder="Ex.: farmacologia")
+    with col2:
+        limite = st.selectbox("Resultados:", [20, 50, 100])
+
+    if len(termo.strip()) < BUSCA_MIN_CARACTERES:
+        st.info(f"Digite pelo menos {BUSCA_MIN_CARACTERES} caracteres.")
+        st.stop()
+
+    resultados = buscar(termo, limite)
+    if resultados.empty:
+        st.warning("Nada encontrado.")
+    else:
+        st.dataframe(
+            resultados.assign(nivel=resultados["nivel"].map(NIVEIS_ROTULO))
+            .rename(columns={"nivel": "Nível", "nome": "Nome", "caminho": "Caminho"})
+            [["Nível", "Nome", "Caminho"]],
+            use_container_width=True,
+            hide_index=True,
+        )
@@ -0,0 +1,81 @@
+# scripts/aggregates.py
+import streamlit as st
+
+from scripts.queries import CACHE_TTL
+from scripts.sql import ler_df
+from scripts.telemetry import medir_cache
+
+
+class Contagens:
+    """Contagens por nível e por LBL usadas pelos gráficos do Relatório."""
+
+    def __init__(self, df):
+        conjuntos = {nome: grupo for nome, grupo in df.groupby("conjunto")}
+        vazio = df.iloc[0:0]
+
+        lbl = conjuntos.get("lbl", vazio)
+        lbl = lbl[lbl["lbl_id"].notna()].copy()
+        lbl["lbl_id"] = lbl["lbl_id"].astype(int)
+        lbl["lbl_label"] = (
+            lbl["lbl_num"].astype("Int64").astype(str) + " - " + lbl["lbl_nome"].astype(str)
+        )
+        self.lbls = lbl.sort_values("lbl_num")[["lbl_id", "lbl_label"]].reset_index(drop=True)
+        self.assuntos_por_lbl = (
+            lbl.sort_values("total_assuntos", ascending=False)[
+                ["lbl_id", "lbl_label", "total_assuntos"]
+            ].reset_index(drop=True)
+        )
+
+        macro = conjuntos.get("macro", vazio)
+        macro = macro[macro["macro_id"].notna()]
+        self.assuntos_por_macro = (
+            macro.rename(columns={"macro_tema": "macro_label"})
+            .assign(macro_id=lambda d: d["macro_id"].astype(int))
+            .sort_values("total_assuntos", ascending=False)[
+                ["macro_id", "macro_label", "total_assuntos"]
+            ].reset_index(drop=True)
+        )
+        self.areas_por_macro = self._nivel(macro, "macro_tema", "total_areas")
+        self.subareas_por_area = self._nivel(
+            conjuntos.get("area", vazio), "area", "total_subareas"
+        )
+        self.disciplinas_por_subarea = self._nivel(
+            conjuntos.get("subarea", vazio), "subarea", "total_disciplinas"
+        )
+        self.assuntos_por_disciplina = self._nivel(
+            conjuntos.get("disciplina", vazio), "disciplina", "total_assuntos"
+        )
+
+        lbl_macro = conjuntos.get("lbl_macro", vazio)
+        self._lbl_macro = lbl_macro[
+            lbl_macro["lbl_id"].notna() & lbl_macro["macro_id"].notna()
+            & (lbl_macro["total_assuntos"] > 0)
+        ]
+
+    @staticmethod
+    def _nivel(df, coluna, total):
+        """Só grupos com pelo menos um filho, do maior para o menor."""
+        df = df[df[coluna].notna() & (df[total] > 0)]
+        return df.sort_values(total, ascending=False)[[coluna, total]].reset_index(drop=True)
+
+    def total_lbl(self, lbl_id):
+        """Total de assuntos associados ao LBL."""
+        linha = self.assuntos_por_lbl[self.assuntos_por_lbl["lbl_id"] == lbl_id]
+        return int(linha["total_assuntos"].iloc[0]) if not linha.empty else 0
+
+    def macro_por_lbl(self, lbl_id):
+        """Assuntos do LBL distribuídos por macro tema."""
+        df = self._lbl_macro[self._lbl_macro["lbl_id"] == lbl_id]
+        return (
+            df.rename(columns={"macro_tema": "macro_label"})
+            .sort_values("total_assuntos", ascending=False)[
+                ["macro_label", "total_assuntos"]
+            ].reset_index(drop=True)
+        )
+
+
+@medir_cache("contagens")
+@st.cache_data(ttl=CACHE_TTL)
+def get_contagens():
+    """Recupera todas as contagens do Relatório em uma única consulta."""
+    return Contagens(ler_df("contagens"))
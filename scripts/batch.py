@@ -0,0 +1,87 @@
+# scripts/batch.py
+import streamlit as st
+
+from scripts.cache import (
+    invalidate_lbl,
+    invalidate_macro_tema,
+    invalidate_area,
+    invalidate_subarea,
+    invalidate_disciplina,
+    invalidate_assunto,
+)
+from scripts.db import DATABASE_URL, get_connection
+from scripts.sql import executar_lote
+
+# Colunas editáveis da grade de cada nível, na ordem das tuplas enviadas
+# às instruções lote_* de scripts/sql.py (o id vem antes nas atualizações).
+COLUNAS_LOTE = {
+    "lbl": ["lbl", "nome", "descricao"],
+    "macro_tema": ["nome"],
+    "area": ["nome", "pai"],
+    "subarea": ["nome", "pai"],
+    "disciplina": ["nome", "pai"],
+    "assunto": ["nome", "pai"],
+}
+
+_INVALIDAR = {
+    "lbl": invalidate_lbl,
+    "macro_tema": invalidate_macro_tema,
+    "area": invalidate_area,
+    "subarea": invalidate_subarea,
+    "disciplina": invalidate_disciplina,
+    "assunto": lambda *pais: invalidate_assunto(),
+}
+
+
+def alteracoes_da_grade(df, estado, converter=None):
+    """
+    Converte o estado de um st.data_editor (edited_rows / added_rows) nas
+    tuplas de salvar_lote(): (id, *colunas) com None nas células que não
+    mudaram, e as linhas novas completas. `converter` recebe (coluna, valor)
+    e devolve o valor a gravar (ex.: rótulo do pai → id). `df` tem de ser o
+    mesmo DataFrame mostrado na grade: edited_rows guarda só as posições.
+    """
+    colunas = list(df.columns.drop("id"))
+    converter = converter or (lambda coluna, valor: valor)
+
+    alteracoes = []
+    for posicao, celulas in estado.get("edited_rows", {}).items():
+        celulas = {c: converter(c, v) for c, v in celulas.items() if c in colunas}
+        if celulas:
+            node_id = int(df.iloc[int(posicao)]["id"])
+            alteracoes.append((node_id, *(celulas.get(c) for c in colunas)))
+
+    novos = [
+        tuple(converter(c, linha.get(c)) for c in colunas)
+        for linha in estado.get("added_rows", [])
+        if any(linha.get(c) not in (None, "") for c in colunas)
+    ]
+    return alteracoes, novos
+
+
+def salvar_lote(nivel, alteracoes, novos):
+    """
+    Grava as alterações e as linhas novas de um nível em uma única transação:
+    um UPDATE e um INSERT, cada um com todas as linhas (execute_values).
+    Retorna (atualizados, inseridos) ou None em caso de erro.
+    """
+    if not DATABASE_URL:
+        st.error("Variável DATABASE_URL não encontrada no .env")
+        return None
+    if not (alteracoes or novos):
+        return 0, 0
+    pais = set()
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            if alteracoes:
+                for antigo, novo in executar_lote(cur, f"lote_atualizar_{nivel}", alteracoes) or ():
+                    pais.update((antigo, novo))
+            if novos:
+                executar_lote(cur, f"lote_inserir_{nivel}", novos)
+                if "pai" in COLUNAS_LOTE[nivel]:
+                    pais.update(linha[-1] for linha in novos)
+        _INVALIDAR[nivel](*pais)
+        return len(alteracoes), len(novos)
+    except Exception as e:
+        st.error(f"Erro ao salvar em lote: {e}")
+        return None
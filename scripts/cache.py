@@ -0,0 +1,122 @@
+# scripts/cache.py
+from scripts.aggregates import get_contagens
+from scripts.queries import (
+    get_macro_temas,
+    get_areas_by_macro_tema,
+    get_subareas_by_area,
+    get_disciplinas_by_subarea,
+    get_assuntos,
+    get_hierarquia,
+    get_lbls,
+    get_subarvore,
+)
+from scripts.reports import count_relatorio_geral, get_tabela_assuntos_lbl
+from scripts.search import buscar, buscar_ids
+from scripts.views import refresh_after_write
+
+# Cada função invalida apenas as entradas de cache afetadas por uma escrita.
+# Leitores por pai são limpos pela chave (id do pai); leitores que
+# cobrem a hierarquia inteira são sempre limpos. Os que leem a view
+# materializada assunto_path são limpos de novo quando a atualização da
+# view, que roda em segundo plano, termina.
+
+
+def _invalidate_leitores_assunto_path():
+    get_assuntos.clear()
+    count_relatorio_geral.clear()
+    get_contagens.clear()
+    get_tabela_assuntos_lbl.clear()
+
+
+def _invalidate_hierarquia():
+    refresh_after_write(_invalidate_leitores_assunto_path)
+    get_hierarquia.clear()
+    _invalidate_leitores_assunto_path()
+    buscar.clear()
+    buscar_ids.clear()
+
+
+def invalidate_lbl():
+    """Após inserir ou editar um LBL."""
+    get_lbls.clear()
+    get_contagens.clear()
+    buscar.clear()
+
+
+def invalidate_macro_tema():
+    """Após inserir ou editar um macro tema."""
+    get_macro_temas.clear()
+    get_subarvore.clear()
+    _invalidate_hierarquia()
+
+
+def invalidate_area(*macro_tema_ids):
+    """Após inserir, editar ou mover uma área entre os macro temas informados."""
+    for macro_tema_id in set(macro_tema_ids):
+        get_areas_by_macro_tema.clear(macro_tema_id)
+        get_subarvore.clear(macro_tema_id)
+    _invalidate_hierarquia()
+
+
+def invalidate_subarea(*area_ids):
+    """Após inserir, editar ou mover uma subárea entre as áreas informadas."""
+    for area_id in set(area_ids):
+        get_subareas_by_area.clear(area_id)
+    # O macro tema das áreas não é conhecido aqui
+    get_subarvore.clear()
+    _invalidate_hierarquia()
+
+
+def invalidate_disciplina(*subarea_ids):
+    """Após inserir, editar ou mover uma disciplina entre as subáreas informadas."""
+    for subarea_id in set(subarea_ids):
+        get_disciplinas_by_subarea.clear(subarea_id)
+    get_subarvore.clear()
+    _invalidate_hierarquia()
+
+
+def invalidate_assunto():
+    """Após inserir, editar ou mover um assunto."""
+    _invalidate_hierarquia()
+
+
+def invalidate_fusao(nivel, *ids):
+    """
+    Após fundir nós de um nível (ids: destino e origens): os filhos mudaram
+    de pai e as origens vazias podem ter sido removidas.
+    """
+    filhos_por_pai = {
+        "macro_tema": get_areas_by_macro_tema,
+        "area": get_subareas_by_area,
+        "subarea": get_disciplinas_by_subarea,
+    }.get(nivel)
+    if filhos_por_pai:
+        for node_id in set(ids):
+            filhos_por_pai.clear(node_id)
+    # O pai das origens removidas não é conhecido aqui
+    {
+        "macro_tema": get_macro_temas,
+        "area": get_areas_by_macro_tema,
+        "subarea": get_subareas_by_area,
+        "disciplina": get_disciplinas_by_subarea,
+    }[nivel].clear()
+    get_subarvore.clear()
+    _invalidate_hierarquia()
+
+
+def invalidate_assunto_lbl():
+    """Após associar ou desassociar assuntos e LBLs."""
+    count_relatorio_geral.clear()
+    get_contagens.clear()
+    get_tabela_assuntos_lbl.clear()
+
+
+def invalidate_all():
+    """Após cargas em lote que tocam vários níveis de uma vez."""
+    get_lbls.clear()
+    get_macro_temas.clear()
+    get_areas_by_macro_tema.clear()
+    get_subareas_by_area.clear()
+    get_disciplinas_by_subarea.clear()
+    get_subarvore.clear()
+    _invalidate_hierarquia()
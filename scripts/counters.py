@@ -0,0 +1,18 @@
+# scripts/counters.py
+from scripts.db import get_connection
+from scripts.sql import executar
+
+
+def rebuild_contagens():
+    """
+    Recalcula a tabela contagem_hierarquia a partir das tabelas base.
+    Uso em recuperação (ex.: após TRUNCATE ou cargas com triggers desativados):
+    python -m scripts.counters
+    """
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "rebuild_contagens")
+
+
+if __name__ == "__main__":
+    rebuild_contagens()
+    print("Contadores da hierarquia recalculados.")
@@ -0,0 +1,158 @@
+# scripts/db.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Tamanho do pool e tolerâncias (configuráveis pelo .env)
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+# Engine SQLAlchemy compartilhada pelas páginas que usam pandas
+DB_ENGINE_POOL_SIZE = int(os.getenv("DB_ENGINE_POOL_SIZE", "5"))
+DB_ENGINE_MAX_OVERFLOW = int(os.getenv("DB_ENGINE_MAX_OVERFLOW", "5"))
+DB_ENGINE_POOL_RECYCLE = int(os.getenv("DB_ENGINE_POOL_RECYCLE", "1800"))
+DB_ENGINE_PRE_PING = os.getenv("DB_ENGINE_PRE_PING", "1") == "1"
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_last_used = {}
+_engine = None
+
+
+class PooledConnection(extensions.connection):
+    """Conexão do pool que lembra as instruções já preparadas nela (scripts/sql.py)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preparadas = set()
+
+
+def get_pool():
+    """Retorna o pool de conexões do processo, criando-o na primeira chamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if not DATABASE_URL:
+                    raise RuntimeError("Variável DATABASE_URL não encontrada no .env")
+                _pool = pool.ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL,
+                    connection_factory=PooledConnection,
+                )
+    return _pool
+
+
+def _is_healthy(conn):
+    """Verifica se a conexão emprestada ainda está utilizável."""
+    if conn.closed:
+        return False
+    if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    # Só faz o ping se a conexão ficou ociosa por muito tempo
+    if time.monotonic() - _last_used.get(id(conn), 0) < DB_POOL_PING_INTERVAL:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout(db_pool):
+    """Empresta uma conexão saudável, descartando as que caíram."""
+    for _ in range(DB_POOL_MAX + 1):
+        conn = db_pool.getconn()
+        if _is_healthy(conn):
+            return conn
+        _last_used.pop(id(conn), None)
+        db_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("Nenhuma conexão saudável disponível no pool")
+
+
+@contextmanager
+def get_connection():
+    """
+    Empresta uma conexão do pool do processo.
+    Faz commit ao sair do bloco, rollback se houver exceção e sempre devolve
+    a conexão ao pool.
+    """
+    if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise psycopg2.OperationalError("Tempo esgotado aguardando conexão do pool")
+    try:
+        db_pool = get_pool()
+        conn = _checkout(db_pool)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            broken = bool(conn.closed)
+            if broken:
+                _last_used.pop(id(conn), None)
+            else:
+                _last_used[id(conn)] = time.monotonic()
+            db_pool.putconn(conn, close=broken)
+    finally:
+        _slots.release()
+
+
+def get_engine():
+    """Retorna a engine SQLAlchemy do processo, criando-a na primeira chamada."""
+    global _engine
+    if _engine is None:
+        with _pool_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise RuntimeError("Variável DATABASE_URL não encontrada no .env")
+                _engine = create_engine(
+                    DATABASE_URL,
+                    pool_size=DB_ENGINE_POOL_SIZE,
+                    max_overflow=DB_ENGINE_MAX_OVERFLOW,
+                    pool_recycle=DB_ENGINE_POOL_RECYCLE,
+                    pool_pre_ping=DB_ENGINE_PRE_PING,
+                )
+    return _engine
+
+
+def connection_stats():
+    """Resume quantas conexões com o banco este processo mantém abertas."""
+    stats = {
+        "psycopg2_em_uso": 0,
+        "psycopg2_ociosas": 0,
+        "psycopg2_max": DB_POOL_MAX,
+        "engine_em_uso": 0,
+        "engine_ociosas": 0,
+        "engine_max": DB_ENGINE_POOL_SIZE + DB_ENGINE_MAX_OVERFLOW,
+    }
+    if _pool is not None:
+        stats["psycopg2_em_uso"] = len(_pool._used)
+        stats["psycopg2_ociosas"] = len(_pool._pool)
+    if _engine is not None:
+        stats["engine_em_uso"] = _engine.pool.checkedout()
+        stats["engine_ociosas"] = _engine.pool.checkedin()
+    stats["total"] = (
+        stats["psycopg2_em_uso"] + stats["psycopg2_ociosas"]
+        + stats["engine_em_uso"] + stats["engine_ociosas"]
+    )
+    stats["total_max"] = stats["psycopg2_max"] + stats["engine_max"]
+    return stats
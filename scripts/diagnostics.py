@@ -0,0 +1,108 @@
+# scripts/diagnostics.py
+import os
+
+import pandas as pd
+import streamlit as st
+
+from scripts.sql import SLOW_QUERY_MS, ler_df
+from scripts.telemetry import eventos, limpar
+
+# Painel escondido: só aparece com DIAGNOSTICO_HABILITADO=1, em /?diagnostico=1
+DIAGNOSTICO_HABILITADO = os.getenv("DIAGNOSTICO_HABILITADO", "0") == "1"
+
+# Reruns recentes considerados na lista dos mais lentos
+RERUNS_RECENTES = 500
+
+# Planos de consultas lentas mostrados no painel
+PLANOS_RECENTES = 20
+
+
+def diagnostico_solicitado():
+    """True se o painel está habilitado e foi pedido pela URL."""
+    return DIAGNOSTICO_HABILITADO and st.query_params.get("diagnostico") == "1"
+
+
+def _percentis(df, grupo):
+    """Execuções e p50/p95/p99 da coluna ms por grupo."""
+    return (
+        df.groupby(grupo)["ms"]
+        .agg(
+            execucoes="count",
+            p50_ms=lambda s: s.quantile(0.50),
+            p95_ms=lambda s: s.quantile(0.95),
+            p99_ms=lambda s: s.quantile(0.99),
+        )
+    )
+
+
+def render_diagnostico():
+    """Mostra latência por página e por consulta e os reruns mais lentos."""
+    st.title("🩺 Diagnóstico de Desempenho")
+    consultas, reruns = eventos()
+    st.caption(
+        f"Eventos deste processo: {len(consultas)} consultas, {len(reruns)} reruns."
+    )
+    if st.button("🧹 Limpar eventos"):
+        limpar()
+        st.rerun()
+
+    st.subheader("⏱️ Tempo total do rerun por página")
+    st.caption(
+        "modo = paralelo quando o rerun usou scripts/parallel.py. Abra a página "
+        "com ?paralelo=0 para medir a mesma sessão em série."
+    )
+    if reruns:
+        df_reruns = pd.DataFrame(reruns)
+        tabela = _percentis(df_reruns, ["pagina", "modo"]).join(
+            df_reruns.groupby(["pagina", "modo"])["ms_consultas"].mean().rename("media_ms_consultas")
+        )
+        st.dataframe(tabela.sort_values("p95_ms", ascending=False).round(1), use_container_width=True)
+    else:
+        st.info("Nenhum rerun registrado ainda.")
+
+    st.subheader("🗄️ Consultas por página")
+    if consultas:
+        df_consultas = pd.DataFrame(consultas)
+        tabela = _percentis(df_consultas, ["pagina", "consulta"]).join(
+            df_consultas.groupby(["pagina", "consulta"]).agg(
+                acertos_cache=("cache", "mean"),
+                linhas_media=("linhas", "mean"),
+            )
+        )
+        tabela["acertos_cache"] = (tabela["acertos_cache"] * 100).round(0).astype(int).astype(str) + "%"
+        st.dataframe(tabela.sort_values("p95_ms", ascending=False).round(1), use_container_width=True)
+    else:
+        st.info("Nenhuma consulta registrada ainda.")
+
+    st.subheader("🐢 Reruns mais lentos (recentes)")
+    if reruns:
+        lentos = (
+            pd.DataFrame(reruns[-RERUNS_RECENTES:])
+            .sort_values("ms", ascending=False)
+            .head(20)
+            .assign(instante=lambda d: pd.to_datetime(d["instante"], unit="s"))
+        )
+        st.dataframe(
+            lentos[["instante", "pagina", "modo", "ms", "consultas", "ms_consultas"]].round(1),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    st.subheader("🔬 Planos de consultas lentas")
+    if not SLOW_QUERY_MS:
+        st.info("Captura desligada. Defina SLOW_QUERY_MS para registrar os planos.")
+        return
+    try:
+        planos = ler_df("consultas_lentas_recentes", (PLANOS_RECENTES,))
+    except Exception as e:
+        st.error(f"Erro ao ler slow_query_log: {e}")
+        return
+    st.caption(f"Leituras acima de {SLOW_QUERY_MS:g} ms (EXPLAIN ANALYZE, BUFFERS).")
+    for linha in planos.itertuples():
+        with st.expander(
+            f"{linha.instante:%d/%m %H:%M:%S} · {linha.pagina} · {linha.consulta} · {linha.duracao_ms:.0f} ms"
+        ):
+            st.markdown("**Parâmetros**")
+            st.json(linha.parametros)
+            st.markdown("**Plano**")
+            st.json(linha.plano)
@@ -0,0 +1,199 @@
+# scripts/export.py
+import csv
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+import streamlit as st
+
+from scripts.db import get_connection
+from scripts.sql import texto
+from scripts.telemetry import registrar_consulta
+
+logger = logging.getLogger(__name__)
+
+# Linhas lidas do cursor do servidor por vez
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "10000"))
+# Arquivos exportados mais antigos que isso são apagados na próxima exportação
+EXPORT_MAX_AGE = int(os.getenv("EXPORT_MAX_AGE_SECONDS", "3600"))
+# O st.download_button entrega o arquivo inteiro de uma vez (o Streamlit
+# não serve downloads em blocos): acima deste tamanho o botão não é oferecido
+EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+# Diretório só das exportações: a limpeza nunca toca em outros arquivos
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(
+    tempfile.gettempdir(), "lbl_adm_exportacoes"
+)
+
+FORMATOS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+def _limpar_exportacoes_antigas():
+    limite = time.time() - EXPORT_MAX_AGE
+    with os.scandir(EXPORT_DIR) as arquivos:
+        for arquivo in arquivos:
+            try:
+                if arquivo.is_file() and arquivo.stat().st_mtime < limite:
+                    os.remove(arquivo.path)
+            except OSError:
+                pass
+
+
+def _gravar_csv(cur, caminho, colunas, bloco):
+    linhas = 0
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(colunas)
+        while bloco:
+            writer.writerows(bloco)
+            linhas += len(bloco)
+            bloco = cur.fetchmany(EXPORT_CHUNK_SIZE)
+    return linhas
+
+
+def _gravar_parquet(cur, caminho, colunas, bloco):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportação em Parquet requer o pacote 'pyarrow'")
+
+    linhas = 0
+    schema = None
+    writer = None
+    try:
+        while bloco:
+            tabela = pa.Table.from_pylist([dict(zip(colunas, row)) for row in bloco])
+            if schema is None:
+                # Colunas só com NULL no primeiro bloco viram texto
+                schema = pa.schema(
+                    [f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                     for f in tabela.schema]
+                )
+                writer = pq.ParquetWriter(caminho, schema)
+            writer.write_table(tabela.cast(schema))
+            linhas += len(bloco)
+            bloco = cur.fetchmany(EXPORT_CHUNK_SIZE)
+        if writer is None:
+            schema = pa.schema([(c, pa.string()) for c in colunas])
+            pq.write_table(schema.empty_table(), caminho)
+    finally:
+        if writer is not None:
+            writer.close()
+    return linhas
+
+
+def exportar_query(nome, params=None, formato="csv"):
+    """
+    Executa a consulta registrada `nome` (scripts/sql.py) por um cursor
+    nomeado (no servidor) e grava o resultado em blocos num arquivo
+    temporário, sem montar tudo em memória.
+    Retorna (caminho do arquivo, quantidade de linhas).
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _limpar_exportacoes_antigas()
+    _, sufixo = FORMATOS[formato]
+    fd, caminho = tempfile.mkstemp(prefix="export_", suffix=sufixo, dir=EXPORT_DIR)
+    os.close(fd)
+
+    inicio = time.perf_counter()
+    try:
+        with get_connection() as conn:
+            with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cur:
+                cur.itersize = EXPORT_CHUNK_SIZE
+                cur.execute(texto(nome), params)
+                bloco = cur.fetchmany(EXPORT_CHUNK_SIZE)
+                colunas = [c.name for c in cur.description]
+                if formato == "csv":
+                    linhas = _gravar_csv(cur, caminho, colunas, bloco)
+                else:
+                    linhas = _gravar_parquet(cur, caminho, colunas, bloco)
+    except Exception:
+        _remover(caminho)
+        raise
+
+    segundos = time.perf_counter() - inicio
+    registrar_consulta(nome, segundos * 1000, linhas)
+    tamanho = os.path.getsize(caminho)
+    logger.info(
+        "Exportação %s: %d linhas, %.1f KiB em %.2fs (%.0f linhas/s)",
+        formato, linhas, tamanho / 1024, segundos,
+        linhas / segundos if segundos else 0.0,
+    )
+    return caminho, linhas
+
+
+def _ler_e_liberar(caminho):
+    """
+    Lê o arquivo exportado (no clique em baixar) e o apaga do disco. O
+    conteúdo vai inteiro para a memória: por isso o limite EXPORT_MAX_BYTES.
+    """
+    def ler():
+        try:
+            with open(caminho, "rb") as arquivo:
+                return arquivo.read()
+        finally:
+            _remover(caminho)
+    return ler
+
+
+def botao_exportar(nome, params, nome_arquivo, key):
+    """
+    Mostra a escolha de formato e o botão de exportar. O arquivo é gerado
+    só quando pedido; o botão de baixar só o lê no clique e então o apaga.
+    Arquivos maiores que EXPORT_MAX_BYTES são descartados sem oferecer o botão.
+    """
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        formato = st.radio(
+            "Formato:", options=list(FORMATOS), horizontal=True, key=f"{key}_formato"
+        )
+    with col2:
+        if st.button("📦 Preparar exportação", key=f"{key}_preparar"):
+            anterior = st.session_state.pop(key, None)
+            if anterior:
+                _remover(anterior[0])
+            try:
+                with st.spinner("Exportando…"):
+                    caminho, linhas = exportar_query(nome, params, formato)
+            except Exception as e:
+                st.error(f"Erro ao exportar: {e}")
+            else:
+                tamanho = os.path.getsize(caminho)
+                if tamanho > EXPORT_MAX_BYTES:
+                    _remover(caminho)
+                    st.error(
+                        f"A exportação tem {tamanho / 2**20:.1f} MiB, acima do limite de "
+                        f"{EXPORT_MAX_BYTES / 2**20:.1f} MiB (EXPORT_MAX_BYTES). "
+                        "Refine os filtros para exportar menos linhas."
+                    )
+                else:
+                    st.session_state[key] = (caminho, formato, linhas)
+
+        exportado = st.session_state.get(key)
+        if exportado and os.path.exists(exportado[0]):
+            caminho, formato_exportado, linhas = exportado
+            mime, sufixo = FORMATOS[formato_exportado]
+            st.download_button(
+                label=f"📥 Baixar {formato_exportado.upper()} ({linhas} linhas)",
+                data=_ler_e_liberar(caminho),
+                file_name=f"{nome_arquivo}{sufixo}",
+                mime=mime,
+                key=f"{key}_baixar",
+                # Depois do download o botão some: para baixar de novo, prepare outra vez
+                on_click=st.session_state.pop,
+                args=(key, None),
+            )
+        elif exportado:
+            del st.session_state[key]
@@ -0,0 +1,187 @@
+# scripts/hierarchy.py
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+# Níveis da hierarquia, do mais alto para o mais baixo
+NIVEIS = ("macro_tema", "area", "subarea", "disciplina", "assunto")
+
+
+class HierarchySnapshot:
+    """
+    Fotografia em memória da hierarquia
+    macro_tema → area → subarea → disciplina → assunto.
+
+    É montada a partir de um único SELECT ordenado (um registro por caminho,
+    com colunas id/nome de cada nível) e responde filhos, pai e caminho de
+    qualquer nó sem voltar ao banco.
+    """
+
+    def __init__(self, rows):
+        # nivel -> {id: (nome, parent_id)}
+        self._nodes = {nivel: {} for nivel in NIVEIS}
+        # nivel -> {parent_id: [ids em ordem alfabética]}
+        self._children = {nivel: {} for nivel in NIVEIS}
+        # nivel -> [ids na ordem macro_tema, área, subárea, ...]
+        self._ordem = {nivel: [] for nivel in NIVEIS}
+
+        for row in rows:
+            parent_id = None
+            for i, nivel in enumerate(NIVEIS):
+                node_id, nome = row[2 * i], row[2 * i + 1]
+                if node_id is None:
+                    break
+                if node_id not in self._nodes[nivel]:
+                    self._nodes[nivel][node_id] = (nome, parent_id)
+                    self._children[nivel].setdefault(parent_id, []).append(node_id)
+                    self._ordem[nivel].append(node_id)
+                parent_id = node_id
+
+        self._parent_index = None
+
+    def __len__(self):
+        return sum(len(nodes) for nodes in self._nodes.values())
+
+    def count(self, nivel):
+        """Quantidade de nós do nível."""
+        return len(self._nodes[nivel])
+
+    def name(self, nivel, node_id):
+        """Nome do nó."""
+        return self._nodes[nivel][node_id][0]
+
+    def parent(self, nivel, node_id):
+        """Id do pai do nó (None para macro temas)."""
+        return self._nodes[nivel][node_id][1]
+
+    def children(self, nivel, parent_id=None):
+        """Lista (id, nome) dos nós do nível cujo pai é parent_id."""
+        nodes = self._nodes[nivel]
+        return [(i, nodes[i][0]) for i in self._children[nivel].get(parent_id, [])]
+
+    def contains(self, nivel, node_id):
+        """True se o nó existe nesta fotografia."""
+        return node_id in self._nodes[nivel]
+
+    def ids(self, nivel, limite=None):
+        """Ids do nível em ordem hierárquica (só os `limite` primeiros, se informado)."""
+        return self._ordem[nivel][:limite]
+
+    def items(self, nivel):
+        """Lista (id, nome) de todos os nós do nível, em ordem hierárquica."""
+        nodes = self._nodes[nivel]
+        return [(i, nodes[i][0]) for i in self._ordem[nivel]]
+
+    def descendants(self, nivel, node_id, alvo="assunto"):
+        """Ids dos descendentes do nó no nível alvo (ex.: todos os assuntos de uma área)."""
+        ids = [node_id]
+        inicio, fim = NIVEIS.index(nivel) + 1, NIVEIS.index(alvo) + 1
+        for nivel_filho in NIVEIS[inicio:fim]:
+            filhos = self._children[nivel_filho]
+            ids = [filho for i in ids for filho in filhos.get(i, [])]
+        return ids
+
+    def path(self, nivel, node_id):
+        """Nomes do macro tema até o nó, inclusive."""
+        nomes = []
+        idx = NIVEIS.index(nivel)
+        while node_id is not None and idx >= 0:
+            nome, parent_id = self._nodes[NIVEIS[idx]][node_id]
+            nomes.append(nome)
+            node_id = parent_id
+            idx -= 1
+        return nomes[::-1]
+
+    def label(self, nivel, node_id, sep=" – "):
+        """Caminho do nó formatado como 'Macro Tema – Área – ...'."""
+        return sep.join(self.path(nivel, node_id))
+
+    def parent_index(self):
+        """Índice em arrays (ParentIndex) desta fotografia, montado no primeiro uso."""
+        if self._parent_index is None:
+            self._parent_index = ParentIndex(self)
+        return self._parent_index
+
+
+def _chave_busca(texto):
+    """Texto sem acentos e sem caixa, para comparar na busca."""
+    sem_acento = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in sem_acento if not unicodedata.combining(c)).casefold()
+
+
+class ParentIndex:
+    """
+    Índice de ponteiros para o pai em arrays paralelos, um trio por nível:
+    ids em ordem crescente, nomes e a posição do pai no array do nível acima.
+
+    Um id vira posição por busca binária, e o caminho até o macro tema é
+    resolvido seguindo as posições, sem dicionários nem consultas. Também
+    guarda as chaves de busca dos assuntos em ordem para o type-ahead.
+    """
+
+    def __init__(self, snapshot):
+        self._ids, self._nomes, self._pais = {}, {}, {}
+        nivel_pai = None
+        for nivel in NIVEIS:
+            ids = sorted(snapshot._nodes[nivel])
+            self._ids[nivel] = array("q", ids)
+            self._nomes[nivel] = [snapshot.name(nivel, i) for i in ids]
+            if nivel_pai is None:
+                pais = [-1] * len(ids)
+            else:
+                pais = [self._posicao(nivel_pai, snapshot.parent(nivel, i)) for i in ids]
+            self._pais[nivel] = array("q", pais)
+            nivel_pai = nivel
+
+        # Posições dos assuntos ordenadas pela chave de busca (desempate por id)
+        chaves = [_chave_busca(nome) for nome in self._nomes["assunto"]]
+        self._ordem_busca = sorted(range(len(chaves)), key=lambda p: (chaves[p], p))
+        self._chaves_busca = [chaves[p] for p in self._ordem_busca]
+
+    def __len__(self):
+        return len(self._ids["assunto"])
+
+    def _posicao(self, nivel, node_id):
+        ids = self._ids[nivel]
+        pos = bisect_left(ids, node_id)
+        if pos == len(ids) or ids[pos] != node_id:
+            raise KeyError(node_id)
+        return pos
+
+    def name(self, nivel, node_id):
+        """Nome do nó."""
+        return self._nomes[nivel][self._posicao(nivel, node_id)]
+
+    def path(self, node_id, nivel="assunto"):
+        """Lista (nivel, id, nome) do macro tema até o nó, inclusive."""
+        caminho = []
+        pos = self._posicao(nivel, node_id)
+        for idx in range(NIVEIS.index(nivel), -1, -1):
+            nivel_atual = NIVEIS[idx]
+            caminho.append(
+                (nivel_atual, self._ids[nivel_atual][pos], self._nomes[nivel_atual][pos])
+            )
+            pos = self._pais[nivel_atual][pos]
+        return caminho[::-1]
+
+    def search(self, termo, limite=20):
+        """
+        Ids dos primeiros `limite` assuntos que contêm o termo (sem acento e
+        sem caixa): primeiro os que começam com ele, em ordem alfabética,
+        depois os que o contêm no meio.
+        """
+        chave = _chave_busca(termo.strip())
+        ids = self._ids["assunto"]
+        inicio = bisect_left(self._chaves_busca, chave)
+        encontrados = []
+        for i in range(inicio, len(self._chaves_busca)):
+            if len(encontrados) >= limite or not self._chaves_busca[i].startswith(chave):
+                break
+            encontrados.append(ids[self._ordem_busca[i]])
+        if len(encontrados) < limite:
+            for i, chave_assunto in enumerate(self._chaves_busca):
+                if chave in chave_assunto and not chave_assunto.startswith(chave):
+                    encontrados.append(ids[self._ordem_busca[i]])
+                    if len(encontrados) >= limite:
+                        break
+        return encontrados
@@ -0,0 +1,147 @@
+# scripts/importer.py
+import argparse
+import io
+import os
+import time
+import unicodedata
+
+import pandas as pd
+
+from scripts.cache import invalidate_all
+from scripts.db import get_connection
+from scripts.hierarchy import NIVEIS
+from scripts.sql import executar, texto
+
+# Colunas esperadas no arquivo (lbl é opcional e usa o número do LBL)
+COLUNAS = ["macro_tema", "area", "subarea", "disciplina", "assunto", "lbl"]
+COLUNAS_HIERARQUIA = COLUNAS[:-1]
+
+
+def _normalizar_coluna(nome):
+    """'Subárea' → 'subarea', 'Macro Tema' → 'macro_tema'."""
+    sem_acento = unicodedata.normalize("NFKD", str(nome))
+    sem_acento = "".join(c for c in sem_acento if not unicodedata.combining(c))
+    return "_".join(sem_acento.strip().lower().split())
+
+
+def ler_arquivo(arquivo, nome_arquivo=None):
+    """
+    Lê um CSV ou XLSX com as colunas macro_tema/area/subarea/disciplina/assunto/lbl
+    e devolve (DataFrame válido, quantidade de linhas descartadas).
+    """
+    nome_arquivo = nome_arquivo or getattr(arquivo, "name", str(arquivo))
+    if nome_arquivo.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(arquivo, dtype=str)
+    else:
+        df = pd.read_csv(arquivo, dtype=str, sep=None, engine="python")
+
+    df.columns = [_normalizar_coluna(c) for c in df.columns]
+    faltando = [c for c in COLUNAS_HIERARQUIA if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+    if "lbl" not in df.columns:
+        df["lbl"] = None
+
+    df = df[COLUNAS].copy()
+    for coluna in COLUNAS_HIERARQUIA:
+        df[coluna] = df[coluna].fillna("").str.strip()
+    df["lbl"] = pd.to_numeric(
+        df["lbl"].astype(str).str.extract(r"(\d+)", expand=False), errors="coerce"
+    ).astype("Int64")
+
+    validas = (df[COLUNAS_HIERARQUIA] != "").all(axis=1)
+    return df[validas].reset_index(drop=True), int((~validas).sum())
+
+
+# Cada nível: (nome, instrução que cria os que faltam, instrução que
+# resolve os ids na staging) — ver scripts/sql.py.
+_NIVEIS = [(nivel, f"importar_{nivel}", f"resolver_{nivel}") for nivel in NIVEIS]
+
+
+def _ajustar_contagens(cur, nivel):
+    """Ajusta os contadores com os pais devolvidos pelo INSERT que acabou de rodar."""
+    pais = [pai for pai, in cur.fetchall()]
+    if pais:
+        executar(cur, "contagem_inserir", (nivel, pais))
+
+
+def importar_grade(df, dry_run=False):
+    """
+    Importa as linhas em uma única transação: COPY para uma tabela temporária,
+    criação set-based dos pais que faltam (resolvidos por nome) e associação
+    aos LBLs com ON CONFLICT DO NOTHING. O trigger de contadores por linha
+    fica desligado (contagem.em_lote) e os contadores são ajustados uma vez
+    por nível. Em dry_run tudo é desfeito ao final e o resumo mostra o que
+    seria criado.
+    """
+    inicio = time.perf_counter()
+    resumo = {"linhas": len(df), "dry_run": dry_run}
+
+    buffer = io.StringIO()
+    df[COLUNAS].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "importar_criar_staging")
+        cur.copy_expert(texto("importar_copy"), buffer)
+        executar(cur, "importar_analyze")
+        executar(cur, "contagem_em_lote")
+
+        for nivel, inserir, resolver in _NIVEIS:
+            executar(cur, inserir)
+            resumo[nivel] = cur.rowcount
+            if nivel != "macro_tema":
+                _ajustar_contagens(cur, nivel)
+            executar(cur, resolver)
+
+        executar(cur, "importar_resolver_lbl")
+        executar(cur, "importar_lbls_desconhecidos")
+        resumo["lbls_desconhecidos"] = [row[0] for row in cur.fetchall()]
+        executar(cur, "importar_assunto_lbl")
+        resumo["assunto_lbl"] = cur.rowcount
+        _ajustar_contagens(cur, "assunto_lbl")
+
+        if dry_run:
+            conn.rollback()
+
+    if not dry_run:
+        invalidate_all()
+
+    resumo["segundos"] = time.perf_counter() - inicio
+    resumo["linhas_por_segundo"] = (
+        resumo["linhas"] / resumo["segundos"] if resumo["segundos"] else 0.0
+    )
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa macro_tema/area/subarea/disciplina/assunto/lbl de um CSV ou XLSX."
+    )
+    parser.add_argument("arquivo", help="Caminho do arquivo .csv ou .xlsx")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Mostra o que mudaria sem gravar nada"
+    )
+    args = parser.parse_args()
+
+    df, descartadas = ler_arquivo(args.arquivo, os.path.basename(args.arquivo))
+    resumo = importar_grade(df, dry_run=args.dry_run)
+
+    print("🔍 Simulação (nada foi gravado)" if args.dry_run else "✅ Importação concluída")
+    print(f"- Linhas válidas: {resumo['linhas']} (descartadas: {descartadas})")
+    print(f"- Macro temas novos: {resumo['macro_tema']}")
+    print(f"- Áreas novas: {resumo['area']}")
+    print(f"- Subáreas novas: {resumo['subarea']}")
+    print(f"- Disciplinas novas: {resumo['disciplina']}")
+    print(f"- Assuntos novos: {resumo['assunto']}")
+    print(f"- Associações Assunto-LBL novas: {resumo['assunto_lbl']}")
+    if resumo["lbls_desconhecidos"]:
+        print(f"- LBLs não cadastrados (ignorados): {resumo['lbls_desconhecidos']}")
+    print(
+        f"- Tempo: {resumo['segundos']:.2f}s "
+        f"({resumo['linhas_por_segundo']:.0f} linhas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 # scripts/inserts.py
-import psycopg2
-import os
-from dotenv import load_dotenv
 import streamlit as st
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from scripts.cache import (
+    invalidate_lbl,
+    invalidate_macro_tema,
+    invalidate_area,
+    invalidate_subarea,
+    invalidate_disciplina,
+    invalidate_assunto,
+    invalidate_assunto_lbl,
+)
+from scripts.db import DATABASE_URL, get_connection
+from scripts.sql import executar
 
 
 def insert_lbl(lbl_num, nome, descricao):
@@ -14,15 +20,9 @@ def insert_lbl(lbl_num, nome, descricao):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO lbl (lbl, nome, descricao) VALUES (%s, %s, %s)",
-            (lbl_num, nome, descricao),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_lbl", (lbl_num, nome, descricao))
+        invalidate_lbl()
         return True
     except Exception as e:
         st.error(f"Erro ao inserir LBL: {e}")
@@ -35,12 +35,9 @@ def insert_macro_tema(macro_tema):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute("INSERT INTO macro_tema (macro_tema) VALUES (%s)", (macro_tema,))
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_macro_tema", (macro_tema,))
+        invalidate_macro_tema()
         return True
     except Exception as e:
         st.error(f"Erro ao inserir Macro Tema: {e}")
@@ -53,15 +50,9 @@ def insert_area(area, macro_tema_id):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO area (area, macro_tema_id) VALUES (%s, %s)",
-            (area, macro_tema_id),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_area", (area, macro_tema_id))
+        invalidate_area(macro_tema_id)
         return True
     except Exception as e:
         st.error(f"Erro ao inserir Área: {e}")
@@ -74,15 +65,9 @@ def insert_subarea(subarea, area_id):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO subarea (subarea, area_id) VALUES (%s, %s)",
-            (subarea, area_id),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_subarea", (subarea, area_id))
+        invalidate_subarea(area_id)
         return True
     except Exception as e:
         st.error(f"Erro ao inserir Subárea: {e}")
@@ -95,15 +80,9 @@ def insert_disciplina(nome, subarea_id):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO disciplina (nome, subarea_id) VALUES (%s, %s)",
-            (nome, subarea_id),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_disciplina", (nome, subarea_id))
+        invalidate_disciplina(subarea_id)
         return True
     except Exception as e:
         st.error(f"Erro ao inserir Disciplina: {e}")
@@ -116,15 +95,9 @@ def insert_assunto(nome, disciplina_id):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO assunto (assunto, disciplina_id) VALUES (%s, %s)",
-            (nome, disciplina_id),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_assunto", (nome, disciplina_id))
+        invalidate_assunto()
         return True
     except Exception as e:
         st.error(f"Erro ao inserir Assunto: {e}")
@@ -137,16 +110,53 @@ def insert_assunto_lbl(assunto_id, lbl_id):
         st.error("Variável DATABASE_URL não encontrada no .env")
         return False
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO assunto_lbl (assunto_id, lbl_id) VALUES (%s, %s)",
-            (assunto_id, lbl_id),
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, "inserir_assunto_lbl", (assunto_id, lbl_id))
+        invalidate_assunto_lbl()
         return True
     except Exception as e:
         st.error(f"Erro ao associar Assunto-LBL: {e}")
         return False
+
+
+def insert_assuntos_lbls(assunto_ids, lbl_ids):
+    """
+    Associa todos os assuntos a todos os LBLs informados em um único comando.
+    Associações já existentes são ignoradas. Retorna quantas foram criadas
+    (None em caso de erro).
+    """
+    if not DATABASE_URL:
+        st.error("Variável DATABASE_URL não encontrada no .env")
+        return None
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(
+                cur, "inserir_assuntos_lbls", (list(assunto_ids), list(lbl_ids))
+            )
+            afetadas = cur.rowcount
+        invalidate_assunto_lbl()
+        return afetadas
+    except Exception as e:
+        st.error(f"Erro ao associar Assuntos-LBLs: {e}")
+        return None
+
+
+def delete_assuntos_lbls(assunto_ids, lbl_ids):
+    """
+    Remove, em um único comando, as associações entre os assuntos e os LBLs
+    informados. Retorna quantas foram removidas (None em caso de erro).
+    """
+    if not DATABASE_URL:
+        st.error("Variável DATABASE_URL não encontrada no .env")
+        return None
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(
+                cur, "remover_assuntos_lbls", (list(assunto_ids), list(lbl_ids))
+            )
+            afetadas = cur.rowcount
+        invalidate_assunto_lbl()
+        return afetadas
+    except Exception as e:
+        st.error(f"Erro ao desassociar Assuntos-LBLs: {e}")
+        return None
@@ -0,0 +1,105 @@
+# scripts/moves.py
+import streamlit as st
+
+from scripts.cache import (
+    invalidate_area,
+    invalidate_subarea,
+    invalidate_disciplina,
+    invalidate_assunto,
+    invalidate_fusao,
+)
+from scripts.db import DATABASE_URL, get_connection
+from scripts.hierarchy import NIVEIS
+from scripts.sql import executar
+
+_INVALIDAR = {
+    "area": invalidate_area,
+    "subarea": invalidate_subarea,
+    "disciplina": invalidate_disciplina,
+    "assunto": lambda *pais: invalidate_assunto(),
+}
+
+
+def _nivel_pai(nivel):
+    return NIVEIS[NIVEIS.index(nivel) - 1]
+
+
+def _nivel_filho(nivel):
+    return NIVEIS[NIVEIS.index(nivel) + 1]
+
+
+def _mover(cur, nivel, instrucao, params):
+    """
+    Roda o UPDATE em lote com o trigger de contadores desligado na transação
+    e ajusta os contadores de uma vez. Devolve [(id, pai antigo)].
+    """
+    executar(cur, "contagem_em_lote")
+    executar(cur, instrucao, params)
+    movidos = cur.fetchall()
+    if movidos:
+        ids, pais = zip(*movidos)
+        executar(cur, "contagem_mover", (
+            nivel, _nivel_pai(nivel), list(ids), list(pais), params["destino"],
+        ))
+    return movidos
+
+
+def mover_nos(cur, nivel, ids, destino):
+    """Move os nós `ids` do nível para o pai `destino` (no cursor informado)."""
+    return _mover(cur, nivel, f"mover_{nivel}", {"ids": list(ids), "destino": destino})
+
+
+def fundir_nos(cur, nivel, origens, destino, remover=True):
+    """
+    Move todos os filhos dos nós `origens` para o nó `destino` do mesmo nível
+    e, com `remover`, apaga as origens que ficaram vazias. Devolve
+    ([(id, pai antigo)] dos filhos movidos, quantidade de origens removidas).
+    """
+    origens = [o for o in origens if o != destino]
+    filho = _nivel_filho(nivel)
+    movidos = _mover(
+        cur, filho, f"mover_filhos_{filho}", {"origens": origens, "destino": destino}
+    )
+    removidos = 0
+    if remover and origens:
+        executar(cur, f"remover_vazios_{nivel}", (origens,))
+        removidos = cur.rowcount
+    return movidos, removidos
+
+
+def mover(nivel, ids, destino):
+    """
+    Move os nós escolhidos de um nível (area, subarea, disciplina ou assunto)
+    para outro pai em uma única transação. Retorna quantos foram movidos
+    (None em caso de erro).
+    """
+    if not DATABASE_URL:
+        st.error("Variável DATABASE_URL não encontrada no .env")
+        return None
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            movidos = mover_nos(cur, nivel, ids, destino)
+        _INVALIDAR[nivel](destino, *(pai for _, pai in movidos))
+        return len(movidos)
+    except Exception as e:
+        st.error(f"Erro ao mover: {e}")
+        return None
+
+
+def fundir(nivel, origens, destino, remover=True):
+    """
+    Funde os nós `origens` de um nível (macro_tema, area, subarea ou
+    disciplina) no nó `destino`, em uma única transação. Retorna
+    (filhos movidos, origens removidas) ou None em caso de erro.
+    """
+    if not DATABASE_URL:
+        st.error("Variável DATABASE_URL não encontrada no .env")
+        return None
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            movidos, removidos = fundir_nos(cur, nivel, origens, destino, remover)
+        invalidate_fusao(nivel, destino, *origens)
+        return len(movidos), removidos
+    except Exception as e:
+        st.error(f"Erro ao fundir: {e}")
+        return None
@@ -0,0 +1,69 @@
+# scripts/parallel.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from scripts.diagnostics import DIAGNOSTICO_HABILITADO
+from scripts.telemetry import adotar_rerun, marcar_paralelo, rerun_atual
+
+# Executor de consultas independentes de uma página. Cada tarefa usa a
+# sua própria conexão do pool, então o limite fica abaixo de DB_POOL_MAX.
+DB_PARALELO = os.getenv("DB_PARALELO", "1") == "1"
+DB_PARALELO_MAX = int(os.getenv("DB_PARALELO_MAX", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_PARALELO_MAX, thread_name_prefix="consultas"
+                )
+    return _executor
+
+
+def paralelo_ativo():
+    """
+    True se o executor está ligado. Com o diagnóstico habilitado, ?paralelo=0
+    na URL o desliga na sessão, para comparar o tempo das páginas no painel.
+    """
+    if DIAGNOSTICO_HABILITADO and st.query_params.get("paralelo") == "0":
+        return False
+    return DB_PARALELO
+
+
+def em_paralelo(*chamadas):
+    """
+    Roda funções independentes (sem argumentos: use lambda para passá-los)
+    ao mesmo tempo e devolve os resultados na ordem. As tarefas herdam o
+    contexto do Streamlit (cache, st.error) e contam no rerun da página.
+    Exceções sobem para quem chamou.
+    """
+    # Dentro de uma tarefa roda em série: esperar o próprio executor pode travá-lo
+    if len(chamadas) < 2 or getattr(_local, "tarefa", False) or not paralelo_ativo():
+        return [chamada() for chamada in chamadas]
+
+    ctx = get_script_run_ctx()
+    rerun = rerun_atual()
+    marcar_paralelo()
+
+    def tarefa(chamada):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        adotar_rerun(rerun)
+        _local.tarefa = True
+        try:
+            return chamada()
+        finally:
+            _local.tarefa = False
+            adotar_rerun(None)
+
+    futuros = [_get_executor().submit(tarefa, chamada) for chamada in chamadas]
+    return [futuro.result() for futuro in futuros]
@@ -1,143 +1,142 @@
 # scripts/queries.py
-import psycopg2
+import functools
 import os
-from dotenv import load_dotenv
+
 import streamlit as st
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+from scripts.db import DATABASE_URL, get_connection
+from scripts.hierarchy import HierarchySnapshot
+from scripts.sql import executar
+from scripts.telemetry import medir_cache
+
+# As escritas invalidam as entradas afetadas (scripts/cache.py),
+# então o TTL serve apenas como rede de segurança.
+CACHE_TTL = int(os.getenv("CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+def mostrar_erro(mensagem, vazio):
+    """
+    Envolve um leitor em cache: a exceção sai da função cacheada (então a
+    falha não fica no cache pelo TTL) e aqui vira st.error e o valor vazio().
+    Mantém .clear() para a invalidação.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                st.error(f"{mensagem}: {e}")
+                return vazio()
+
+        wrapper.clear = func.clear
+        return wrapper
+    return decorador
 
 
-@st.cache_data(ttl=60)
+@medir_cache("macro_temas")
+@mostrar_erro("Erro ao buscar Macro Temas", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_macro_temas():
     """Recupera todos os macro temas."""
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute("SELECT id, macro_tema FROM macro_tema ORDER BY macro_tema")
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar Macro Temas: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "macro_temas")
+        return cur.fetchall()
 
 
-@st.cache_data(ttl=60)
+@medir_cache("areas_por_macro_tema")
+@mostrar_erro("Erro ao buscar Áreas", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_areas_by_macro_tema(macro_tema_id):
     """Recupera áreas por macro tema."""
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, area FROM area WHERE macro_tema_id = %s ORDER BY area",
-            (macro_tema_id,),
-        )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar Áreas: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "areas_por_macro_tema", (macro_tema_id,))
+        return cur.fetchall()
 
 
-@st.cache_data(ttl=60)
+@medir_cache("subareas_por_area")
+@mostrar_erro("Erro ao buscar Subáreas", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_subareas_by_area(area_id):
     """Recupera subáreas por área."""
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, subarea FROM subarea WHERE area_id = %s ORDER BY subarea",
-            (area_id,),
-        )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar Subáreas: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "subareas_por_area", (area_id,))
+        return cur.fetchall()
 
 
-@st.cache_data(ttl=60)
+@medir_cache("disciplinas_por_subarea")
+@mostrar_erro("Erro ao buscar Disciplinas", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_disciplinas_by_subarea(subarea_id):
     """Recupera disciplinas por subárea."""
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, nome FROM disciplina WHERE subarea_id = %s ORDER BY nome",
-            (subarea_id,),
-        )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar Disciplinas: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "disciplinas_por_subarea", (subarea_id,))
+        return cur.fetchall()
 
 
-@st.cache_data(ttl=60)
+@medir_cache("assuntos")
+@mostrar_erro("Erro ao buscar Assuntos", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_assuntos():
     """
     Recupera todos os assuntos com hierarquia completa:
     assunto → disciplina → subárea → área → macro_tema
+    (lida da view materializada assunto_path)
     """
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        query = """
-            SELECT
-                a.id,
-                a.assunto,
-                d.nome        AS disciplina,
-                s.subarea     AS subarea,
-                ar.area       AS area,
-                mt.macro_tema AS macro_tema
-            FROM assunto a
-            JOIN disciplina d ON a.disciplina_id = d.id
-            JOIN subarea s   ON d.subarea_id     = s.id
-            JOIN area ar     ON s.area_id        = ar.id
-            JOIN macro_tema mt ON ar.macro_tema_id = mt.id
-            ORDER BY mt.macro_tema, ar.area, s.subarea, d.nome, a.assunto
-        """
-        cur.execute(query)
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar Assuntos: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "assuntos")
+        return cur.fetchall()
 
 
-@st.cache_data(ttl=60)
+@medir_cache("lbls")
+@mostrar_erro("Erro ao buscar LBLs", list)
+@st.cache_data(ttl=CACHE_TTL)
 def get_lbls():
     """Recupera todos os LBLs com descrição."""
     if not DATABASE_URL:
         return []
-    try:
-        conn = psycopg2.connect(DATABASE_URL)
-        cur = conn.cursor()
-        cur.execute("SELECT id, lbl, nome, descricao FROM lbl ORDER BY lbl")
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return rows
-    except Exception as e:
-        st.error(f"Erro ao buscar LBLs: {e}")
-        return []
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "lbls")
+        return cur.fetchall()
+
+
+@medir_cache("hierarquia")
+@mostrar_erro("Erro ao buscar Hierarquia", lambda: HierarchySnapshot([]))
+@st.cache_resource(ttl=CACHE_TTL)
+def get_hierarquia():
+    """
+    Recupera a hierarquia completa em uma única consulta ordenada:
+    macro_tema → área → subárea → disciplina → assunto.
+    Usa cache_resource para compartilhar o objeto sem copiá-lo a cada rerun.
+    """
+    if not DATABASE_URL:
+        return HierarchySnapshot([])
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "hierarquia")
+        return HierarchySnapshot(cur)
+
+
+@medir_cache("subarvore_macro_tema")
+@mostrar_erro("Erro ao buscar Subárvore", lambda: HierarchySnapshot([]))
+@st.cache_resource(ttl=CACHE_TTL, max_entries=100)
+def get_subarvore(macro_tema_id):
+    """
+    Áreas, subáreas e disciplinas de um macro tema em uma única consulta,
+    para seleções em cascata filtradas em memória (sem os assuntos, então
+    não precisa ser invalidada quando um assunto é cadastrado).
+    """
+    if not DATABASE_URL:
+        return HierarchySnapshot([])
+    with get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "subarvore_macro_tema", (macro_tema_id,))
+        return HierarchySnapshot(cur)
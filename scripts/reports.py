@@ -0,0 +1,58 @@
+# scripts/reports.py
+import streamlit as st
+
+from scripts.queries import CACHE_TTL
+from scripts.sql import escape_like, ler_df
+from scripts.telemetry import medir_cache
+
+# Filtro de LBL especial: assuntos sem nenhum LBL associado
+SEM_LBL = 0
+
+
+def filtros_relatorio_geral(macro_tema_id=None, lbl_id=None, texto=""):
+    """Parâmetros das consultas relatorio_geral_* a partir dos filtros da tela."""
+    return {
+        "macro_tema_id": macro_tema_id,
+        "lbl_id": None if lbl_id == SEM_LBL else lbl_id,
+        "sem_lbl": lbl_id == SEM_LBL,
+        "texto": f"%{escape_like(texto)}%" if texto else None,
+    }
+
+
+def get_pagina_relatorio_geral(macro_tema_id=None, lbl_id=None, texto="", apos=None, limite=100):
+    """
+    Recupera uma página do Relatório Geral começando depois da chave `apos`
+    (tupla devolvida em `chave` pela página anterior). Traz `limite + 1`
+    linhas para saber se existe próxima página.
+    """
+    params = filtros_relatorio_geral(macro_tema_id, lbl_id, texto)
+    params.update({f"k{i}": valor for i, valor in enumerate(apos or (None,) * 7)})
+    params["limite"] = limite + 1
+
+    df = ler_df("relatorio_geral_pagina", params)
+    tem_proxima = len(df) > limite
+    df = df.head(limite)
+    chave = None
+    if not df.empty:
+        ultima = df.iloc[-1]
+        chave = (
+            ultima["macro_tema"], ultima["area"], ultima["subarea"],
+            ultima["disciplina"], ultima["assunto"],
+            int(ultima["assunto_id"]), int(ultima["lbl_ordem"]),
+        )
+    return df.drop(columns=["assunto_id", "lbl_ordem"]), chave, tem_proxima
+
+
+@medir_cache("relatorio_geral_total")
+@st.cache_data(ttl=CACHE_TTL)
+def count_relatorio_geral(macro_tema_id=None, lbl_id=None, texto=""):
+    """Total de linhas do Relatório Geral para os filtros (cacheado à parte)."""
+    params = filtros_relatorio_geral(macro_tema_id, lbl_id, texto)
+    return int(ler_df("relatorio_geral_total", params)["total"].iloc[0])
+
+
+@medir_cache("tabela_assuntos_lbl")
+@st.cache_data(ttl=CACHE_TTL)
+def get_tabela_assuntos_lbl(lbl_id):
+    """Assuntos associados ao LBL, com a hierarquia, em ordem."""
+    return ler_df("tabela_assuntos_lbl", (lbl_id,))
@@ -0,0 +1,83 @@
+# scripts/search.py
+import pandas as pd
+import streamlit as st
+
+from scripts.db import DATABASE_URL
+from scripts.queries import CACHE_TTL, mostrar_erro
+from scripts.sql import escape_like, ler_df
+from scripts.telemetry import medir_cache
+
+# Abaixo disso os índices de trigramas não ajudam (LIKE vira varredura)
+BUSCA_MIN_CARACTERES = 3
+
+COLUNAS_BUSCA = ["nivel", "id", "nome", "caminho", "relevancia"]
+
+# Quantas opções os seletores guiados por busca mandam ao navegador
+LIMITE_SELETOR = 20
+
+
+def _params_busca(termo, limite):
+    escapado = escape_like(termo)
+    return {
+        "termo": termo,
+        "prefixo": f"{escapado}%",
+        "contem": f"%{escapado}%",
+        "limite": limite,
+    }
+
+
+@medir_cache("busca_global")
+@mostrar_erro("Erro ao buscar", lambda: pd.DataFrame(columns=COLUNAS_BUSCA))
+@st.cache_data(ttl=CACHE_TTL, max_entries=1000)
+def buscar(termo, limite=20):
+    """
+    Busca o termo, sem diferenciar acentos nem maiúsculas, em macro temas,
+    áreas, subáreas, disciplinas, assuntos e nomes de LBL de uma vez.
+    Devolve as `limite` melhores correspondências com o caminho de cada uma.
+    """
+    termo = (termo or "").strip()
+    if not DATABASE_URL or len(termo) < BUSCA_MIN_CARACTERES:
+        return pd.DataFrame(columns=COLUNAS_BUSCA)
+    return ler_df("busca_global", _params_busca(termo, limite))
+
+
+@medir_cache("busca_nivel")
+@mostrar_erro("Erro ao buscar", list)
+@st.cache_data(ttl=CACHE_TTL, max_entries=1000)
+def buscar_ids(nivel, termo, limite=LIMITE_SELETOR):
+    """Ids dos `limite` nós do nível (area, subarea, disciplina ou assunto) mais parecidos com o termo."""
+    termo = (termo or "").strip()
+    if not DATABASE_URL or len(termo) < BUSCA_MIN_CARACTERES:
+        return []
+    return ler_df(f"busca_{nivel}", _params_busca(termo, limite))["id"].tolist()
+
+
+def seletor_busca(hierarquia, nivel, rotulo, key, atual=None):
+    """
+    Selectbox de ids de um nível guiado por busca: só as LIMITE_SELETOR
+    melhores correspondências (sem termo, os primeiros nós em ordem) vão ao
+    navegador, rotuladas pelo caminho na hierarquia. `atual` entra sempre
+    nas opções e vem selecionado. Devolve o id escolhido ou None.
+    """
+    termo = st.text_input(
+        f"Buscar {rotulo.lower()}:",
+        key=f"{key}_busca",
+        placeholder=f"Digite ao menos {BUSCA_MIN_CARACTERES} letras",
+    )
+    if len(termo.strip()) >= BUSCA_MIN_CARACTERES:
+        # A busca vai ao banco; ignora nós que a fotografia ainda não tem
+        ids = [i for i in buscar_ids(nivel, termo) if hierarquia.contains(nivel, i)]
+    else:
+        ids = hierarquia.ids(nivel, LIMITE_SELETOR)
+    if atual is not None and atual not in ids:
+        ids = [atual, *ids]
+    if not ids:
+        st.warning("Nada encontrado.")
+        return None
+    return st.selectbox(
+        f"{rotulo} (até {LIMITE_SELETOR} sugestões):",
+        options=ids,
+        index=ids.index(atual) if atual in ids else 0,
+        format_func=lambda i: hierarquia.label(nivel, i),
+        key=key,
+    )
@@ -0,0 +1,1036 @@
+# scripts/sql.py
+import argparse
+import itertools
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+
+from scripts.db import get_connection, get_engine
+from scripts.telemetry import pagina_atual, registrar_consulta
+
+logger = logging.getLogger(__name__)
+
+# Todas as instruções SQL da aplicação, por nome, sempre com parâmetros
+# ligados (%s ou %(nome)s) — nunca com valores interpolados no texto.
+#
+# As marcadas com preparar=True são as "quentes" (executadas com ids
+# diferentes a cada clique): são preparadas uma vez por conexão do pool
+# (PREPARE) e depois executadas pelo nome (EXECUTE), sem novo parse/plan.
+# Elas usam apenas %s posicionais. `amostra` é uma consulta que devolve
+# parâmetros de exemplo para o relatório de tempo de planejamento.
+#
+# As marcadas com leitura=True só leem (sem efeitos colaterais) e podem ser
+# repetidas com EXPLAIN ANALYZE pelo log de consultas lentas.
+Consulta = namedtuple("Consulta", "nome sql preparar amostra leitura")
+
+# Desative (0) atrás de poolers em modo transação, que não mantêm PREPARE
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") == "1"
+
+# Log de consultas lentas (opcional): leituras acima de SLOW_QUERY_MS têm o
+# plano (EXPLAIN ANALYZE, BUFFERS) capturado numa thread à parte e gravado
+# em slow_query_log, no máximo uma vez por intervalo para cada instrução.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_INTERVALO = float(os.getenv("SLOW_QUERY_INTERVALO_SECONDS", "300"))
+
+CONSULTAS = {}
+
+
+def _registrar(nome, sql, preparar=False, amostra=None, leitura=False):
+    CONSULTAS[nome] = Consulta(nome, sql, preparar, amostra, leitura)
+
+
+# --- Leitura da hierarquia ---------------------------------------------------
+
+_registrar(
+    "macro_temas",
+    "SELECT id, macro_tema FROM macro_tema ORDER BY macro_tema",
+    leitura=True,
+)
+_registrar(
+    "areas_por_macro_tema",
+    "SELECT id, area FROM area WHERE macro_tema_id = %s ORDER BY area",
+    preparar=True,
+    amostra="SELECT macro_tema_id FROM area LIMIT 1",
+    leitura=True,
+)
+_registrar(
+    "subareas_por_area",
+    "SELECT id, subarea FROM subarea WHERE area_id = %s ORDER BY subarea",
+    preparar=True,
+    amostra="SELECT area_id FROM subarea LIMIT 1",
+    leitura=True,
+)
+_registrar(
+    "disciplinas_por_subarea",
+    "SELECT id, nome FROM disciplina WHERE subarea_id = %s ORDER BY nome",
+    preparar=True,
+    amostra="SELECT subarea_id FROM disciplina LIMIT 1",
+    leitura=True,
+)
+_registrar(
+    "assuntos",
+    """
+    SELECT assunto_id, assunto, disciplina, subarea, area, macro_tema
+      FROM assunto_path
+     ORDER BY macro_tema, area, subarea, disciplina, assunto, assunto_id
+    """,
+    leitura=True,
+)
+_registrar(
+    "lbls",
+    "SELECT id, lbl, nome, descricao FROM lbl ORDER BY lbl",
+    leitura=True,
+)
+_registrar(
+    "hierarquia",
+    """
+    SELECT
+        mt.id, mt.macro_tema,
+        ar.id, ar.area,
+        s.id,  s.subarea,
+        d.id,  d.nome,
+        a.id,  a.assunto
+    FROM macro_tema mt
+    LEFT JOIN area ar      ON ar.macro_tema_id = mt.id
+    LEFT JOIN subarea s    ON s.area_id        = ar.id
+    LEFT JOIN disciplina d ON d.subarea_id     = s.id
+    LEFT JOIN assunto a    ON a.disciplina_id  = d.id
+    ORDER BY mt.macro_tema, mt.id, ar.area, ar.id, s.subarea, s.id,
+             d.nome, d.id, a.assunto, a.id
+    """,
+    leitura=True,
+)
+
+_registrar(
+    "subarvore_macro_tema",
+    """
+    SELECT
+        mt.id, mt.macro_tema,
+        ar.id, ar.area,
+        s.id,  s.subarea,
+        d.id,  d.nome,
+        NULL::INTEGER, NULL::TEXT
+    FROM macro_tema mt
+    LEFT JOIN area ar      ON ar.macro_tema_id = mt.id
+    LEFT JOIN subarea s    ON s.area_id        = ar.id
+    LEFT JOIN disciplina d ON d.subarea_id     = s.id
+    WHERE mt.id = %s
+    ORDER BY ar.area, ar.id, s.subarea, s.id, d.nome, d.id
+    """,
+    preparar=True,
+    amostra="SELECT id FROM macro_tema LIMIT 1",
+    leitura=True,
+)
+
+# --- Cadastro ------------------------------------------------------------------
+
+_registrar(
+    "inserir_lbl",
+    "INSERT INTO lbl (lbl, nome, descricao) VALUES (%s, %s, %s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_macro_tema",
+    "INSERT INTO macro_tema (macro_tema) VALUES (%s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_area",
+    "INSERT INTO area (area, macro_tema_id) VALUES (%s, %s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_subarea",
+    "INSERT INTO subarea (subarea, area_id) VALUES (%s, %s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_disciplina",
+    "INSERT INTO disciplina (nome, subarea_id) VALUES (%s, %s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_assunto",
+    "INSERT INTO assunto (assunto, disciplina_id) VALUES (%s, %s)",
+    preparar=True,
+)
+_registrar(
+    "inserir_assunto_lbl",
+    """
+    INSERT INTO assunto_lbl (assunto_id, lbl_id) VALUES (%s, %s)
+    ON CONFLICT DO NOTHING
+    """,
+    preparar=True,
+)
+_registrar(
+    "inserir_assuntos_lbls",
+    """
+    INSERT INTO assunto_lbl (assunto_id, lbl_id)
+    SELECT a.id, l.id
+      FROM unnest(%s::int[]) AS a(id)
+     CROSS JOIN unnest(%s::int[]) AS l(id)
+    ON CONFLICT DO NOTHING
+    """,
+    preparar=True,
+)
+_registrar(
+    "remover_assuntos_lbls",
+    """
+    DELETE FROM assunto_lbl
+     WHERE assunto_id = ANY(%s::int[])
+       AND lbl_id = ANY(%s::int[])
+    """,
+    preparar=True,
+)
+
+# --- Edição --------------------------------------------------------------------
+
+_registrar(
+    "atualizar_lbl",
+    """
+    UPDATE lbl
+       SET lbl = %s,
+           nome = %s,
+           descricao = %s,
+           timestamp = CURRENT_TIMESTAMP
+     WHERE id = %s
+    """,
+    preparar=True,
+)
+_registrar(
+    "atualizar_macro_tema",
+    """
+    UPDATE macro_tema
+       SET macro_tema = %s,
+           timestamp = CURRENT_TIMESTAMP
+     WHERE id = %s
+    """,
+    preparar=True,
+)
+# Os updates abaixo devolvem o pai anterior (auto-join com a versão antiga
+# da linha) para invalidar o cache do pai antigo e do novo.
+_registrar(
+    "atualizar_area",
+    """
+    UPDATE area
+       SET area = %s,
+           macro_tema_id = %s,
+           timestamp = CURRENT_TIMESTAMP
+      FROM area AS antiga
+     WHERE area.id = %s
+       AND antiga.id = area.id
+ RETURNING antiga.macro_tema_id
+    """,
+    preparar=True,
+)
+_registrar(
+    "atualizar_subarea",
+    """
+    UPDATE subarea
+       SET subarea = %s,
+           area_id = %s,
+           timestamp = CURRENT_TIMESTAMP
+      FROM subarea AS antiga
+     WHERE subarea.id = %s
+       AND antiga.id = subarea.id
+ RETURNING antiga.area_id
+    """,
+    preparar=True,
+)
+_registrar(
+    "atualizar_disciplina",
+    """
+    UPDATE disciplina
+       SET nome = %s,
+           subarea_id = %s,
+           timestamp = CURRENT_TIMESTAMP
+      FROM disciplina AS antiga
+     WHERE disciplina.id = %s
+       AND antiga.id = disciplina.id
+ RETURNING antiga.subarea_id
+    """,
+    preparar=True,
+)
+_registrar(
+    "atualizar_assunto",
+    """
+    UPDATE assunto
+       SET assunto = %s,
+           disciplina_id = %s,
+           timestamp = CURRENT_TIMESTAMP
+     WHERE id = %s
+    """,
+    preparar=True,
+)
+
+# --- Edição em lote (grade da Edição, ver scripts/batch.py) --------------------
+
+# Executadas com executar_lote(): VALUES %s recebe todas as linhas num único
+# comando. Nas atualizações, NULL numa coluna mantém o valor atual — só as
+# células alteradas são enviadas. As de níveis com pai devolvem o pai antigo
+# e o novo para invalidar o cache de ambos.
+_registrar(
+    "lote_atualizar_lbl",
+    """
+    UPDATE lbl AS t
+       SET lbl = COALESCE(v.lbl::int, t.lbl),
+           nome = COALESCE(v.nome::text, t.nome),
+           descricao = NULLIF(COALESCE(v.descricao::text, t.descricao), ''),
+           timestamp = CURRENT_TIMESTAMP
+      FROM (VALUES %s) AS v(id, lbl, nome, descricao)
+     WHERE t.id = v.id::int
+    """,
+)
+_registrar(
+    "lote_atualizar_macro_tema",
+    """
+    UPDATE macro_tema AS t
+       SET macro_tema = v.nome::text,
+           timestamp = CURRENT_TIMESTAMP
+      FROM (VALUES %s) AS v(id, nome)
+     WHERE t.id = v.id::int
+    """,
+)
+for _tabela, _coluna, _pai in (
+    ("area", "area", "macro_tema_id"),
+    ("subarea", "subarea", "area_id"),
+    ("disciplina", "nome", "subarea_id"),
+    ("assunto", "assunto", "disciplina_id"),
+):
+    _registrar(
+        f"lote_atualizar_{_tabela}",
+        f"""
+    UPDATE {_tabela} AS t
+       SET {_coluna} = COALESCE(v.nome::text, t.{_coluna}),
+           {_pai} = COALESCE(v.pai::int, t.{_pai}),
+           timestamp = CURRENT_TIMESTAMP
+      FROM (VALUES %s) AS v(id, nome, pai), {_tabela} AS antiga
+     WHERE t.id = v.id::int
+       AND antiga.id = t.id
+ RETURNING antiga.{_pai}, t.{_pai}
+    """,
+    )
+    _registrar(
+        f"lote_inserir_{_tabela}",
+        f"INSERT INTO {_tabela} ({_coluna}, {_pai}) VALUES %s",
+    )
+_registrar(
+    "lote_inserir_lbl",
+    """
+    INSERT INTO lbl (lbl, nome, descricao)
+    SELECT v.lbl::int, v.nome::text, NULLIF(v.descricao::text, '')
+      FROM (VALUES %s) AS v(lbl, nome, descricao)
+    """,
+)
+_registrar("lote_inserir_macro_tema", "INSERT INTO macro_tema (macro_tema) VALUES %s")
+
+# --- Movimentações em lote (ver scripts/moves.py) -----------------------------
+
+# Move nós para outro pai: os escolhidos (mover_<nivel>) ou todos os filhos
+# de uma lista de pais (mover_filhos_<nivel>), num único UPDATE. Devolvem
+# o id e o pai antigo de cada nó movido para ajustar contadores e caches.
+for _tabela, _pai in (
+    ("area", "macro_tema_id"),
+    ("subarea", "area_id"),
+    ("disciplina", "subarea_id"),
+    ("assunto", "disciplina_id"),
+):
+    for _nome, _filtro in (
+        (f"mover_{_tabela}", "t.id = ANY(%(ids)s::int[])"),
+        (f"mover_filhos_{_tabela}", f"t.{_pai} = ANY(%(origens)s::int[])"),
+    ):
+        _registrar(
+            _nome,
+            f"""
+    UPDATE {_tabela} AS t
+       SET {_pai} = %(destino)s,
+           timestamp = CURRENT_TIMESTAMP
+      FROM {_tabela} AS antiga
+     WHERE {_filtro}
+       AND antiga.id = t.id
+       AND antiga.{_pai} <> %(destino)s
+ RETURNING t.id, antiga.{_pai}
+    """,
+        )
+
+# Remove os nós de uma fusão que ficaram sem filhos
+for _tabela, _filha, _fk in (
+    ("macro_tema", "area", "macro_tema_id"),
+    ("area", "subarea", "area_id"),
+    ("subarea", "disciplina", "subarea_id"),
+    ("disciplina", "assunto", "disciplina_id"),
+):
+    _registrar(
+        f"remover_vazios_{_tabela}",
+        f"""
+    DELETE FROM {_tabela} AS t
+     WHERE t.id = ANY(%s::int[])
+       AND NOT EXISTS (SELECT 1 FROM {_filha} f WHERE f.{_fk} = t.id)
+    """,
+    )
+
+# Desliga o trigger de contadores por linha só nesta transação...
+_registrar("contagem_em_lote", "SELECT set_config('contagem.em_lote', 'on', true)")
+# ...e ajusta os contadores uma vez por pai antigo
+_registrar(
+    "contagem_mover",
+    "SELECT contagem_mover(%s, %s, %s::int[], %s::int[], %s)",
+)
+# ...ou, na importação, uma vez por nível com os pais das linhas inseridas
+_registrar("contagem_inserir", "SELECT contagem_inserir(%s, %s::int[])")
+
+# --- Relatórios ----------------------------------------------------------------
+
+# Chave de ordenação do Relatório Geral. assunto_id e o número do LBL
+# (NULL vira o maior inteiro para ficar por último) a tornam única,
+# o que permite paginar por keyset.
+_CHAVE_RELATORIO_GERAL = (
+    "p.macro_tema, p.area, p.subarea, p.disciplina, p.assunto, "
+    "p.assunto_id, COALESCE(l.lbl, 2147483647)"
+)
+
+_FROM_RELATORIO_GERAL = """
+    FROM assunto_path AS p
+    LEFT JOIN assunto_lbl AS al ON p.assunto_id = al.assunto_id
+    LEFT JOIN lbl AS l ON al.lbl_id = l.id
+"""
+
+# Filtros opcionais: parâmetro NULL desliga a condição. Como estas
+# consultas não são preparadas, os valores chegam como literais e o
+# planejador descarta as condições desligadas antes de escolher o plano.
+_WHERE_RELATORIO_GERAL = """
+    WHERE (%(macro_tema_id)s IS NULL OR p.macro_tema_id = %(macro_tema_id)s)
+      AND (%(lbl_id)s IS NULL OR al.lbl_id = %(lbl_id)s)
+      AND (NOT %(sem_lbl)s OR al.lbl_id IS NULL)
+      AND (%(texto)s IS NULL
+           OR p.assunto ILIKE %(texto)s OR p.disciplina ILIKE %(texto)s
+           OR p.subarea ILIKE %(texto)s OR p.area ILIKE %(texto)s
+           OR p.macro_tema ILIKE %(texto)s)
+"""
+
+_registrar(
+    "relatorio_geral_pagina",
+    f"""
+    SELECT
+      p.macro_tema AS macro_tema,
+      p.area AS area,
+      p.subarea AS subarea,
+      p.disciplina AS disciplina,
+      p.assunto AS assunto,
+      COALESCE('LBL ' || l.lbl || ' - ' || l.nome, '') AS lbl,
+      p.assunto_id AS assunto_id,
+      COALESCE(l.lbl, 2147483647) AS lbl_ordem
+    {_FROM_RELATORIO_GERAL}
+    {_WHERE_RELATORIO_GERAL}
+      AND (%(k0)s IS NULL OR ({_CHAVE_RELATORIO_GERAL}) >
+           (%(k0)s, %(k1)s, %(k2)s, %(k3)s, %(k4)s, %(k5)s, %(k6)s))
+    ORDER BY {_CHAVE_RELATORIO_GERAL}
+    LIMIT %(limite)s
+    """,
+    leitura=True,
+)
+_registrar(
+    "relatorio_geral_exportacao",
+    f"""
+    SELECT
+      p.macro_tema AS macro_tema,
+      p.area AS area,
+      p.subarea AS subarea,
+      p.disciplina AS disciplina,
+      p.assunto AS assunto,
+      COALESCE('LBL ' || l.lbl || ' - ' || l.nome, '') AS lbl
+    {_FROM_RELATORIO_GERAL}
+    {_WHERE_RELATORIO_GERAL}
+    ORDER BY {_CHAVE_RELATORIO_GERAL}
+    """,
+)
+_registrar(
+    "relatorio_geral_total",
+    f"SELECT COUNT(*) AS total {_FROM_RELATORIO_GERAL} {_WHERE_RELATORIO_GERAL}",
+    leitura=True,
+)
+
+# Todas as contagens do Relatório em uma única consulta; a coluna `conjunto`
+# diz a qual gráfico cada linha pertence. Os totais por nível e por LBL vêm
+# de contagem_hierarquia (mantida por triggers), lendo uma linha por grupo;
+# só a distribuição LBL × macro tema é agregada na hora.
+_registrar(
+    "contagens",
+    """
+    SELECT 'macro' AS conjunto,
+           NULL::INTEGER AS lbl_id, NULL::INTEGER AS lbl_num, NULL::TEXT AS lbl_nome,
+           mt.id AS macro_id, mt.macro_tema AS macro_tema,
+           NULL::TEXT AS area, NULL::TEXT AS subarea, NULL::TEXT AS disciplina,
+           c.filhos AS total_areas, 0 AS total_subareas, 0 AS total_disciplinas,
+           c.assuntos AS total_assuntos
+      FROM contagem_hierarquia AS c
+      JOIN macro_tema AS mt ON c.nivel = 'macro_tema' AND c.node_id = mt.id
+    UNION ALL
+    SELECT 'area', NULL, NULL, NULL, NULL, NULL, ar.area, NULL, NULL,
+           0, SUM(c.filhos), 0, SUM(c.assuntos)
+      FROM contagem_hierarquia AS c
+      JOIN area AS ar ON c.nivel = 'area' AND c.node_id = ar.id
+     GROUP BY ar.area
+    UNION ALL
+    SELECT 'subarea', NULL, NULL, NULL, NULL, NULL, NULL, s.subarea, NULL,
+           0, 0, SUM(c.filhos), SUM(c.assuntos)
+      FROM contagem_hierarquia AS c
+      JOIN subarea AS s ON c.nivel = 'subarea' AND c.node_id = s.id
+     GROUP BY s.subarea
+    UNION ALL
+    SELECT 'disciplina', NULL, NULL, NULL, NULL, NULL, NULL, NULL, d.nome,
+           0, 0, 0, SUM(c.assuntos)
+      FROM contagem_hierarquia AS c
+      JOIN disciplina AS d ON c.nivel = 'disciplina' AND c.node_id = d.id
+     GROUP BY d.nome
+    UNION ALL
+    SELECT 'lbl', l.id, l.lbl, l.nome, NULL, NULL, NULL, NULL, NULL,
+           0, 0, 0, COALESCE(c.assuntos, 0)
+      FROM lbl AS l
+      LEFT JOIN contagem_hierarquia AS c ON c.nivel = 'lbl' AND c.node_id = l.id
+    UNION ALL
+    SELECT 'lbl_macro', l.id, l.lbl, l.nome, p.macro_tema_id, p.macro_tema,
+           NULL, NULL, NULL, 0, 0, 0, COUNT(*)
+      FROM assunto_lbl AS al
+      JOIN lbl AS l ON al.lbl_id = l.id
+      JOIN assunto_path AS p ON al.assunto_id = p.assunto_id
+     GROUP BY l.id, l.lbl, l.nome, p.macro_tema_id, p.macro_tema
+    """,
+    leitura=True,
+)
+_registrar(
+    "tabela_assuntos_lbl",
+    """
+    SELECT
+      p.assunto                       AS assunto,
+      p.disciplina                    AS disciplina,
+      p.subarea                       AS subarea,
+      p.area                          AS area,
+      p.macro_tema                    AS macro_tema
+    FROM assunto_lbl AS al
+    JOIN assunto_path AS p ON al.assunto_id = p.assunto_id
+    WHERE al.lbl_id = %s
+    ORDER BY p.macro_tema, p.area, p.subarea, p.disciplina, p.assunto
+    """,
+    preparar=True,
+    amostra="SELECT lbl_id FROM assunto_lbl LIMIT 1",
+    leitura=True,
+)
+# Lê os contadores mantidos por triggers (uma linha por macro tema)
+_registrar(
+    "total_assuntos_por_macro_tema",
+    """
+    SELECT
+        mt.macro_tema,
+        c.assuntos AS total_assuntos
+    FROM macro_tema mt
+    JOIN contagem_hierarquia c
+      ON c.nivel = 'macro_tema' AND c.node_id = mt.id
+    ORDER BY total_assuntos DESC
+    """,
+    leitura=True,
+)
+_FROM_ASSUNTOS_SEM_LBL = """
+    FROM assunto_path p
+    WHERE NOT EXISTS (
+        SELECT 1 FROM assunto_lbl al WHERE al.assunto_id = p.assunto_id
+    )
+"""
+_SELECT_ASSUNTOS_SEM_LBL = f"""
+    SELECT
+        p.assunto_id,
+        p.assunto,
+        p.disciplina,
+        p.subarea,
+        p.area,
+        p.macro_tema
+    {_FROM_ASSUNTOS_SEM_LBL}
+    ORDER BY p.macro_tema, p.area, p.subarea, p.disciplina, p.assunto
+"""
+# Completa, só para a exportação (cursor no servidor)
+_registrar("assuntos_sem_lbl", _SELECT_ASSUNTOS_SEM_LBL, leitura=True)
+# A tela mostra o total e só as primeiras linhas
+_registrar(
+    "assuntos_sem_lbl_previa",
+    _SELECT_ASSUNTOS_SEM_LBL + "    LIMIT %s\n",
+    leitura=True,
+)
+_registrar(
+    "assuntos_sem_lbl_total",
+    f"SELECT COUNT(*) AS total {_FROM_ASSUNTOS_SEM_LBL}",
+    leitura=True,
+)
+
+# --- Busca global ------------------------------------------------------------------
+
+# Candidatos de um nível: casa o termo sem acento e sem caixa contra os
+# índices GIN pg_trgm sobre f_unaccent(lower(coluna)) (ver migrations/).
+# Substring (LIKE) ou similaridade de palavra (<%); os que começam com o
+# termo ganham 1 ponto a mais. Cada nível traz no máximo `limite` linhas
+# antes de buscar o caminho.
+def _candidatos_busca(tabela, coluna, pai="NULL"):
+    alvo = f"f_unaccent(lower({coluna}))"
+    return f"""(
+        SELECT id, {coluna} AS nome, {pai} AS pai,
+               word_similarity(f_unaccent(lower(%(termo)s)), {alvo})
+                 + ({alvo} LIKE f_unaccent(lower(%(prefixo)s)))::int AS relevancia
+          FROM {tabela}
+         WHERE {alvo} LIKE f_unaccent(lower(%(contem)s))
+            OR f_unaccent(lower(%(termo)s)) <%% {alvo}
+         ORDER BY relevancia DESC, nome
+         LIMIT %(limite)s
+    )"""
+
+
+_registrar(
+    "busca_global",
+    f"""
+    SELECT nivel, id, nome, caminho, relevancia FROM (
+        SELECT 'macro_tema' AS nivel, r.id, r.nome, '' AS caminho, r.relevancia
+          FROM {_candidatos_busca("macro_tema", "macro_tema")} AS r
+        UNION ALL
+        SELECT 'area', r.id, r.nome, mt.macro_tema, r.relevancia
+          FROM {_candidatos_busca("area", "area", "macro_tema_id")} AS r
+          JOIN macro_tema mt ON mt.id = r.pai
+        UNION ALL
+        SELECT 'subarea', r.id, r.nome, concat_ws(' – ', mt.macro_tema, ar.area), r.relevancia
+          FROM {_candidatos_busca("subarea", "subarea", "area_id")} AS r
+          JOIN area ar ON ar.id = r.pai
+          JOIN macro_tema mt ON mt.id = ar.macro_tema_id
+        UNION ALL
+        SELECT 'disciplina', r.id, r.nome,
+               concat_ws(' – ', mt.macro_tema, ar.area, s.subarea), r.relevancia
+          FROM {_candidatos_busca("disciplina", "nome", "subarea_id")} AS r
+          JOIN subarea s ON s.id = r.pai
+          JOIN area ar ON ar.id = s.area_id
+          JOIN macro_tema mt ON mt.id = ar.macro_tema_id
+        UNION ALL
+        SELECT 'assunto', r.id, r.nome,
+               concat_ws(' – ', mt.macro_tema, ar.area, s.subarea, d.nome), r.relevancia
+          FROM {_candidatos_busca("assunto", "assunto", "disciplina_id")} AS r
+          JOIN disciplina d ON d.id = r.pai
+          JOIN subarea s ON s.id = d.subarea_id
+          JOIN area ar ON ar.id = s.area_id
+          JOIN macro_tema mt ON mt.id = ar.macro_tema_id
+        UNION ALL
+        SELECT 'lbl', r.id, r.nome, 'LBL ' || r.pai, r.relevancia
+          FROM {_candidatos_busca("lbl", "nome", "lbl")} AS r
+    ) AS resultados
+    ORDER BY relevancia DESC, nome
+    LIMIT %(limite)s
+    """,
+    leitura=True,
+)
+
+# Busca por nível dos seletores da Edição: só os ids, o caminho vem da
+# hierarquia em memória
+for _nivel, _tabela, _coluna in (
+    ("area", "area", "area"),
+    ("subarea", "subarea", "subarea"),
+    ("disciplina", "disciplina", "nome"),
+    ("assunto", "assunto", "assunto"),
+):
+    _registrar(
+        f"busca_{_nivel}",
+        f"SELECT r.id FROM {_candidatos_busca(_tabela, _coluna)} AS r "
+        "ORDER BY r.relevancia DESC, r.nome",
+        leitura=True,
+    )
+
+# --- Log de consultas lentas ---------------------------------------------------
+
+_registrar(
+    "registrar_consulta_lenta",
+    """
+    INSERT INTO slow_query_log (consulta, pagina, duracao_ms, parametros, plano)
+    VALUES (%s, %s, %s, %s::jsonb, %s::jsonb)
+    """,
+)
+_registrar(
+    "consultas_lentas_recentes",
+    """
+    SELECT instante, consulta, pagina, duracao_ms, parametros, plano
+      FROM slow_query_log
+     ORDER BY instante DESC
+     LIMIT %s
+    """,
+)
+
+# --- Manutenção ----------------------------------------------------------------
+
+_registrar(
+    "refresh_assunto_path",
+    "REFRESH MATERIALIZED VIEW CONCURRENTLY assunto_path",
+)
+_registrar(
+    "rebuild_contagens",
+    "SELECT rebuild_contagem_hierarquia()",
+)
+
+# --- Importação (staging temporária, ver scripts/importer.py) ------------------
+
+_registrar(
+    "importar_criar_staging",
+    """
+    CREATE TEMP TABLE stage_grade (
+        macro_tema TEXT NOT NULL,
+        area TEXT NOT NULL,
+        subarea TEXT NOT NULL,
+        disciplina TEXT NOT NULL,
+        assunto TEXT NOT NULL,
+        lbl INTEGER,
+        macro_tema_id INTEGER,
+        area_id INTEGER,
+        subarea_id INTEGER,
+        disciplina_id INTEGER,
+        assunto_id INTEGER,
+        lbl_id INTEGER
+    ) ON COMMIT DROP
+    """,
+)
+_registrar(
+    "importar_copy",
+    "COPY stage_grade (macro_tema, area, subarea, disciplina, assunto, lbl) "
+    "FROM STDIN WITH (FORMAT csv)",
+)
+_registrar("importar_analyze", "ANALYZE stage_grade")
+
+# Cada nível: insere os nomes que faltam sob o pai já resolvido (devolvendo o
+# pai de cada linha nova, para contagem_inserir) e depois grava na staging o
+# id resolvido (o menor id, se houver nomes repetidos).
+_registrar(
+    "importar_macro_tema",
+    """
+    INSERT INTO macro_tema (macro_tema)
+    SELECT DISTINCT s.macro_tema FROM stage_grade s
+     WHERE NOT EXISTS (SELECT 1 FROM macro_tema m WHERE m.macro_tema = s.macro_tema)
+    """,
+)
+_registrar(
+    "resolver_macro_tema",
+    """
+    UPDATE stage_grade s SET macro_tema_id = m.id
+      FROM (SELECT macro_tema, MIN(id) AS id FROM macro_tema GROUP BY macro_tema) m
+     WHERE m.macro_tema = s.macro_tema
+    """,
+)
+_registrar(
+    "importar_area",
+    """
+    INSERT INTO area (area, macro_tema_id)
+    SELECT DISTINCT s.area, s.macro_tema_id FROM stage_grade s
+     WHERE NOT EXISTS (
+           SELECT 1 FROM area a
+            WHERE a.area = s.area AND a.macro_tema_id = s.macro_tema_id)
+    RETURNING macro_tema_id
+    """,
+)
+_registrar(
+    "resolver_area",
+    """
+    UPDATE stage_grade s SET area_id = a.id
+      FROM (SELECT area, macro_tema_id, MIN(id) AS id
+              FROM area GROUP BY area, macro_tema_id) a
+     WHERE a.area = s.area AND a.macro_tema_id = s.macro_tema_id
+    """,
+)
+_registrar(
+    "importar_subarea",
+    """
+    INSERT INTO subarea (subarea, area_id)
+    SELECT DISTINCT s.subarea, s.area_id FROM stage_grade s
+     WHERE NOT EXISTS (
+           SELECT 1 FROM subarea sa
+            WHERE sa.subarea = s.subarea AND sa.area_id = s.area_id)
+    RETURNING area_id
+    """,
+)
+_registrar(
+    "resolver_subarea",
+    """
+    UPDATE stage_grade s SET subarea_id = sa.id
+      FROM (SELECT subarea, area_id, MIN(id) AS id
+              FROM subarea GROUP BY subarea, area_id) sa
+     WHERE sa.subarea = s.subarea AND sa.area_id = s.area_id
+    """,
+)
+_registrar(
+    "importar_disciplina",
+    """
+    INSERT INTO disciplina (nome, subarea_id)
+    SELECT DISTINCT s.disciplina, s.subarea_id FROM stage_grade s
+     WHERE NOT EXISTS (
+           SELECT 1 FROM disciplina d
+            WHERE d.nome = s.disciplina AND d.subarea_id = s.subarea_id)
+    RETURNING subarea_id
+    """,
+)
+_registrar(
+    "resolver_disciplina",
+    """
+    UPDATE stage_grade s SET disciplina_id = d.id
+      FROM (SELECT nome, subarea_id, MIN(id) AS id
+              FROM disciplina GROUP BY nome, subarea_id) d
+     WHERE d.nome = s.disciplina AND d.subarea_id = s.subarea_id
+    """,
+)
+_registrar(
+    "importar_assunto",
+    """
+    INSERT INTO assunto (assunto, disciplina_id)
+    SELECT DISTINCT s.assunto, s.disciplina_id FROM stage_grade s
+     WHERE NOT EXISTS (
+           SELECT 1 FROM assunto a
+            WHERE a.assunto = s.assunto AND a.disciplina_id = s.disciplina_id)
+    RETURNING disciplina_id
+    """,
+)
+_registrar(
+    "resolver_assunto",
+    """
+    UPDATE stage_grade s SET assunto_id = a.id
+      FROM (SELECT assunto, disciplina_id, MIN(id) AS id
+              FROM assunto GROUP BY assunto, disciplina_id) a
+     WHERE a.assunto = s.assunto AND a.disciplina_id = s.disciplina_id
+    """,
+)
+_registrar(
+    "importar_resolver_lbl",
+    "UPDATE stage_grade s SET lbl_id = l.id FROM lbl l WHERE l.lbl = s.lbl",
+)
+_registrar(
+    "importar_lbls_desconhecidos",
+    """
+    SELECT DISTINCT lbl FROM stage_grade
+     WHERE lbl IS NOT NULL AND lbl_id IS NULL
+     ORDER BY lbl
+    """,
+)
+_registrar(
+    "importar_assunto_lbl",
+    """
+    INSERT INTO assunto_lbl (assunto_id, lbl_id)
+    SELECT DISTINCT assunto_id, lbl_id FROM stage_grade
+     WHERE lbl_id IS NOT NULL
+    ON CONFLICT DO NOTHING
+    RETURNING lbl_id
+    """,
+)
+
+
+# --- Execução ------------------------------------------------------------------
+
+
+def _para_prepare(sql):
+    """Troca os %s posicionais por $1, $2, ... (sintaxe do PREPARE)."""
+    contador = itertools.count(1)
+    return re.sub(r"%s", lambda _: f"${next(contador)}", sql)
+
+
+def _execute_por_nome(nome, params):
+    marcadores = ", ".join(["%s"] * len(params or ()))
+    return f"EXECUTE {nome} ({marcadores})" if marcadores else f"EXECUTE {nome}"
+
+
+def escape_like(texto):
+    """Escapa os curingas de LIKE (%, _ e a barra) de um texto digitado."""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def texto(nome):
+    """Texto SQL da instrução registrada (para cursores nomeados e o COPY)."""
+    return CONSULTAS[nome].sql
+
+
+def _executar(cur, consulta, params):
+    nome = consulta.nome
+    preparadas = getattr(cur.connection, "preparadas", None)
+    if not (consulta.preparar and DB_PREPARED_STATEMENTS and preparadas is not None):
+        cur.execute(consulta.sql, params)
+        return
+    if nome not in preparadas:
+        cur.execute(f"PREPARE {nome} AS {_para_prepare(consulta.sql)}")
+        preparadas.add(nome)
+    try:
+        cur.execute(_execute_por_nome(nome, params), params)
+    except errors.InvalidSqlStatementName:
+        # A sessão perdeu a instrução (ex.: DISCARD ALL); prepara de novo na próxima
+        preparadas.discard(nome)
+        raise
+
+
+_ultima_captura = {}
+_captura_lock = threading.Lock()
+
+
+def _capturar_plano(consulta, params, ms, pagina):
+    try:
+        with get_connection() as conn, conn.cursor() as cur:
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {consulta.sql}", params)
+            plano = cur.fetchone()[0]
+            conn.rollback()
+            executar(cur, "registrar_consulta_lenta", (
+                consulta.nome, pagina, ms,
+                json.dumps(params, default=str), json.dumps(plano),
+            ))
+    except Exception as e:
+        logger.warning("Falha ao capturar o plano de %s: %s", consulta.nome, e)
+
+
+def _talvez_capturar(consulta, params, ms):
+    """Agenda a captura do plano se a leitura passou do limite configurado."""
+    # EXPLAIN ANALYZE executa a instrução de novo: só vale para leituras
+    if not SLOW_QUERY_MS or ms < SLOW_QUERY_MS or not consulta.leitura:
+        return
+    agora = time.monotonic()
+    with _captura_lock:
+        ultima = _ultima_captura.get(consulta.nome)
+        if ultima is not None and agora - ultima < SLOW_QUERY_INTERVALO:
+            return
+        _ultima_captura[consulta.nome] = agora
+    threading.Thread(
+        target=_capturar_plano,
+        args=(consulta, params, ms, pagina_atual()),
+        daemon=True,
+    ).start()
+
+
+def executar(cur, nome, params=None):
+    """
+    Executa a instrução registrada no cursor. As instruções quentes são
+    preparadas na primeira vez em cada conexão e depois executadas pelo nome.
+    Duração e linhas vão para scripts/telemetry.py.
+    """
+    consulta = CONSULTAS[nome]
+    inicio = time.perf_counter()
+    linhas = None
+    try:
+        _executar(cur, consulta, params)
+        linhas = cur.rowcount if cur.rowcount >= 0 else None
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        registrar_consulta(nome, ms, linhas)
+    _talvez_capturar(consulta, params, ms)
+    return cur
+
+
+def ler_df(nome, params=None):
+    """
+    Executa a consulta registrada e devolve um DataFrame. As preparadas usam
+    o pool psycopg2 (onde ficam preparadas); as demais, a engine do pandas.
+    """
+    consulta = CONSULTAS[nome]
+    if consulta.preparar:
+        with get_connection() as conn, conn.cursor() as cur:
+            executar(cur, nome, params)
+            colunas = [c.name for c in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=colunas)
+
+    inicio = time.perf_counter()
+    linhas = None
+    try:
+        df = pd.read_sql(consulta.sql, get_engine(), params=params)
+        linhas = len(df)
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        registrar_consulta(nome, ms, linhas)
+    _talvez_capturar(consulta, params, ms)
+    return df
+
+
+def executar_lote(cur, nome, linhas):
+    """
+    Executa a instrução registrada (com VALUES %s) para todas as linhas em
+    um único comando (execute_values). Devolve as linhas do RETURNING, se
+    a instrução tiver um.
+    """
+    consulta = CONSULTAS[nome]
+    inicio = time.perf_counter()
+    try:
+        return execute_values(
+            cur, consulta.sql, linhas,
+            page_size=max(len(linhas), 1),
+            fetch="RETURNING" in consulta.sql,
+        )
+    finally:
+        registrar_consulta(nome, (time.perf_counter() - inicio) * 1000, len(linhas))
+
+
+# --- Relatório de tempo de planejamento ----------------------------------------
+
+
+def _tempo_planejamento(cur, sql, params):
+    cur.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}", params)
+    plano = cur.fetchone()[0]
+    return plano[0]["Planning Time"]
+
+
+def relatorio_planejamento(repeticoes=20):
+    """
+    Compara, para cada instrução preparada com amostra, a mediana do tempo
+    de planejamento (ms) executando o texto a cada vez e executando uma
+    versão preparada. Tudo roda numa transação desfeita ao final.
+    """
+    linhas = []
+    with get_connection() as conn, conn.cursor() as cur:
+        for consulta in CONSULTAS.values():
+            if not (consulta.preparar and consulta.amostra):
+                continue
+            cur.execute(consulta.amostra)
+            params = cur.fetchone()
+            if params is None:
+                continue
+
+            sem_preparo = [
+                _tempo_planejamento(cur, consulta.sql, params) for _ in range(repeticoes)
+            ]
+            nome_plano = f"plano_{consulta.nome}"
+            cur.execute(f"PREPARE {nome_plano} AS {_para_prepare(consulta.sql)}")
+            try:
+                com_preparo = [
+                    _tempo_planejamento(cur, _execute_por_nome(nome_plano, params), params)
+                    for _ in range(repeticoes)
+                ]
+            finally:
+                cur.execute(f"DEALLOCATE {nome_plano}")
+
+            linhas.append({
+                "consulta": consulta.nome,
+                "sem_preparo_ms": statistics.median(sem_preparo),
+                "com_preparo_ms": statistics.median(com_preparo),
+            })
+        conn.rollback()
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara o tempo de planejamento das consultas com e sem PREPARE."
+    )
+    parser.add_argument(
+        "--repeticoes", type=int, default=20, help="Execuções por consulta (padrão: 20)"
+    )
+    args = parser.parse_args()
+
+    linhas = relatorio_planejamento(args.repeticoes)
+    if not linhas:
+        print("Nenhuma consulta com dados de amostra no banco.")
+        return
+    print(f"{'consulta':<28} {'sem preparo (ms)':>17} {'com preparo (ms)':>17} {'ganho':>7}")
+    for linha in linhas:
+        sem, com = linha["sem_preparo_ms"], linha["com_preparo_ms"]
+        ganho = f"{sem / com:.1f}x" if com else "-"
+        print(f"{linha['consulta']:<28} {sem:>17.3f} {com:>17.3f} {ganho:>7}")
+
+
+if __name__ == "__main__":
+    main()
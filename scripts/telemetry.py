@@ -0,0 +1,156 @@
+# scripts/telemetry.py
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+# Quantos eventos (consultas e reruns) ficam em memória no processo
+TELEMETRIA_MAX_EVENTOS = int(os.getenv("TELEMETRIA_MAX_EVENTOS", "5000"))
+
+_lock = threading.Lock()
+_consultas = deque(maxlen=TELEMETRIA_MAX_EVENTOS)
+_reruns = deque(maxlen=TELEMETRIA_MAX_EVENTOS)
+
+# Estado do rerun em andamento. O Streamlit roda o script de cada sessão
+# na sua própria thread, então o rerun atual é guardado por thread; as
+# threads auxiliares (scripts/parallel.py) adotam o rerun da página.
+_local = threading.local()
+
+
+class _Rerun:
+    """Totais de um rerun, compartilhados com as threads auxiliares."""
+
+    def __init__(self, pagina=None):
+        self.pagina = pagina
+        self.inicio = None
+        self.consultas = 0
+        self.ms_consultas = 0.0
+        self.modo = "serial"
+
+
+def _rerun():
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        rerun = _local.rerun = _Rerun()
+    return rerun
+
+
+def _executadas():
+    # Por thread (não por rerun): medir_cache compara antes e depois da
+    # chamada, e outra thread do mesmo rerun não pode interferir
+    return getattr(_local, "executadas", 0)
+
+
+def pagina_atual():
+    """Página do rerun em andamento nesta thread ("-" fora de uma página)."""
+    return _rerun().pagina or "-"
+
+
+def rerun_atual():
+    """Rerun desta thread, para repassar a uma thread auxiliar."""
+    return _rerun()
+
+
+def adotar_rerun(rerun):
+    """Faz as consultas desta thread contarem no rerun informado (None solta)."""
+    _local.rerun = rerun
+
+
+def marcar_paralelo():
+    """Registra que o rerun usou o executor de consultas em paralelo."""
+    _rerun().modo = "paralelo"
+
+
+def inicio_pagina(nome):
+    """Marca o início de um rerun; as consultas seguintes são atribuídas à página."""
+    rerun = _local.rerun = _Rerun(nome)
+    rerun.inicio = time.perf_counter()
+
+
+def fim_pagina():
+    """Registra o tempo total do rerun aberto por inicio_pagina."""
+    rerun = _rerun()
+    if rerun.inicio is None:
+        return
+    ms = (time.perf_counter() - rerun.inicio) * 1000
+    rerun.inicio = None
+    with _lock:
+        _reruns.append({
+            "instante": time.time(),
+            "pagina": rerun.pagina,
+            "modo": rerun.modo,
+            "ms": ms,
+            "consultas": rerun.consultas,
+            "ms_consultas": rerun.ms_consultas,
+        })
+
+
+@contextlib.contextmanager
+def pagina(nome):
+    """
+    Mede um rerun da página inteira (with pagina("Nome"): corpo da página).
+    O registro fica no finally: reruns que terminam em st.rerun(), st.stop()
+    ou numa exceção não tratada também contam.
+    """
+    inicio_pagina(nome)
+    try:
+        yield
+    finally:
+        fim_pagina()
+
+
+def registrar_consulta(nome, ms, linhas=None, cache=False):
+    """Registra uma execução (ou um acerto de cache) da instrução `nome`."""
+    if not cache:
+        _local.executadas = _executadas() + 1
+    rerun = _rerun()
+    with _lock:
+        rerun.consultas += 1
+        rerun.ms_consultas += ms
+        _consultas.append({
+            "instante": time.time(),
+            "pagina": rerun.pagina or "-",
+            "consulta": nome,
+            "ms": ms,
+            "linhas": linhas,
+            "cache": cache,
+        })
+
+
+def medir_cache(nome):
+    """
+    Envolve uma função com st.cache_data/st.cache_resource e registra os
+    acertos de cache: se nenhuma instrução rodou durante a chamada, o
+    resultado veio do cache. Mantém .clear() para a invalidação.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            executadas = _executadas()
+            inicio = time.perf_counter()
+            resultado = func(*args, **kwargs)
+            if _executadas() == executadas:
+                linhas = len(resultado) if hasattr(resultado, "__len__") else None
+                registrar_consulta(
+                    nome, (time.perf_counter() - inicio) * 1000, linhas, cache=True
+                )
+            return resultado
+
+        wrapper.clear = func.clear
+        return wrapper
+    return decorador
+
+
+def eventos():
+    """Cópia das consultas e reruns registrados (mais antigos primeiro)."""
+    with _lock:
+        return list(_consultas), list(_reruns)
+
+
+def limpar():
+    """Descarta os eventos registrados."""
+    with _lock:
+        _consultas.clear()
+        _reruns.clear()
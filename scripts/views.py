@@ -0,0 +1,65 @@
+# scripts/views.py
+import logging
+import os
+import threading
+
+from scripts.db import get_connection
+from scripts.sql import executar
+
+logger = logging.getLogger(__name__)
+
+# "write": atualiza assunto_path em segundo plano depois das escritas na
+# hierarquia; "schedule": só o agendador atualiza (python -m scripts.views via cron).
+ASSUNTO_PATH_REFRESH = os.getenv("ASSUNTO_PATH_REFRESH", "write")
+# Espera antes da atualização: as escritas desse intervalo viram um só REFRESH
+ASSUNTO_PATH_DEBOUNCE = float(os.getenv("ASSUNTO_PATH_DEBOUNCE_SECONDS", "5"))
+
+_agendado = None
+_depois = []
+_agendado_lock = threading.Lock()
+# Um REFRESH por vez: dois CONCURRENTLY na mesma view só esperariam um pelo outro
+_refresh_lock = threading.Lock()
+
+
+def refresh_assunto_path():
+    """Atualiza a view materializada assunto_path sem bloquear as leituras."""
+    with _refresh_lock, get_connection() as conn, conn.cursor() as cur:
+        executar(cur, "refresh_assunto_path")
+
+
+def _refresh_agendado():
+    global _agendado, _depois
+    with _agendado_lock:
+        # Escritas a partir daqui agendam outra atualização
+        _agendado, depois, _depois = None, _depois, []
+    try:
+        refresh_assunto_path()
+    except Exception:
+        logger.exception("Não foi possível atualizar a view assunto_path")
+    for chamada in depois:
+        chamada()
+
+
+def refresh_after_write(depois=None):
+    """
+    Agenda a atualização de assunto_path depois de uma escrita, se configurado
+    para isso. Roda fora da requisição, ASSUNTO_PATH_DEBOUNCE segundos depois
+    da primeira escrita ainda não refletida na view; `depois` é chamada em
+    seguida (ex.: limpar os caches que leem a view).
+    """
+    global _agendado
+    if ASSUNTO_PATH_REFRESH != "write":
+        return
+    with _agendado_lock:
+        if depois is not None and depois not in _depois:
+            _depois.append(depois)
+        if _agendado is not None:
+            return
+        _agendado = threading.Timer(ASSUNTO_PATH_DEBOUNCE, _refresh_agendado)
+        _agendado.daemon = True
+        _agendado.start()
+
+
+if __name__ == "__main__":
+    refresh_assunto_path()
+    print("View 'assunto_path' atualizada.")